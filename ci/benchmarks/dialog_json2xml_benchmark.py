@@ -0,0 +1,77 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Measures how long dialog_json2xml takes to convert synthetic workspaces of various sizes.
+# Run from the root directory of the repository:
+#   PYTHONPATH=./scripts python ci/benchmarks/dialog_json2xml_benchmark.py
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import dialog_json2xml
+from wawCommons import setLoggerConfig
+
+
+def generateDialogNodes(nodesCount, childrenCount=10):
+    """Generates dialog nodes of a workspace, every top level node has up to 'childrenCount' children."""
+    dialogNodes = []
+    previousTopName = None
+    index = 0
+    while index < nodesCount:
+        topName = 'node_' + str(index)
+        dialogNodes.append({'dialog_node': topName, 'previous_sibling': previousTopName,
+                            'conditions': '#intent_' + str(index), 'output': {'text': 'answer ' + str(index)}})
+        previousTopName = topName
+        index += 1
+        previousChildName = None
+        for _ in range(min(childrenCount, nodesCount - index)):
+            childName = 'node_' + str(index)
+            dialogNodes.append({'dialog_node': childName, 'parent': topName, 'previous_sibling': previousChildName,
+                                'conditions': '$slot == ' + str(index), 'context': {'value': index}})
+            previousChildName = childName
+            index += 1
+    # WA does not return the nodes in the order of the tree
+    dialogNodes.reverse()
+    return dialogNodes
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Measures conversion time of dialog_json2xml script on synthetic workspaces', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-n', '--nodes', type=int, nargs='+', default=[1000, 10000, 50000], help='numbers of dialog nodes of the generated workspaces')
+    args = parser.parse_args(argv)
+
+    setLoggerConfig('WARNING')
+
+    workDir = tempfile.mkdtemp()
+    try:
+        for nodesCount in args.nodes:
+            dialogPath = os.path.join(workDir, 'dialog_' + str(nodesCount) + '.json')
+            with open(dialogPath, 'w') as dialogFile:
+                json.dump(generateDialogNodes(nodesCount), dialogFile)
+
+            start = time.time()
+            dialog_json2xml.main([dialogPath, '-d', workDir])
+            print('%6d nodes: %8.3f s' % (nodesCount, time.time() - start))
+    finally:
+        shutil.rmtree(workDir)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
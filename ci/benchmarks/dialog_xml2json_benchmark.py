@@ -0,0 +1,97 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Compares preprocessing of the dialog tree by separate XPath passes (the original implementation)
+# with the single pass of DialogCompiler.preprocessNodes on synthetic dialogs of various sizes.
+# Run from the root directory of the repository:
+#   PYTHONPATH=./scripts python ci/benchmarks/dialog_xml2json_benchmark.py
+
+import argparse
+import copy
+import sys
+import time
+
+import lxml.etree as LET
+
+import dialog_xml2json
+from wawCommons import setLoggerConfig
+
+
+def generateDialogTree(nodesCount, childrenCount=10):
+    """Generates dialog tree, every top level node has up to 'childrenCount' children,
+    every fifth node is named, every seventh is scoped and every node is preceded by a comment."""
+    root = LET.Element('nodes')
+    index = 0
+    while index < nodesCount:
+        parent = root
+        for level in range(min(childrenCount, nodesCount - index) + 1):
+            parent.append(LET.Comment(' node ' + str(index) + ' '))
+            node = LET.SubElement(parent, 'node')
+            if index % 5 == 0:
+                node.set('name', 'node_' + str(index))
+            if index % 7 == 0:
+                node.set('scope', 'scope_' + str(index % 2))
+            LET.SubElement(node, 'condition').text = '#intent_' + str(index)
+            LET.SubElement(LET.SubElement(node, 'output'), 'text').text = 'answer ' + str(index)
+            index += 1
+            if level == 0:
+                parent = LET.SubElement(node, 'nodes')
+    return LET.ElementTree(root)
+
+
+def multiPassPreprocess(compiler, tree):
+    """Original preprocessing, every step is a separate pass over the whole tree."""
+    for comment in tree.xpath('//comment()'):
+        comment.getparent().remove(comment)
+    for scopedNode in tree.xpath('//*[@scope]'):
+        if not compiler.inScope(scopedNode):
+            scopedNode.getparent().remove(scopedNode)
+    names = []
+    for nodeWithName in tree.xpath('//node[@name]'):
+        if nodeWithName.get('name') in names:
+            sys.exit(1)
+        names.append(nodeWithName.get('name'))
+    compiler.names = names
+    compiler.parent_map = dict((c, p) for p in tree.iter() for c in p)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Measures preprocessing time of dialog_xml2json script on synthetic dialogs', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-n', '--nodes', type=int, nargs='+', default=[1000, 20000], help='numbers of dialog nodes of the generated dialogs')
+    args = parser.parse_args(argv)
+
+    setLoggerConfig('WARNING')
+
+    compiler = dialog_xml2json.DialogCompiler()
+    compiler.config = argparse.Namespace(common_scope='scope_0')
+    for nodesCount in args.nodes:
+        tree = generateDialogTree(nodesCount)
+
+        multiPassTree = copy.deepcopy(tree)
+        start = time.time()
+        multiPassPreprocess(compiler, multiPassTree)
+        multiPassTime = time.time() - start
+
+        singlePassTree = copy.deepcopy(tree)
+        start = time.time()
+        compiler.preprocessNodes(singlePassTree.getroot())
+        singlePassTime = time.time() - start
+
+        assert LET.tostring(multiPassTree) == LET.tostring(singlePassTree)
+        print('%6d nodes: multi pass %8.3f s, single pass %8.3f s' % (nodesCount, multiPassTime, singlePassTime))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,177 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Compares evaluation of synthetic test outputs by workspace_test_evaluate with the original comparison
+# (which logged every visited element) and with the current one (diagnostics only for the failures).
+# Logs are written at INFO level to a file in a temporary directory, as they are by default to log.log.
+# Run from the root directory of the repository:
+#   PYTHONPATH=./scripts python ci/benchmarks/workspace_test_evaluate_benchmark.py
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import workspace_test_evaluate
+
+logger = workspace_test_evaluate.logger
+
+
+def loggingAreSame(expectedOutputJson, receivedOutputJson, failureData, parentPath):
+
+    logger.info("ARE SAME: %s and %s", expectedOutputJson, receivedOutputJson)
+
+    if isinstance(expectedOutputJson, str):
+        if not isinstance(receivedOutputJson, str):
+            failureData['message'] = 'Received output differs in type from expected output.' + " (" + parentPath + ")"
+            failureData['expectedElement'] = "Element of the type string (" + expectedOutputJson + ")"
+            failureData['receivedElement'] = "Element of the type " + receivedOutputJson.__class__.__name__
+            logger.info("Different type: %s and %s", expectedOutputJson, receivedOutputJson)
+            return False
+        if expectedOutputJson != receivedOutputJson:
+            failureData['message'] = 'Received output differs from expected output.' + " (" + parentPath + ")"
+            failureData['expectedElement'] = expectedOutputJson
+            failureData['receivedElement'] = receivedOutputJson
+            logger.info("NOT SAME: %s and %s", expectedOutputJson, receivedOutputJson)
+            return False
+        else:
+            logger.info('SAME: string %s and %s are same', expectedOutputJson, receivedOutputJson)
+            return True
+
+    elif isinstance(expectedOutputJson, int):
+        if not isinstance(receivedOutputJson, int):
+            failureData['message'] = 'Received output differs in type from expected output.' + " (" + parentPath + ")"
+            failureData['expectedElement'] = "Element of the type int (" + str(expectedOutputJson) + ")"
+            failureData['receivedElement'] = "Element of the type " + receivedOutputJson.__class__.__name__
+            logger.info("Different type: %s and %s", expectedOutputJson, receivedOutputJson)
+            return False
+        if expectedOutputJson != receivedOutputJson:
+            failureData['message'] = 'Received output differs from expected output.' + " (" + parentPath + ")"
+            failureData['expectedElement'] = str(expectedOutputJson)
+            failureData['receivedElement'] = str(receivedOutputJson)
+            logger.info("NOT SAME: %s and %s", expectedOutputJson, receivedOutputJson)
+            return False
+        else:
+            logger.info('SAME: int %s and %s are same', expectedOutputJson, receivedOutputJson)
+            return True
+
+    elif isinstance(expectedOutputJson, list):
+        if not isinstance(receivedOutputJson, list):
+            failureData['message'] = 'Received output differs in type from expected output.' + " (" + parentPath + ")"
+            failureData['expectedElement'] = "Element of the type list"
+            failureData['receivedElement'] = "Element of the type " + receivedOutputJson.__class__.__name__
+            logger.info("Different type: %s and %s", expectedOutputJson, receivedOutputJson)
+            return False
+        if len(expectedOutputJson) != len(receivedOutputJson):
+            failureData['message'] = 'List in received output differs in length from list in expected output.' + " (" + parentPath + ")"
+            failureData['expectedElement'] = "List of the length " + str(len(expectedOutputJson))
+            failureData['receivedElement'] = "List of the length " + str(len(receivedOutputJson))
+            logger.error('Different list length!')
+            logger.error('expected %s', expectedOutputJson)
+            logger.error('received %s', receivedOutputJson)
+            return False
+        else:
+            for i in range(len(expectedOutputJson)):
+                logger.info("STEP: Item %d", i)
+                if not loggingAreSame(expectedOutputJson[i], receivedOutputJson[i], failureData, parentPath + " - " + str(i) + "th item in list"):
+                    logger.error('Different list items in positon %d!', i)
+                    return False
+            return True
+
+    elif isinstance(expectedOutputJson, dict):
+        if not isinstance(receivedOutputJson, dict):
+            failureData['message'] = 'Received output differs in type from expected output.' + " (" + parentPath + ")"
+            failureData['expectedElement'] = "Element of the type dict"
+            failureData['receivedElement'] = "Element of the type " + receivedOutputJson.__class__.__name__
+            logger.info("Different type: %s and %s", expectedOutputJson, receivedOutputJson)
+            return False
+        for elementKey in expectedOutputJson:
+            logger.info("STEP: Element key %s", elementKey)
+            if expectedOutputJson[elementKey] is None:
+                logger.info("NONE: Element with key %s is none", elementKey)
+                continue
+            if elementKey not in receivedOutputJson or receivedOutputJson[elementKey] is None:
+                failureData['message'] = 'Received output has no key ' + elementKey + '.' + " (" + parentPath + ")"
+                failureData['expectedElement'] = "Dict with key " + elementKey
+                failureData['receivedElement'] = "None"
+                logger.error('Missing key in received json!')
+                return False
+            else:
+                if not loggingAreSame(expectedOutputJson[elementKey], receivedOutputJson[elementKey], failureData, parentPath + " - " + elementKey):
+                    logger.error('Different dict items for key %s!', elementKey)
+                    return False
+        return True
+
+    else:
+        logger.error('Unsupported type of element %s, type %s!', str(expectedOutputJson), expectedOutputJson.__class__.__name__)
+        return False
+
+
+def generateOutputs(expectedFileName, receivedFileName, linesCount):
+    """Generates files with expected and received outputs of WA, dialogs have 5 turns and every 50th line differs."""
+    with open(expectedFileName, 'w') as expectedFile, open(receivedFileName, 'w') as receivedFile:
+        for line in range(linesCount):
+            output = {'intents': [{'intent': 'intent_' + str(line % 97), 'confidence': 1}],
+                      'entities': [{'entity': 'entity_' + str(line % 13), 'value': 'value ' + str(line), 'location': [0, 5]}],
+                      'output': {'text': ['answer ' + str(line), 'next answer'], 'nodes_visited': ['node_' + str(line % 31)]},
+                      'context': {'conversation_id': 'conversation ' + str(line // 5), 'system': {'dialog_turn_counter': line % 5 + 1}}}
+            expectedFile.write(json.dumps({'dialog_id': line // 5 + 1, 'output_message': output}) + '\n')
+            if line % 50 == 0:
+                output['output']['text'][1] = 'different answer'
+            receivedFile.write(json.dumps(output) + '\n')
+
+
+def measure(expectedFileName, receivedFileName, outputFileName, workers):
+    start = time.time()
+    workspace_test_evaluate.main([expectedFileName, receivedFileName, '-o', outputFileName, '--workers', str(workers)])
+    return time.time() - start
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Measures evaluation time of workspace_test_evaluate script on synthetic test outputs', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument('-n', '--lines', type=int, default=100000, help='number of lines of the generated test outputs')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='number of processes comparing the dialogs')
+    args = parser.parse_args(argv)
+
+    workDir = tempfile.mkdtemp()
+    try:
+        logPath = os.path.join(workDir, 'log.log')
+        logging.basicConfig(level=logging.INFO, handlers=[logging.FileHandler(logPath)])
+
+        expectedFileName = os.path.join(workDir, 'expected.jsonl')
+        receivedFileName = os.path.join(workDir, 'received.jsonl')
+        generateOutputs(expectedFileName, receivedFileName, args.lines)
+
+        currentAreSame = workspace_test_evaluate.areSame
+        workspace_test_evaluate.areSame = loggingAreSame
+        loggingTime = measure(expectedFileName, receivedFileName, os.path.join(workDir, 'logging.junit.xml'), args.workers)
+        loggingLogSize = os.path.getsize(logPath)
+        workspace_test_evaluate.areSame = currentAreSame
+
+        currentTime = measure(expectedFileName, receivedFileName, os.path.join(workDir, 'current.junit.xml'), args.workers)
+        currentLogSize = os.path.getsize(logPath) - loggingLogSize
+
+        print('%d lines: logging comparison %8.3f s (log %7.1f MB), current comparison %8.3f s (log %7.1f MB)' %
+              (args.lines, loggingTime, loggingLogSize / 1e6, currentTime, currentLogSize / 1e6))
+    finally:
+        shutil.rmtree(workDir)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -13,9 +13,12 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import json
 import os
 import shutil
+import threading
 import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 
@@ -230,3 +233,51 @@ class BaseTestCaseCapture(object):
             else:
                 missingEnvironmentVariables.sort()
                 pytest.fail('Missing ENVIRONMENT VARIABLES: ' + str(missingEnvironmentVariables))
+
+
+class FakeServiceHandler(BaseHTTPRequestHandler):
+    ''' Base of the request handlers of the fake services, subclasses define do_<METHOD> methods (routes).
+    State of the service is kept in the attributes of the server (self.server) '''
+
+    protocol_version = 'HTTP/1.1' # keep-alive connections
+
+    def readBody(self):
+        ''' Reads the body of the request, it has to be read even if it is not used, so the connection can be reused '''
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def readJson(self):
+        return json.loads(self.readBody().decode('utf8'))
+
+    def sendJson(self, status, responseJson):
+        body = json.dumps(responseJson).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeServiceTestCase(object):
+    '''
+    Base of the test classes using fake HTTP service. The service is started before each test on a free local port
+    (its url is self.serviceUrl) and stopped after it. Requests are handled by 'handlerClass' (FakeServiceHandler subclass),
+    tests set the state of the service as attributes of self.server.
+    Works with both pytest and unittest classes (pytest calls setup_method and teardown_method of unittest classes too).
+    '''
+
+    handlerClass = None
+
+    def setup_method(self, method=None):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self.handlerClass)
+        self.server.daemon_threads = True
+        self.serverThread = threading.Thread(target=self.server.serve_forever)
+        self.serverThread.start()
+        self.serviceUrl = 'http://127.0.0.1:%d' % self.server.server_address[1]
+
+    def teardown_method(self, method=None):
+        self.server.shutdown()
+        self.server.server_close()
+        self.serverThread.join()
@@ -87,3 +87,19 @@ class TestMain(BaseTestCaseCapture):
 
         self.t_noException([[inputJsonPath, '-d', outputXmlDirPath]])
         self._assertXmlEqual(expectedXmlPath, outputXmlPath)
+
+    def test_unprocessedNodes(self):
+        """Tests if orphans, cycles and nodes with duplicate position are reported"""
+        inputJsonPath = os.path.abspath(os.path.join(self.dataBasePath, 'inputUnprocessedNodes.json'))
+        outputXmlDirPath = os.path.join(self.testOutputPath, 'outputUnprocessedNodesResult')
+
+        BaseTestCaseCapture.createFolder(outputXmlDirPath)
+
+        self.t_noExceptionAndLogMessage("There are 4 unprocessed nodes", [[inputJsonPath, '-d', outputXmlDirPath]])
+        assert "Node 'orphan' is an orphan, its parent 'missing' does not exist" in self.logs.text
+        assert "Nodes form a cycle: " in self.logs.text
+        assert "Node 'duplicate' has the same parent 'None' and previous sibling 'None' as another node" in self.logs.text
+
+        with open(os.path.join(outputXmlDirPath, 'dialog.xml'), 'r') as outputXmlFile:
+            outputXml = etree.XML(outputXmlFile.read())
+        assert [node.get('name') for node in outputXml] == ['root']
@@ -0,0 +1,92 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import filecmp
+import os
+
+import dialog_xls2xml
+import pytest
+
+from ...test_utils import BaseTestCaseCapture
+
+
+class TestMain(BaseTestCaseCapture):
+
+    dataBasePath = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'main_data')
+    testOutputPath = os.path.join(dataBasePath, 'outputs')
+
+    @classmethod
+    def setup_class(cls):
+        ''' Setup any state specific to the execution of the given class (which usually contains tests). '''
+        # create output folder
+        BaseTestCaseCapture.createFolder(TestMain.testOutputPath)
+
+    def callfunc(self, *args, **kwargs):
+        dialog_xls2xml.main(*args, **kwargs)
+
+    def _convert(self, outputName, extraParams):
+        outputPath = os.path.join(self.testOutputPath, outputName)
+        BaseTestCaseCapture.createFolder(outputPath)
+        self.t_noException([['--common_xls', os.path.join(self.dataBasePath, 'xls'),
+                             '--common_generated_dialogs', os.path.join(outputPath, 'dialogs'),
+                             '--common_generated_intents', os.path.join(outputPath, 'intents'),
+                             '--common_generated_entities', os.path.join(outputPath, 'entities')] + extraParams])
+        return outputPath
+
+    @pytest.mark.parametrize('workers', ['2', '4'])
+    def test_parallelParsing(self, workers):
+        """Tests if parsing the workbooks in parallel generates the same files as parsing them one by one."""
+        sequentialPath = self._convert('outputSequential', ['--common_xls_workers', '1'])
+        parallelPath = self._convert('outputParallel' + workers, ['--common_xls_workers', workers])
+
+        for directory in ['dialogs', 'intents', 'entities']:
+            sequentialFiles = sorted(os.listdir(os.path.join(sequentialPath, directory)))
+            assert sequentialFiles
+            assert sequentialFiles == sorted(os.listdir(os.path.join(parallelPath, directory)))
+            _, mismatch, errors = filecmp.cmpfiles(os.path.join(sequentialPath, directory), os.path.join(parallelPath, directory),
+                                                   sequentialFiles, shallow=False)
+            assert not mismatch and not errors
+
+    def test_blockCache(self):
+        """Tests if blocks of the workbooks are cached, the cache can be switched off and unused entries are pruned."""
+        cachePath = os.path.join(self.testOutputPath, 'cache')
+        BaseTestCaseCapture.createFolder(cachePath)
+        for entry in os.listdir(cachePath):
+            os.remove(os.path.join(cachePath, entry))
+        cacheParams = ['--common_xls_workers', '1', '--common_xls_cache', cachePath, '-v']
+
+        referencePath = self._convert('outputWithoutCache', ['--common_xls_workers', '1'])
+        self._convert('outputCacheCreated', cacheParams)
+        assert len(os.listdir(cachePath)) == len(os.listdir(os.path.join(self.dataBasePath, 'xls')))
+        assert 'Using cached blocks' not in self.logs.text
+
+        self.caplog.clear()
+        cachedPath = self._convert('outputCacheUsed', cacheParams)
+        assert 'Using cached blocks' in self.logs.text
+        for directory in ['dialogs', 'intents', 'entities']:
+            files = sorted(os.listdir(os.path.join(referencePath, directory)))
+            _, mismatch, errors = filecmp.cmpfiles(os.path.join(referencePath, directory), os.path.join(cachedPath, directory),
+                                                   files, shallow=False)
+            assert not mismatch and not errors
+
+        self.caplog.clear()
+        self._convert('outputCacheSwitchedOff', cacheParams + ['--common_xls_no_cache'])
+        assert 'Using cached blocks' not in self.logs.text
+
+        with open(os.path.join(cachePath, 'unused.json'), 'w') as unusedEntry:
+            unusedEntry.write('{}')
+        self._convert('outputCachePruned', cacheParams + ['--common_xls_cache_prune'])
+        assert 'unused.json' not in os.listdir(cachePath)
+        assert len(os.listdir(cachePath)) == len(os.listdir(os.path.join(self.dataBasePath, 'xls')))
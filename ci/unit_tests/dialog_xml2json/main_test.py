@@ -13,11 +13,14 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import argparse
 import json
 import os
 import lxml
 import dialog_xml2json
 
+from cfgCommons import Cfg
+
 import pytest
 
 from ...test_utils import BaseTestCaseCapture
@@ -94,6 +97,91 @@ class TestMain(BaseTestCaseCapture):
                 assert expected_node == actual[index] 
 
 
+    def test_importCache(self):
+        """Tests if preprocessed imports are stored to cache, reused and invalidated when config variable changes."""
+        inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'inputCachedImport.xml'))
+        outputDirPath = os.path.join(self.testOutputPath, 'outputImportCacheResult')
+        cacheDirPath = os.path.join(outputDirPath, 'cache')
+        configPath = os.path.join(outputDirPath, 'cache.cfg')
+
+        BaseTestCaseCapture.createFolder(outputDirPath)
+
+        def convert(version, message):
+            with open(configPath, 'w') as configFile:
+                configFile.write('[cache]\nversion = ' + version + '\n')
+            self.t_noExceptionAndLogMessage(message, [['--common_dialog_main', inputXmlPath,
+                                                       '--common_configFilePaths', configPath,
+                                                       '--common_outputs_dialogs', 'dialog.json',
+                                                       '--common_outputs_directory', outputDirPath,
+                                                       '--common_import_cache', cacheDirPath,
+                                                       '--common_schema', self.dialogSchemaPath, '-v']])
+            self.caplog.clear()
+            with open(os.path.join(outputDirPath, 'dialog.json'), 'r') as outputJsonFile:
+                return json.load(outputJsonFile)
+
+        dialogJSON = convert('1.0', 'Importing')
+        assert dialogJSON[0]['context']['version'] == '1.0'
+        assert dialogJSON[0]['output']['text'] == 'Imported text'
+        assert len(os.listdir(cacheDirPath)) == 1
+
+        assert convert('1.0', 'Using cached import') == dialogJSON
+
+        dialogJSON = convert('2.0', 'config variable cache_version has changed')
+        assert dialogJSON[0]['context']['version'] == '2.0'
+
+    def test_compilerReentrant(self):
+        """Tests if single compiler produces the same dialog nodes when it is used repeatedly."""
+        inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'inputNodeTypesValid.xml'))
+        schemaPath = os.path.abspath(os.path.join(os.path.dirname(dialog_xml2json.__file__), self.dialogSchemaPath))
+        config = Cfg(argparse.Namespace(common_configFilePaths=None, common_dialog_main=inputXmlPath))
+
+        compiler = dialog_xml2json.DialogCompiler(schemaPath, 1)
+        firstDialogJSON = compiler.compile(lxml.etree.parse(inputXmlPath), config)
+        secondDialogJSON = compiler.compile(lxml.etree.parse(inputXmlPath), config)
+
+        assert firstDialogJSON
+        assert firstDialogJSON == secondDialogJSON
+        assert firstDialogJSON == dialog_xml2json.DialogCompiler(schemaPath, 1).compile(lxml.etree.parse(inputXmlPath), config)
+
+    def test_scopedNodes(self):
+        """Tests if comments and nodes out of scope (including their children) are removed, so names in removed nodes are not duplicit."""
+        inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'inputScopedNodes.xml'))
+        outputDirPath = os.path.join(self.testOutputPath, 'outputScopedNodesResult')
+
+        BaseTestCaseCapture.createFolder(outputDirPath)
+
+        self.t_noException([['--common_dialog_main', inputXmlPath,
+                            '--common_scope', 'local',
+                            '--common_outputs_dialogs', 'dialog.json',
+                            '--common_outputs_directory', outputDirPath,
+                            '--common_schema', self.dialogSchemaPath]])
+
+        with open(os.path.join(outputDirPath, 'dialog.json'), 'r') as outputJsonFile:
+            dialogJSON = json.load(outputJsonFile)
+        assert [node['dialog_node'] for node in dialogJSON] == ['common', 'local', 'localChild']
+        assert dialogJSON[2]['output']['text'] == 'Local child answer'
+
+    def test_invalidNodeNameKeepsOutput(self):
+        """Tests if the output file is not truncated when the compilation fails while the nodes are written."""
+        outputDirPath = os.path.join(self.testOutputPath, 'outputInvalidNodeNameResult')
+        BaseTestCaseCapture.createFolder(outputDirPath)
+        inputXmlPath = os.path.join(outputDirPath, 'inputInvalidNodeName.xml')
+        with open(inputXmlPath, 'w') as inputXmlFile:
+            inputXmlFile.write('<nodes><node name="valid"><condition>true</condition></node>'
+                               '<node name="!invalid"><condition>true</condition></node></nodes>')
+        outputJsonPath = os.path.join(outputDirPath, 'dialog.json')
+        with open(outputJsonPath, 'w') as outputJsonFile:
+            outputJsonFile.write('[]')
+
+        self.t_exitCodeAndLogMessage(1, "Illegal name of the node: '!invalid'",
+                                    [['--common_dialog_main', inputXmlPath,
+                                    '--common_outputs_dialogs', 'dialog.json',
+                                    '--common_outputs_directory', outputDirPath]])
+
+        with open(outputJsonPath, 'r') as outputJsonFile:
+            assert json.load(outputJsonFile) == []
+        assert not os.path.exists(outputJsonPath + '.tmp')
+
     def test_mainMissingImport(self):
         """Tests if the script fails with file with missing imported dialog file."""
         inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'inputMissingImport.xml'))
@@ -141,6 +229,20 @@ class TestMain(BaseTestCaseCapture):
             self.t_exitCodeAndLogMessage(1, msg,
                                     [['--common_dialog_main', invalidXmlPath,
                                     '--common_schema', self.dialogSchemaPath]])
+
+    @pytest.mark.parametrize('workers', ['1', '2'])
+    def test_validationOfAllImports(self, workers):
+        """Tests if all the imported files are validated and all the errors are reported together."""
+        inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'inputInvalidImports.xml'))
+
+        self.t_exitCodeAndLogMessage(1, "3 of 4 dialog files are invalid",
+                                    [['--common_dialog_main', inputXmlPath,
+                                    '--common_schema', self.dialogSchemaPath,
+                                    '--common_validation_workers', workers]])
+        assert "Element 'autogenerate': The attribute 'type' is required but missing." in self.logs.text
+        assert "Element 'outputs': This element is not expected." in self.logs.text
+        assert "nonexistentImport.xml not found." in self.logs.text
+
     def test_mainInvalidNodeTypes(self):
         """Tests if the script fails with input file with invalid node type."""
         inputXmlPath = os.path.abspath(os.path.join(self.dataBasePath, 'inputNodeTypesInvalid.xml'))
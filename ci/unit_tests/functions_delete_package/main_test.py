@@ -16,7 +16,7 @@ limitations under the License.
 import json
 import os
 import uuid
-from urllib.parse import quote
+from urllib.parse import quote, urlparse
 
 import pytest
 import requests
@@ -24,7 +24,8 @@ import requests
 import functions_delete_package
 import functions_deploy
 
-from ...test_utils import BaseTestCaseCapture
+from ...test_utils import (BaseTestCaseCapture, FakeServiceHandler,
+                           FakeServiceTestCase)
 
 
 class TestMain(BaseTestCaseCapture):
@@ -375,3 +376,86 @@ class TestMain(BaseTestCaseCapture):
                 self.t_exitCodeAndLogMessage(1, "neither 'cloudfunctions_package' nor 'cloudfunctions_package_pattern' is defined.", [argsListWithoutOne])
             else:
                 self.t_exitCodeAndLogMessage(1, message, [argsListWithoutOne])
+
+
+class _CloudFunctionsHandler(FakeServiceHandler):
+    """Minimal Cloud Functions API with packages of the server, deletions are appended to 'deleted' list of the
+    server as (<kind>, <name>) tuples. Deletion of actions from 'failingActions' set ('package/action') fails."""
+
+    def _sendNotFound(self):
+        self.sendJson(404, {'error': 'The requested resource does not exist.', 'code': 'notFound'})
+
+    def do_GET(self):
+        pathParts = urlparse(self.path).path.split('/')
+        if len(pathParts) == 3:
+            # /namespace/packages
+            self.sendJson(200, [{'name': name} for name in self.server.packages])
+        elif pathParts[3] in self.server.packages:
+            actions = [{'name': name, 'annotations': [{'key': 'exec', 'value': 'sequence' if isSequence else 'python:3'}]}
+                       for name, isSequence in self.server.packages[pathParts[3]].items()]
+            self.sendJson(200, {'name': pathParts[3], 'actions': actions})
+        else:
+            self._sendNotFound()
+
+    def do_DELETE(self):
+        pathParts = urlparse(self.path).path.split('/')
+        package = self.server.packages.get(pathParts[3])
+        if package is None:
+            self._sendNotFound()
+        elif pathParts[2] == 'packages':
+            if package:
+                self.sendJson(409, {'error': 'Package not empty.', 'code': 'conflict'})
+                return
+            del self.server.packages[pathParts[3]]
+            self.server.deleted.append(('package', pathParts[3]))
+            self.sendJson(200, {'name': pathParts[3]})
+        elif pathParts[4] not in package:
+            self._sendNotFound()
+        elif '/'.join(pathParts[3:5]) in self.server.failingActions:
+            self.sendJson(400, {'error': 'The request content was malformed.', 'code': 'badRequest'})
+        else:
+            isSequence = package.pop(pathParts[4])
+            self.server.deleted.append(('sequence' if isSequence else 'action', pathParts[4]))
+            self.sendJson(200, {'name': pathParts[4]})
+
+
+class TestParallelDelete(FakeServiceTestCase, BaseTestCaseCapture):
+
+    handlerClass = _CloudFunctionsHandler
+
+    def setup_method(self):
+        super(TestParallelDelete, self).setup_method()
+        # key: package name, value: {<action name>: <is sequence>}
+        self.server.packages = {
+            'ci-1': {'seq': True, 'f1': False, 'f2': False},
+            'ci-2': {'seq': True, 'f1': False},
+            'other': {'f1': False}
+        }
+        self.server.failingActions = set()
+        self.server.deleted = []
+        self.params = ['--cloudfunctions_url', self.serviceUrl,
+                       '--cloudfunctions_namespace', 'namespace',
+                       '--cloudfunctions_package_pattern', 'ci-.*',
+                       '--cloudfunctions_username', 'username',
+                       '--cloudfunctions_password', 'password']
+
+    def callfunc(self, *args, **kwargs):
+        functions_delete_package.main(*args, **kwargs)
+
+    def test_deleteOrder(self):
+        """Tests if sequences are deleted before actions and actions before packages."""
+        self.t_noExceptionAndLogMessage("2 packages have been successfully deleted.", [self.params])
+
+        assert list(self.server.packages) == ['other']
+        kinds = [kind for kind, name in self.server.deleted]
+        assert kinds == ['sequence'] * 2 + ['action'] * 3 + ['package'] * 2
+        assert sorted(name for kind, name in self.server.deleted if kind == 'package') == ['ci-1', 'ci-2']
+
+    def test_failuresSummary(self):
+        """Tests if failed deletion does not stop deletion of the other packages and failures are reported at the end."""
+        self.server.failingActions.add('ci-1/f2')
+
+        self.t_exitCodeAndLogMessage(1, "Unable to delete 2 resources: action 'ci-1/f2', package 'ci-1'", [self.params])
+
+        assert sorted(self.server.packages) == ['ci-1', 'other']
+        assert self.server.packages['ci-1'] == {'f2': False}
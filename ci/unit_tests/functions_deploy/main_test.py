@@ -14,9 +14,10 @@ limitations under the License.
 """
 
 import os
+import shutil
 import uuid
 import zipfile
-from urllib.parse import quote
+from urllib.parse import quote, urlparse
 
 import pytest
 import requests
@@ -25,7 +26,8 @@ import functions_delete_package
 import functions_deploy
 from wawCommons import getFunctionResponseJson
 
-from ...test_utils import BaseTestCaseCapture
+from ...test_utils import (BaseTestCaseCapture, FakeServiceHandler,
+                           FakeServiceTestCase)
 
 
 class TestMain(BaseTestCaseCapture):
@@ -287,3 +289,113 @@ class TestMain(BaseTestCaseCapture):
                 argsListWithoutOne = argsListWithoutOne[4:] # remove username and password (leave just apikey)
                 message = 'required \'' + paramName + '\' parameter not defined'
             self.t_exitCodeAndLogMessage(1, message, [argsListWithoutOne])
+
+
+class _CloudFunctionsHandler(FakeServiceHandler):
+    """Minimal Cloud Functions API storing the deployed package and actions, names of the deployed actions are
+    appended to 'deployed' list of the server. Deployment of actions from 'failingActions' set fails."""
+
+    def do_GET(self):
+        # /namespace/packages/package
+        if self.server.package is None:
+            self.sendJson(404, {'error': 'The requested resource does not exist.', 'code': 'notFound'})
+            return
+        actions = [{'name': name, 'annotations': action.get('annotations', [])}
+                   for name, action in self.server.actions.items()]
+        self.sendJson(200, {'name': self.server.package, 'actions': actions})
+
+    def do_PUT(self):
+        requestJson = self.readJson()
+        pathParts = urlparse(self.path).path.split('/')
+        if pathParts[2] == 'packages':
+            self.server.package = pathParts[3]
+            self.sendJson(200, {'name': pathParts[3]})
+            return
+        name = pathParts[4]
+        if name in self.server.failingActions:
+            self.sendJson(400, {'error': 'The request content was malformed.', 'code': 'badRequest'})
+            return
+        if requestJson['exec']['kind'] == 'sequence':
+            for component in requestJson['exec']['components']:
+                if component.split('/')[-1] not in self.server.actions:
+                    self.sendJson(400, {'error': 'Sequence component does not exist.', 'code': 'badRequest'})
+                    return
+        self.server.actions[name] = requestJson
+        self.server.deployed.append(name)
+        self.sendJson(200, {'name': name})
+
+
+class TestIncrementalDeploy(FakeServiceTestCase, BaseTestCaseCapture):
+
+    handlerClass = _CloudFunctionsHandler
+
+    dataBasePath = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'main_data')
+    testOutputPath = os.path.join(dataBasePath, 'outputs')
+
+    @classmethod
+    def setup_class(cls):
+        BaseTestCaseCapture.createFolder(TestIncrementalDeploy.testOutputPath)
+
+    def setup_method(self):
+        super(TestIncrementalDeploy, self).setup_method()
+        self.server.package = None
+        self.server.actions = {}
+        self.server.failingActions = set()
+        self.server.deployed = []
+        # copy of the functions, so the test can change them
+        self.functionsPath = os.path.join(self.testOutputPath, 'incremental_functions')
+        shutil.rmtree(self.functionsPath, ignore_errors=True)
+        shutil.copytree(os.path.join(self.dataBasePath, 'example_functions_seq'), self.functionsPath)
+        self.params = ['-c', os.path.join(self.dataBasePath, 'exampleValidSequences.cfg'),
+                       '--common_functions', self.functionsPath,
+                       '--cloudfunctions_url', self.serviceUrl,
+                       '--cloudfunctions_namespace', 'namespace',
+                       '--cloudfunctions_package', 'package',
+                       '--cloudfunctions_username', 'username',
+                       '--cloudfunctions_password', 'password']
+
+    def callfunc(self, *args, **kwargs):
+        functions_deploy.main(*args, **kwargs)
+
+    def test_sequencesAfterFunctions(self):
+        """Tests if all functions are deployed and every sequence is deployed after its functions."""
+        self.t_noException([self.params])
+
+        assert sorted(self.server.actions) == ['a', 'b', 'c', 'example1', 'example2', 'example3']
+        for sequenceName in ['a', 'b', 'c']:
+            components = self.server.actions[sequenceName]['exec']['components']
+            for component in components:
+                functionName = component.split('/')[-1]
+                assert self.server.deployed.index(functionName) < self.server.deployed.index(sequenceName)
+
+    def test_unchangedNotDeployed(self):
+        """Tests if the second deployment skips everything and only the changed function is deployed after its change."""
+        self.t_noException([self.params])
+        self.server.deployed = []
+
+        self.t_noException([self.params])
+        assert self.server.deployed == []
+
+        with open(os.path.join(self.functionsPath, 'example2.py'), 'a') as functionFile:
+            functionFile.write('\n# changed\n')
+        self.t_noException([self.params])
+        assert self.server.deployed == ['example2']
+
+        self.server.deployed = []
+        self.t_noException([self.params + ['--cloudfunctions_force_deploy']])
+        assert sorted(self.server.deployed) == ['a', 'b', 'c', 'example1', 'example2', 'example3']
+
+    def test_failedFunction(self):
+        """Tests if sequences with failed function are not deployed and the other ones are."""
+        self.server.failingActions.add('example3')
+        with open(os.path.join(self.functionsPath, 'example3.py'), 'a') as functionFile:
+            functionFile.write('\n# not deployable\n')
+
+        self.t_exitCodeAndLogMessage(1, "Cannot deploy cloud functions and sequences: a, b, c, example3", [self.params])
+        assert sorted(self.server.deployed) == ['example1', 'example2']
+
+        # failed function is deployed by the next run, unchanged functions are skipped
+        self.server.failingActions.clear()
+        self.server.deployed = []
+        self.t_noException([self.params])
+        assert sorted(self.server.deployed) == ['a', 'b', 'c', 'example3']
@@ -15,12 +15,14 @@ limitations under the License.
 
 import json
 import os
+import time
 
 import pytest
 
 import functions_test
 
-from ....test_utils import BaseTestCaseCapture
+from ....test_utils import (BaseTestCaseCapture, FakeServiceHandler,
+                            FakeServiceTestCase)
 
 
 class TestMain(BaseTestCaseCapture):
@@ -448,3 +450,83 @@ class TestMain(BaseTestCaseCapture):
                     }
                 }
             ]
+
+
+class _CloudFunctionsHandler(FakeServiceHandler):
+    """Minimal Cloud Functions API, the function returns its input after 'delay' seconds. When 'activations'
+    is in the input, the result is not returned by the call, it is ready after the given number of requests for it."""
+
+    def do_POST(self):
+        inputJson = self.readJson()
+        if 'activations' in inputJson:
+            activationId = str(len(self.server.activations))
+            self.server.activations[activationId] = inputJson
+            self.sendJson(202, {'activationId': activationId})
+        else:
+            time.sleep(inputJson['delay'])
+            self.sendJson(200, inputJson)
+
+    def do_GET(self):
+        inputJson = self.server.activations[self.path.split('/')[-2]]
+        inputJson['activations'] -= 1
+        if inputJson['activations'] > 0:
+            self.sendJson(404, {'error': 'The requested resource does not exist.'})
+        else:
+            self.sendJson(200, {'result': {'payload': inputJson}})
+
+
+class TestConcurrency(FakeServiceTestCase, BaseTestCaseCapture):
+
+    handlerClass = _CloudFunctionsHandler
+
+    dataBasePath = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'main_data')
+    testOutputPath = os.path.join(dataBasePath, 'outputs')
+
+    @classmethod
+    def setup_class(cls):
+        ''' Setup any state specific to the execution of the given class (which usually contains tests). '''
+        BaseTestCaseCapture.createFolder(TestConcurrency.testOutputPath)
+
+    def setup_method(self):
+        super(TestConcurrency, self).setup_method()
+        self.server.activations = {}
+        # poll for the activation result every 0.2 s
+        configPath = os.path.join(self.testOutputPath, 'test_concurrent.cfg')
+        with open(configPath, 'w') as configFile:
+            configFile.write('[cloudfunctions]\n'
+                             'poll_initial_delay = 0.2\n'
+                             'poll_backoff_factor = 1\n'
+                             'poll_jitter = 0\n')
+        self.functionsTestArgs = [
+            '-c', configPath,
+            '--cloudfunctions_url', self.serviceUrl,
+            '--cloudfunctions_namespace', 'namespace',
+            '--cloudfunctions_package', 'package',
+            '--cloudfunctions_function', 'function',
+            '--cloudfunctions_username', 'username',
+            '--cloudfunctions_password', 'password'
+        ]
+
+    def callfunc(self, *args, **kwargs):
+        args = list(args)[0] + ['--version', '2.2']
+        functions_test.main(args, **kwargs)
+
+    def test_concurrentTests(self):
+        ''' Tests if the tests run in parallel, waiting for the activation result does not block other tests and results keep the order of the tests '''
+        inputs = [{'activations': 3}] + [{'delay': 0.1, 'index': index} for index in range(6)]
+        inputPath = os.path.join(self.testOutputPath, 'test_concurrent.json')
+        with open(inputPath, 'w') as inputFile:
+            json.dump([{'input': inputJson, 'outputExpected': {}} for inputJson in inputs], inputFile)
+        outputPath = os.path.join(self.testOutputPath, 'test_concurrent.out.json')
+
+        self.t_noException([[inputPath, outputPath, '-t', '--concurrency', '3'] + self.functionsTestArgs])
+
+        with open(outputPath, 'r') as outputFile:
+            outputJson = json.load(outputFile)
+        assert [test['input'] for test in outputJson] == inputs
+        assert outputJson[0]['outputReturned'] == {'activations': 0}
+        assert [test['outputReturned'] for test in outputJson[1:]] == inputs[1:]
+        # activation result is polled twice (0.4 s), meanwhile the other tests run in the remaining two slots
+        assert outputJson[0]['time'] >= 400
+        assert all(test['time'] < 400 for test in outputJson[1:])
+        assert max(test['end'] for test in outputJson[1:]) - outputJson[0]['start'] < 0.1 * 6 * 1000
@@ -0,0 +1,81 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import unittest
+
+import httpCommons
+
+from ...test_utils import FakeServiceHandler, FakeServiceTestCase
+
+
+class _Handler(FakeServiceHandler):
+    """Returns statuses from the server 'statuses' list one by one (200 when the list is empty)."""
+
+    def _respond(self):
+        self.readBody()
+        self.server.requests.append((self.command, self.client_address[1]))
+        self.sendJson(self.server.statuses.pop(0) if self.server.statuses else 200, {})
+
+    do_GET = _respond
+    do_PUT = _respond
+    do_POST = _respond
+
+
+class TestHttpCommons(FakeServiceTestCase, unittest.TestCase):
+
+    handlerClass = _Handler
+
+    def setUp(self):
+        self.server.statuses = []
+        self.server.requests = []
+        self.url = self.serviceUrl
+        httpCommons.configureHttp(argparse.Namespace(common_http_backoff_factor='0'))
+
+    def tearDown(self):
+        httpCommons.closeSessions()
+
+    def test_sessionPerBaseUrl(self):
+        """Tests if one session is used for all urls with the same scheme and host and its connection is reused."""
+        assert httpCommons.getSession(self.url + '/a?x=1') is httpCommons.getSession(self.url + '/b')
+        assert httpCommons.getSession(self.url) is not httpCommons.getSession('http://localhost:1')
+        for _ in range(3):
+            assert httpCommons.httpGet(self.url + '/workspaces').status_code == 200
+        # all the requests came from the same client port, so they used single connection
+        assert len(set(port for _, port in self.server.requests)) == 1
+
+    def test_retry(self):
+        """Tests if GET is retried on 5xx and 429 and the last response is returned when the retries are exhausted."""
+        self.server.statuses = [503, 429, 500]
+        assert httpCommons.httpGet(self.url).status_code == 200
+        assert len(self.server.requests) == 4
+
+        self.server.requests = []
+        self.server.statuses = [502] * 10
+        assert httpCommons.httpPut(self.url, data='{}').status_code == 502
+        assert len(self.server.requests) == 1 + httpCommons.DEFAULT_RETRIES
+
+    def test_postRetry(self):
+        """Tests if POST is retried only when it was surely not processed."""
+        self.server.statuses = [503, 502]
+        assert httpCommons.httpPost(self.url, data='{}').status_code == 502
+        assert len(self.server.requests) == 2
+
+    def test_configuration(self):
+        """Tests if the retries and timeout can be configured."""
+        httpCommons.configureHttp(argparse.Namespace(common_http_retries='0', common_http_timeout='5'))
+        self.server.statuses = [503]
+        assert httpCommons.httpGet(self.url).status_code == 503
+        assert httpCommons.getSession(self.url)._timeout == (httpCommons.DEFAULT_CONNECT_TIMEOUT, 5.0)
@@ -0,0 +1,77 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import argparse
+import unittest
+
+import httpCommons
+import wawCommons
+
+from ...test_utils import FakeServiceHandler, FakeServiceTestCase
+
+
+class _ActivationsHandler(FakeServiceHandler):
+    """Returns result of the activation after the number of requests given by the server 'activations' dict."""
+
+    def do_GET(self):
+        activationId = self.path.split('/')[-2]
+        self.server.requests.append(activationId)
+        self.server.activations[activationId] -= 1
+        if self.server.activations[activationId] > 0:
+            self.sendJson(404, {'error': 'The requested resource does not exist.'})
+        else:
+            self.sendJson(200, {'result': {'payload': {'id': activationId}}})
+
+
+class TestActivationPolling(unittest.TestCase):
+
+    def test_delays(self):
+        """Tests if the delays grow exponentially up to the maximal delay and stop before the deadline."""
+        polling = wawCommons.ActivationPolling(initialDelay=1, maxDelay=10, backoffFactor=2, jitter=0, deadline=40)
+        assert list(polling.delays()) == [1, 2, 4, 8, 10, 10]
+
+        polling = wawCommons.ActivationPolling(initialDelay=1, maxDelay=1, jitter=0.5, deadline=1000)
+        for delay, _ in zip(polling.delays(), range(100)):
+            assert 0.5 <= delay <= 1.5
+
+    def test_fromConfig(self):
+        """Tests if the parameters are read from the configuration and missing ones are set to defaults."""
+        polling = wawCommons.ActivationPolling.fromConfig(argparse.Namespace(cloudfunctions_poll_initial_delay='0.1',
+                                                                             cloudfunctions_poll_deadline='5'))
+        assert polling.initialDelay == 0.1
+        assert polling.deadline == 5
+        assert polling.maxDelay == wawCommons.ActivationPolling().maxDelay
+
+
+class TestBatchPolling(FakeServiceTestCase, unittest.TestCase):
+
+    handlerClass = _ActivationsHandler
+
+    def tearDown(self):
+        httpCommons.closeSessions()
+
+    def test_batchPolling(self):
+        """Tests if the results of more activations are polled together and not finished activations are given up at the deadline."""
+        self.server.activations = {'a': 1, 'b': 3, 'c': 100}
+        self.server.requests = []
+        polling = wawCommons.ActivationPolling(initialDelay=0.05, backoffFactor=1, jitter=0, deadline=0.5)
+        resultsJson = wawCommons.getActivationResultsJson(self.serviceUrl, 'namespace', 'username', 'password',
+                                                          {activationId: ('package', 'function') for activationId in 'abc'},
+                                                          polling)
+
+        assert resultsJson == {'a': {'id': 'a'}, 'b': {'id': 'b'}, 'c': None}
+        # finished activations are not polled any more
+        assert self.server.requests[:7] == ['a', 'b', 'c', 'b', 'c', 'b', 'c']
+        assert set(self.server.requests[7:]) == {'c'}
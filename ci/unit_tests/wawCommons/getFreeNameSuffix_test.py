@@ -0,0 +1,54 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+
+import wawCommons
+from DialogData import DialogData
+
+
+class TestGetFreeNameSuffix(unittest.TestCase):
+
+    def test_lowestFreeSuffix(self):
+        """Tests if the lowest free suffix is returned and it is not consumed until the name is used."""
+        names = {'node_0', 'node_1', 'node_3'}
+        nextSuffixes = {}
+        assert wawCommons.getFreeNameSuffix('node_', names, nextSuffixes) == 2
+        assert wawCommons.getFreeNameSuffix('node_', names, nextSuffixes) == 2
+        names.add('node_2')
+        assert wawCommons.getFreeNameSuffix('node_', names, nextSuffixes) == 4
+        assert wawCommons.getFreeNameSuffix('other_', names, nextSuffixes) == 0
+
+    def test_manyNames(self):
+        """Tests if there is no limit of the number of names with the same prefix."""
+        names = {}
+        nextSuffixes = {}
+        for index in range(20000):
+            suffix = wawCommons.getFreeNameSuffix('name', names, nextSuffixes)
+            assert suffix == index
+            names['name' + str(suffix)] = None
+
+    def test_dialogDataUniqueNames(self):
+        """Tests if DialogData creates unique names of nodes, intents and entities with the same base."""
+        dialogData = DialogData(None)
+        nodeNames = []
+        for _ in range(3):
+            nodeNames.append(dialogData.createUniqueNodeName('same condition'))
+            dialogData.createNode(nodeNames[-1])
+            dialogData.createIntent(dialogData.createUniqueIntentName('same intent'))
+            dialogData.createEntity(dialogData.createUniqueEntityName('same entity'))
+        assert nodeNames == ['SAMECONDITION', 'SAMECONDITION_0', 'SAMECONDITION_1']
+        assert sorted(dialogData.getAllIntents()) == ['sameintent', 'sameintent0', 'sameintent1']
+        assert sorted(dialogData.getAllEntities()) == ['same_entity', 'same_entity0', 'same_entity1']
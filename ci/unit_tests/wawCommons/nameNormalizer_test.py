@@ -0,0 +1,57 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import unittest
+
+import wawCommons
+
+
+class TestNameNormalizer(unittest.TestCase):
+
+    def test_normalize(self):
+        """Tests if WA and user-defined restrictions are applied and the triggered restrictions are returned."""
+        normalizer = wawCommons.NameNormalizer()
+        assert normalizer.normalize('code', None, 'my čode-1') == ('MY_CODE-1', ())
+        assert normalizer.normalize('intent', None, 'my_intent.1') == ('my_intent.1', ())
+        assert normalizer.normalize('entity', [['$special', '\\L'], ['-', '_']], 'My-Entity') == \
+            ('my_entity', ("User-defined regex: 'entity name should be lowercase', '-' should be replaced with '_'.",))
+        assert normalizer.normalize('entity', [['$special', '\\A']], 'entita č') == \
+            ('entita_c', ("The entity name can only contain letters (in Unicode), numbers, underscores, and hyphens.",
+                          "User-defined regex: 'entity name cannot contain accented letters'."))
+
+    def test_allOccurrencesReplaced(self):
+        """Tests if all occurrences are replaced, not just first 32 (re.UNICODE used to be passed as count)."""
+        name = ' '.join(['a'] * 50)
+        assert wawCommons.toCode('soft', name) == '_'.join(['A'] * 50)
+        assert wawCommons.toEntityName('soft', None, name) == '_'.join(['a'] * 50)
+        assert wawCommons.toIntentName('soft', [['a', 'b']], name.replace(' ', '')) == 'b' * 50
+
+    def test_cache(self):
+        """Tests if results are cached for the same policy, replacements and name."""
+        normalizer = wawCommons.NameNormalizer()
+        for _ in range(3):
+            normalizer.normalize('intent', [['-', '_']], 'intent-name')
+            normalizer.normalize('entity', [['-', '_']], 'intent-name')
+            normalizer.normalize('intent', [['-', '.']], 'intent-name')
+        cacheInfo = normalizer._normalizeCached.cache_info()
+        assert cacheInfo.misses == 3
+        assert cacheInfo.hits == 6
+        assert normalizer.normalize('intent', [['-', '.']], 'intent-name')[0] == 'intent.name'
+
+    def test_hardPolicy(self):
+        """Tests if the name policy is applied also when the result is cached."""
+        assert wawCommons.toEntityName('soft', None, 'entity name') == 'entity_name'
+        with self.assertRaises(SystemExit):
+            wawCommons.toEntityName('hard', None, 'entity name')
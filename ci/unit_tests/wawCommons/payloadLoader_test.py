@@ -0,0 +1,68 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import wawCommons
+
+
+class TestPayloadLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.workDir = tempfile.mkdtemp()
+        self.payloadPath = os.path.join(self.workDir, 'payload.json')
+        with open(self.payloadPath, 'w') as payloadFile:
+            json.dump({'message': '::MESSAGE'}, payloadFile)
+
+    def tearDown(self):
+        shutil.rmtree(self.workDir)
+
+    def test_sharedPayload(self):
+        """Tests if the payload is parsed once for all the paths of the file and replacing values does not modify it."""
+        loader = wawCommons.PayloadLoader()
+        payloadJson = loader.load(self.payloadPath)
+        assert payloadJson == {'message': '::MESSAGE'}
+        assert loader.load(os.path.join(self.workDir, '..', os.path.basename(self.workDir), 'payload.json')) is payloadJson
+
+        replacedJson, replacementsNumber = wawCommons.replaceValue(payloadJson, '::MESSAGE', 'test message', False)
+        assert replacementsNumber == 1
+        assert replacedJson == {'message': 'test message'}
+        assert loader.load(self.payloadPath) == {'message': '::MESSAGE'}
+
+    def test_changedPayload(self):
+        """Tests if the payload is parsed again when the file is modified."""
+        loader = wawCommons.PayloadLoader()
+        payloadJson = loader.load(self.payloadPath)
+        with open(self.payloadPath, 'w') as payloadFile:
+            json.dump({'message': 'changed'}, payloadFile)
+        stat = os.stat(self.payloadPath)
+        os.utime(self.payloadPath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert loader.load(self.payloadPath) == {'message': 'changed'}
+        assert payloadJson == {'message': '::MESSAGE'}
+
+    def test_invalidPayload(self):
+        """Tests if missing file raises IOError and invalid JSON raises ValueError."""
+        loader = wawCommons.PayloadLoader()
+        with self.assertRaises(IOError):
+            loader.load(os.path.join(self.workDir, 'missing.json'))
+        invalidPath = os.path.join(self.workDir, 'invalid.json')
+        with open(invalidPath, 'w') as invalidFile:
+            invalidFile.write('{')
+        with self.assertRaises(ValueError):
+            loader.load(invalidPath)
@@ -0,0 +1,62 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import copy
+import unittest
+
+import wawCommons
+
+
+class TestReplaceValues(unittest.TestCase):
+
+    sourceJson = {
+        'message': '::MESSAGE',
+        'unchanged': {'items': ['a', 'b', {'c': None}], 'number': 1},
+        'list': ['::MESSAGE', ['::PACKAGE', 'x'], {'::PACKAGE': '::OTHER'}],
+        'empty': {}
+    }
+    replacements = {'::MESSAGE': 'test message', '::PACKAGE': ['utils', {'name': 'utils'}], '::MISSING': 'missing'}
+
+    def test_sameAsReplaceValue(self):
+        """Tests if replacing all the targets at once gives the same json as replacing them one by one."""
+        for matchKey in [True, False]:
+            expectedJson = self.sourceJson
+            for target, replacement in self.replacements.items():
+                expectedJson, expectedNumber = wawCommons.replaceValue(expectedJson, target, replacement, matchKey)
+            sourceJson = copy.deepcopy(self.sourceJson)
+            targetJson, replacedValuesNumbers = wawCommons.replaceValues(sourceJson, self.replacements, matchKey)
+            assert targetJson == expectedJson
+            assert sourceJson == self.sourceJson
+
+    def test_counts(self):
+        """Tests if the replacements are counted for each target."""
+        _, replacedValuesNumbers = wawCommons.replaceValues(self.sourceJson, self.replacements, False)
+        assert replacedValuesNumbers == {'::MESSAGE': 2, '::PACKAGE': 1, '::MISSING': 0}
+        _, replacedValuesNumbers = wawCommons.replaceValues(self.sourceJson, self.replacements, True)
+        assert replacedValuesNumbers == {'::MESSAGE': 0, '::PACKAGE': 1, '::MISSING': 0}
+
+    def test_copyChangedOnly(self):
+        """Tests if only the changed lists and dicts are copied and the replacements are not shared."""
+        targetJson, _ = wawCommons.replaceValues(self.sourceJson, self.replacements, False)
+        assert targetJson is not self.sourceJson
+        assert targetJson['unchanged'] is self.sourceJson['unchanged']
+        assert targetJson['list'] is not self.sourceJson['list']
+        assert targetJson['list'][2] is self.sourceJson['list'][2]
+        assert targetJson['list'][1][0] == self.replacements['::PACKAGE']
+        assert targetJson['list'][1][0] is not self.replacements['::PACKAGE']
+
+        targetJson, replacedValuesNumbers = wawCommons.replaceValues(self.sourceJson, {'::MISSING': 'missing'}, False)
+        assert targetJson is self.sourceJson
+        assert replacedValuesNumbers == {'::MISSING': 0}
@@ -0,0 +1,89 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import time
+import unittest
+
+import wawCommons
+
+from ...test_utils import FakeServiceHandler, FakeServiceTestCase
+
+
+class _WorkspacesHandler(FakeServiceHandler):
+    """Returns statuses of the workspaces from the server 'statuses' dict {<workspace id>: [<status or status code>]},
+    every request takes the next status (the last one is repeated). Requests are counted in server 'requests' dict."""
+
+    def do_GET(self):
+        workspaceId = self.path.split('?')[0].split('/')[-1]
+        self.server.requests[workspaceId] = self.server.requests.get(workspaceId, 0) + 1
+        statuses = self.server.statuses[workspaceId]
+        status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+        if isinstance(status, int):
+            self.sendJson(status, {'error': 'Error', 'code': status})
+        else:
+            self.sendJson(200, {'workspace_id': workspaceId, 'status': status})
+
+
+class TestWaitUntilAvailable(FakeServiceTestCase, unittest.TestCase):
+
+    handlerClass = _WorkspacesHandler
+
+    def setUp(self):
+        self.server.requests = {}
+        self.url = self.serviceUrl + '/workspaces'
+
+    def _wait(self, workspaceIds, polling):
+        return wawCommons.waitUntilAvailable(self.url, '2019-02-28', 'username', 'password', workspaceIds, polling)
+
+    def test_concurrent(self):
+        """Tests if the workspaces are waited for in parallel and unknown status codes are polled again."""
+        self.server.statuses = {'ws1': ['Training'] * 3 + ['Available'],
+                                'ws2': ['Training', 'Available'],
+                                'ws3': [409, 'Available']}
+        polling = wawCommons.ActivationPolling(initialDelay=0.1, backoffFactor=1, jitter=0, deadline=5)
+
+        start = time.monotonic()
+        statuses = self._wait(['ws1', 'ws2', 'ws3'], polling)
+        elapsed = time.monotonic() - start
+
+        assert statuses == {'ws1': 'Available', 'ws2': 'Available', 'ws3': 'Available'}
+        assert self.server.requests == {'ws1': 4, 'ws2': 2, 'ws3': 2}
+        # waiting for ws1 takes 0.3 s, the other workspaces are polled meanwhile
+        assert 0.3 <= elapsed < 0.45
+
+    def test_nonExistentBeforeAvailable(self):
+        """Tests if 'Non Existent' status of just deployed workspace is polled through until the workspace is available."""
+        self.server.statuses = {'ws1': ['Non Existent', 'Training', 'Unavailable', 'Available']}
+        polling = wawCommons.ActivationPolling(initialDelay=0.05, backoffFactor=1, jitter=0, deadline=5)
+
+        assert self._wait(['ws1'], polling) == {'ws1': 'Available'}
+        assert self.server.requests == {'ws1': 4}
+
+    def test_deadline(self):
+        """Tests if the delays grow and the waiting stops before the deadline."""
+        self.server.statuses = {'ws1': ['Training']}
+        polling = wawCommons.ActivationPolling(initialDelay=0.1, backoffFactor=2, jitter=0, deadline=0.5)
+
+        assert self._wait(['ws1'], polling) == {'ws1': 'Training'}
+        # delays 0.1 and 0.2 s, the next one (0.4 s) would exceed the deadline
+        assert self.server.requests == {'ws1': 3}
+
+    def test_finalStatus(self):
+        """Tests if the waiting stops on failed training and on the workspace which can not be retrieved."""
+        self.server.statuses = {'ws1': ['Training', 'Failed'], 'ws2': [404]}
+        polling = wawCommons.ActivationPolling(initialDelay=0.1, backoffFactor=1, jitter=0, deadline=5)
+
+        assert self._wait(['ws1', 'ws2'], polling) == {'ws1': 'Failed', 'ws2': None}
+        assert self.server.requests == {'ws1': 2, 'ws2': 1}
@@ -0,0 +1,44 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import io
+import json
+import unittest
+
+import wawCommons
+
+
+class TestWriteJsonArray(unittest.TestCase):
+
+    def _writeJsonArray(self, items, **kwargs):
+        outputFile = io.StringIO()
+        wawCommons.writeJsonArray(outputFile, items, **kwargs)
+        return outputFile.getvalue()
+
+    def test_emptyArray(self):
+        """Tests if empty array is written in the same way as by json.dumps."""
+        assert self._writeJsonArray(iter([])) == json.dumps([], indent=4)
+
+    def test_sameAsJsonDumps(self):
+        """Tests if items from generator are written in the same way as the whole list by json.dumps."""
+        items = [{'dialog_node': 'node_1', 'conditions': '#yes', 'output': {'text': {'values': ['Ahoj\nsvěte', '']}}},
+                 {'dialog_node': 'node_2', 'context': {}, 'actions': [], 'disabled': True, 'number': 1.5},
+                 'string', None, [[1, 2], {}]]
+        assert self._writeJsonArray(item for item in items) == json.dumps(items, indent=4, ensure_ascii=False)
+
+    def test_indent(self):
+        """Tests if indentation can be changed."""
+        items = [{'a': [1, {'b': 2}]}, {'c': 'd'}]
+        assert self._writeJsonArray(items, indent=2) == json.dumps(items, indent=2, ensure_ascii=False)
@@ -16,6 +16,7 @@ limitations under the License.
 import argparse
 import os
 import uuid
+from urllib.parse import parse_qs, urlparse
 
 import pytest
 import requests
@@ -25,7 +26,8 @@ import workspace_deploy
 from cfgCommons import Cfg
 from wawCommons import getRequiredParameter, getWorkspaces
 
-from ...test_utils import BaseTestCaseCapture
+from ...test_utils import (BaseTestCaseCapture, FakeServiceHandler,
+                           FakeServiceTestCase)
 
 
 class TestMain(BaseTestCaseCapture):
@@ -331,3 +333,70 @@ class TestMain(BaseTestCaseCapture):
         conditionalArgsList.extend(['--conversation_workspace_match_by_name', 'true'])
         message = "'conversation_workspace_match_by_name' set to true but neither 'conversation_workspace_name' nor 'conversation_workspace_name_pattern' is defined."
         self.t_exitCodeAndLogMessage(1, message, [conditionalArgsList])
+
+
+class _ConversationHandler(FakeServiceHandler):
+    """Minimal Watson Assistant API with workspaces of the server ({<id>: <name>}), workspaces are listed by pages
+    with cursor. Requested cursors are appended to 'cursors' list of the server. Deletion of the workspaces with id
+    in 'failingWorkspaces' set fails."""
+
+    def do_GET(self):
+        parameters = parse_qs(urlparse(self.path).query)
+        cursor = parameters.get('cursor', [None])[0]
+        self.server.cursors.append(cursor)
+        start = int(cursor) if cursor else 0
+        end = start + int(parameters['page_limit'][0])
+        workspaceIds = sorted(self.server.workspaces)
+        responseJson = {'workspaces': [{'workspace_id': workspaceId, 'name': self.server.workspaces[workspaceId]}
+                                       for workspaceId in workspaceIds[start:end]],
+                        'pagination': {'refresh_url': self.path}}
+        if end < len(workspaceIds):
+            responseJson['pagination']['next_cursor'] = str(end)
+        self.sendJson(200, responseJson)
+
+    def do_DELETE(self):
+        workspaceId = urlparse(self.path).path.split('/')[-1]
+        if workspaceId in self.server.failingWorkspaces:
+            self.sendJson(400, {'error': 'Invalid request', 'code': 400})
+            return
+        del self.server.workspaces[workspaceId]
+        self.sendJson(200, {})
+
+
+class TestBulkDelete(FakeServiceTestCase, BaseTestCaseCapture):
+
+    handlerClass = _ConversationHandler
+
+    def setup_method(self):
+        super(TestBulkDelete, self).setup_method()
+        self.server.workspaces = {'id%d' % index: ('ci-%d' % index if index % 2 else 'other-%d' % index)
+                                  for index in range(10)}
+        self.server.failingWorkspaces = set()
+        self.server.cursors = []
+        self.params = ['--conversation_url', self.serviceUrl + '/workspaces',
+                       '--conversation_version', '2019-02-28',
+                       '--conversation_username', 'username',
+                       '--conversation_password', 'password',
+                       '--conversation_workspace_match_by_name', 'true',
+                       '--conversation_workspace_name_pattern', 'ci-.*',
+                       '--conversation_page_limit', '3']
+
+    def callfunc(self, *args, **kwargs):
+        workspace_delete.main(*args, **kwargs)
+
+    @pytest.mark.parametrize('concurrency', [1, 4])
+    def test_deletePaginated(self, concurrency):
+        """Tests if workspaces from all pages are retrieved and the matching ones are deleted."""
+        self.t_noExceptionAndLogMessage("5 workspaces have been successfully deleted",
+                                        [self.params + ['--conversation_delete_concurrency', str(concurrency)]])
+
+        assert self.server.cursors == [None, '3', '6', '9']
+        assert sorted(self.server.workspaces.values()) == ['other-0', 'other-2', 'other-4', 'other-6', 'other-8']
+
+    def test_bulkDeleteFailures(self):
+        """Tests if concurrent deletion deletes all the deletable workspaces and reports the failed ones at the end."""
+        self.server.failingWorkspaces.update(['id3', 'id7'])
+
+        self.t_exitCodeAndLogMessage(1, "Cannot delete workspaces: ci-3, ci-7", [self.params + ['--conversation_delete_concurrency', '4']])
+
+        assert sorted(self.server.workspaces) == ['id0', 'id2', 'id3', 'id4', 'id6', 'id7', 'id8']
@@ -12,8 +12,11 @@ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 See the License for the specific language governing permissions and
 limitations under the License.
 """
+import copy
+import json
 import os
 import uuid
+from urllib.parse import parse_qs, unquote, urlparse
 
 import pytest
 
@@ -21,7 +24,8 @@ import workspace_delete
 import workspace_deploy
 from wawCommons import getWorkspaces
 
-from ...test_utils import BaseTestCaseCapture
+from ...test_utils import (BaseTestCaseCapture, FakeServiceHandler,
+                           FakeServiceTestCase)
 
 
 class TestMain(BaseTestCaseCapture):
@@ -193,3 +197,168 @@ class TestMain(BaseTestCaseCapture):
 
             message = 'required \'' + paramName + '\' parameter not defined'
             self.t_exitCodeAndLogMessage(1, message, [argsListWithoutOne])
+
+
+class _ConversationHandler(FakeServiceHandler):
+    """Minimal Watson Assistant API with one workspace 'ws1' (the 'workspace' of the server). Exported workspace
+    contains audit fields and the default fields when 'exportDefaults' of the server is set. Changing requests are appended to 'changes' list of the server as (method, path, payload)."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/workspaces':
+            self.sendJson(200, {'workspaces': [{'workspace_id': 'ws1', 'name': self.server.workspace['name'],
+                                                'metadata': self.server.workspace.get('metadata')}],
+                                'pagination': {}})
+        elif 'export' not in parse_qs(url.query):
+            self.sendJson(200, {'workspace_id': 'ws1', 'status': 'Available'})
+        else:
+            assert parse_qs(url.query)['export'] == ['true']
+            exportedWorkspace = copy.deepcopy(self.server.workspace)
+            for intent in exportedWorkspace['intents']:
+                intent['created'] = intent['updated'] = '2019-01-01T00:00:00.000Z'
+            if self.server.exportDefaults:
+                for entity in exportedWorkspace['entities']:
+                    entity['fuzzy_match'] = False
+                    for value in entity['values']:
+                        value['type'] = 'synonyms'
+                for node in exportedWorkspace['dialog_nodes']:
+                    node.setdefault('type', 'standard')
+                    node['disabled'] = False
+            exportedWorkspace['workspace_id'] = 'ws1'
+            self.sendJson(200, exportedWorkspace)
+
+    def do_POST(self):
+        body = self.readBody().decode('utf8')
+        path = unquote(urlparse(self.path).path)
+        self.server.changes.append(('POST', path, body))
+        if path == '/workspaces/ws1':
+            self.server.workspace = json.loads(body)
+        self.sendJson(200, {'workspace_id': 'ws1'})
+
+    def do_DELETE(self):
+        self.server.changes.append(('DELETE', unquote(urlparse(self.path).path), None))
+        self.sendJson(200, {})
+
+
+class TestDeltaDeploy(FakeServiceTestCase, BaseTestCaseCapture):
+
+    handlerClass = _ConversationHandler
+
+    dataBasePath = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'main_data')
+    outputPath = os.path.join(dataBasePath, 'outputs')
+    workspaceFilename = 'delta_workspace.json'
+
+    @classmethod
+    def setup_class(cls):
+        BaseTestCaseCapture.createFolder(cls.outputPath)
+
+    def setup_method(self):
+        with open(os.path.join(self.dataBasePath, 'skill_with_name_and_description.json'), 'r') as workspaceFile:
+            self.workspace = json.load(workspaceFile)
+        super(TestDeltaDeploy, self).setup_method()
+        self.server.workspace = copy.deepcopy(self.workspace)
+        self.server.exportDefaults = False
+        self.server.changes = []
+        self.params = ['--common_outputs_directory', self.outputPath,
+                       '--common_outputs_workspace', self.workspaceFilename,
+                       '--conversation_url', self.serviceUrl + '/workspaces',
+                       '--conversation_version', '2019-02-28',
+                       '--conversation_username', 'username',
+                       '--conversation_password', 'password',
+                       '--conversation_workspace_id', 'ws1',
+                       '--conversation_workspace_delta_deploy', 'true']
+
+    def callfunc(self, *args, **kwargs):
+        workspace_deploy.main(*args, **kwargs)
+
+    def _deploy(self, workspace, message="Workspace successfully uploaded.", params=None):
+        with open(os.path.join(self.outputPath, self.workspaceFilename), 'w') as workspaceFile:
+            json.dump(workspace, workspaceFile, indent=4)
+        self.t_noExceptionAndLogMessage(message, [params or self.params])
+
+    def _setDeployedFingerprint(self):
+        fingerprint = workspace_deploy.getWorkspaceFingerprint(self.workspace)
+        self.server.workspace['metadata'] = {workspace_deploy.FINGERPRINT_METADATA_KEY: fingerprint}
+
+    def test_unchanged(self):
+        """Tests if nothing but the fingerprint is deployed when the workspace is not changed."""
+        self._deploy(self.workspace)
+
+        fingerprint = workspace_deploy.getWorkspaceFingerprint(self.workspace)
+        assert self.server.changes == [
+            ('POST', '/workspaces/ws1', '{"metadata":{"wawFingerprint":"' + fingerprint + '"}}')
+        ]
+
+    @pytest.mark.parametrize('deltaDeploy', ['true', 'false'])
+    def test_sameFingerprint(self, deltaDeploy):
+        """Tests if the workspace with the same fingerprint is not deployed, unless it is forced."""
+        self._setDeployedFingerprint()
+        # order of the artifacts and titles same as node ids do not change the fingerprint
+        self.workspace['intents'].reverse()
+        self.workspace['dialog_nodes'][0]['title'] = self.workspace['dialog_nodes'][0]['dialog_node']
+        params = self.params[:-1] + [deltaDeploy]
+
+        self._deploy(self.workspace, "Workspace is not changed", params)
+        assert self.server.changes == []
+
+        self._deploy(self.workspace, params=params + ['--conversation_workspace_force_deploy', 'true'])
+        assert len(self.server.changes) == 1
+
+    def test_waitUntilAvailable(self):
+        """Tests if the script waits for the workspace training when it is required."""
+        self._deploy(self.workspace, "WCS WORKSPACE STATUS: Available",
+                     self.params + ['--conversation_wait_until_available', 'true'])
+
+    def test_changedArtifacts(self):
+        """Tests if only the changed artifacts are deployed, the deletions are deployed last."""
+        self._setDeployedFingerprint()
+        self.workspace['intents'][0]['examples'].append({'text': 'could you help me'})
+        self.workspace['dialog_nodes'][0]['conditions'] = 'welcome || #hello'
+        self.workspace['counterexamples'].append({'text': 'a new counterexample'})
+        deletedEntity = self.workspace['entities'].pop(0)['entity']
+        self._deploy(self.workspace)
+
+        intent = self.workspace['intents'][0]
+        node = self.workspace['dialog_nodes'][0]
+        assert self.server.changes == [
+            ('POST', '/workspaces/ws1/intents/' + intent['intent'], json.dumps(intent, separators=(',', ':'))),
+            ('POST', '/workspaces/ws1/counterexamples', '{"text":"a new counterexample"}'),
+            ('POST', '/workspaces/ws1/dialog_nodes/' + node['dialog_node'], json.dumps(node, separators=(',', ':'))),
+            ('DELETE', '/workspaces/ws1/entities/' + deletedEntity, None),
+            ('POST', '/workspaces/ws1', '{"metadata":{"wawFingerprint":"' + workspace_deploy.getWorkspaceFingerprint(self.workspace) + '"}}')
+        ]
+
+    def test_exportedDefaults(self):
+        """Tests if the default fields added to the exported workspace by the service are not deployed as changes."""
+        self._setDeployedFingerprint()
+        self.server.exportDefaults = True
+        del self.workspace['dialog_nodes'][0]['type']
+        for value in self.workspace['entities'][0]['values']:
+            del value['type']
+        self.workspace['counterexamples'].append({'text': 'a new counterexample'})
+        self._deploy(self.workspace)
+
+        assert self.server.changes == [
+            ('POST', '/workspaces/ws1/counterexamples', '{"text":"a new counterexample"}'),
+            ('POST', '/workspaces/ws1', '{"metadata":{"wawFingerprint":"' + workspace_deploy.getWorkspaceFingerprint(self.workspace) + '"}}')
+        ]
+
+    @pytest.mark.parametrize('change', ['addNode', 'moveNode', 'manyChanges', 'setting'])
+    def test_wholeWorkspace(self, change):
+        """Tests if the whole workspace is deployed (as compact json) when the change can not be deployed separately."""
+        if change == 'addNode':
+            self.workspace['dialog_nodes'].append({'dialog_node': 'new node', 'conditions': 'anything_else'})
+        elif change == 'moveNode':
+            self.workspace['dialog_nodes'][0]['parent'] = 'new parent'
+        elif change == 'manyChanges':
+            self.workspace['counterexamples'].extend({'text': 'counterexample %d' % index} for index in range(3))
+            self.params += ['--conversation_workspace_delta_max_changes', '2']
+        else:
+            self.workspace['description'] = 'new description'
+        self._deploy(self.workspace)
+
+        assert len(self.server.changes) == 1
+        method, path, payload = self.server.changes[0]
+        assert (method, path) == ('POST', '/workspaces/ws1')
+        self.workspace['metadata'] = {'wawFingerprint': workspace_deploy.getWorkspaceFingerprint(self.workspace)}
+        assert payload == json.dumps(self.workspace, separators=(',', ':'))
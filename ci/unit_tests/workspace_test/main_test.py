@@ -0,0 +1,108 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import os
+import random
+import time
+
+import pytest
+import workspace_test
+
+from ...test_utils import (BaseTestCaseCapture, FakeServiceHandler,
+                           FakeServiceTestCase)
+
+WORKSPACE_ID = 'ws1'
+
+
+class _ConversationHandler(FakeServiceHandler):
+    """Minimal conversation service, message response contains the input text and number of the turn in its context."""
+
+    def do_GET(self):
+        if self.path.startswith('/workspaces/' + WORKSPACE_ID):
+            self.sendJson(200, {'workspace_id': WORKSPACE_ID, 'status': 'Available'})
+        else:
+            self.sendJson(200, {'workspaces': [{'workspace_id': WORKSPACE_ID, 'name': 'test'}]})
+
+    def do_POST(self):
+        inputJson = self.readJson()
+        if inputJson['input']['text'] == 'fail':
+            self.sendJson(400, {'error': 'Invalid request', 'code': 400})
+            return
+        time.sleep(random.random() * 0.01) # dialogs finish in random order
+        context = inputJson.get('context', {'turn': 0})
+        self.sendJson(200, {'input': inputJson['input'], 'output': {'text': [inputJson['input']['text']]},
+                            'context': {'turn': context['turn'] + 1}})
+
+
+class TestMain(FakeServiceTestCase, BaseTestCaseCapture):
+
+    handlerClass = _ConversationHandler
+
+    dataBasePath = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'main_data')
+    testOutputPath = os.path.join(dataBasePath, 'outputs')
+
+    @classmethod
+    def setup_class(cls):
+        ''' Setup any state specific to the execution of the given class (which usually contains tests). '''
+        # create output folder
+        BaseTestCaseCapture.createFolder(TestMain.testOutputPath)
+
+    def setup_method(self):
+        super(TestMain, self).setup_method()
+        self.configPath = os.path.join(self.testOutputPath, 'test.cfg')
+        with open(self.configPath, 'w') as configFile:
+            configFile.write('[conversation]\n'
+                             'url = %s/workspaces\n'
+                             'version = 2018-09-20\n'
+                             'username = user\n'
+                             'password = pass\n'
+                             'workspace_id = %s\n' % (self.serviceUrl, WORKSPACE_ID))
+
+    def callfunc(self, *args, **kwargs):
+        workspace_test.main(*args, **kwargs)
+
+    def _writeInput(self, inputName, lines):
+        inputPath = os.path.join(self.testOutputPath, inputName)
+        with open(inputPath, 'w') as inputFile:
+            inputFile.write('\n'.join(json.dumps({'dialog_id': dialogId, 'input_message': {'input': {'text': text}}})
+                                      for dialogId, text in lines))
+        return inputPath
+
+    def _readOutput(self, outputPath):
+        with open(outputPath, 'r') as outputFile:
+            return [json.loads(line) for line in outputFile]
+
+    @pytest.mark.parametrize('concurrency', ['1', '8'])
+    def test_dialogsOrder(self, concurrency):
+        """Tests if responses are written in the order of the test lines and context is passed only within a dialog."""
+        # dialog 0 is tested twice, the second occurrence is a new dialog
+        lines = [(str(dialogIndex % 20), 'dialog %d turn %d' % (dialogIndex, turn)) for dialogIndex in range(21) for turn in range(3)]
+        inputPath = self._writeInput('input.jsonl', lines)
+        outputPath = os.path.join(self.testOutputPath, 'output' + concurrency + '.jsonl')
+
+        self.t_noException([[inputPath, outputPath, '-c', self.configPath, '--concurrency', concurrency]])
+
+        outputJsons = self._readOutput(outputPath)
+        assert [outputJson['output']['text'][0] for outputJson in outputJsons] == [text for _, text in lines]
+        assert [outputJson['context']['turn'] for outputJson in outputJsons] == [1, 2, 3] * 21
+
+    def test_failedDialog(self):
+        """Tests if testing fails when some of the concurrently tested dialogs fails."""
+        lines = [(str(dialogIndex), 'fail' if dialogIndex == 5 else 'hello') for dialogIndex in range(10)]
+        inputPath = self._writeInput('inputFail.jsonl', lines)
+        outputPath = os.path.join(self.testOutputPath, 'outputFail.jsonl')
+
+        self.t_exitCodeAndLogMessage(1, 'Invalid request', [[inputPath, outputPath, '-c', self.configPath, '--concurrency', '4']])
@@ -13,9 +13,11 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import json
 import os
 import re
 
+import lxml.etree as LET
 import workspace_test_evaluate
 
 from ...test_utils import BaseTestCaseCapture
@@ -57,6 +59,8 @@ class TestMain(BaseTestCaseCapture):
                 # remove time because it is not static
                 l1 = re.sub(r' time="[^"]*"', '', l1)
                 l2 = re.sub(r' time="[^"]*"', '', l2)
+                # remove padding of the start tag reserved for the totals
+                l1 = re.sub(r' *>', '>', l1)
                 assert l1 == l2
 
     def test_raiseExceptionIfFails(self):
@@ -65,3 +69,64 @@ class TestMain(BaseTestCaseCapture):
             NameError,
             'FailedTestDetected',
             [[self.expectedJsonPath, self.receivedJsonPath, '-o', self.outputJunitXmlPath, '-e']])
+
+    def test_partialReport(self):
+        ''' Tests if the report contains all the finished dialogs when the evaluation is interrupted '''
+        truncatedReceivedJsonPath = os.path.abspath(os.path.join(self.testOutputPath, 'recieved_truncated.json'))
+        with open(self.receivedJsonPath, 'r') as receivedFile, open(truncatedReceivedJsonPath, 'w') as truncatedFile:
+            truncatedFile.writelines(receivedFile.readlines()[:4]) # the second dialog is not finished
+        outputJunitXmlPath = os.path.abspath(os.path.join(self.testOutputPath, 'test_partial.junit.xml'))
+        self.t_exitCodeAndLogMessage(1, 'Missing output JSON in file', [[self.expectedJsonPath, truncatedReceivedJsonPath, '-o', outputJunitXmlPath]])
+
+        outputXml = LET.parse(outputJunitXmlPath).getroot()
+        assert [testSuiteXml.get('name') for testSuiteXml in outputXml] == ['dialog 1']
+        assert len(outputXml[0]) == 3
+
+    def test_reportTotals(self):
+        ''' Tests if the totals of the whole test are written to the start tag of the report in place of its padding '''
+        self.t_noException([[self.expectedJsonPath, self.receivedJsonPath, '-o', self.outputJunitXmlPath]])
+
+        with open(self.outputJunitXmlPath, 'r') as outputFile:
+            startTag = outputFile.readline()
+        assert startTag.endswith(' >\n')
+        assert LET.parse(self.outputJunitXmlPath).getroot().attrib.keys() == ['name', 'tests', 'failures', 'timestamp', 'time']
+
+    def test_parallelEvaluation(self):
+        ''' Tests if the dialogs compared by more processes give the same report as compared in the main process '''
+        expectedJsonPath = os.path.abspath(os.path.join(self.testOutputPath, 'expected_large.json'))
+        receivedJsonPath = os.path.abspath(os.path.join(self.testOutputPath, 'recieved_large.json'))
+        with open(expectedJsonPath, 'w') as expectedFile, open(receivedJsonPath, 'w') as receivedFile:
+            for line in range(3000):
+                output = {'output': {'text': ['answer ' + str(line)]}, 'intents': [{'intent': 'intent_' + str(line % 7)}]}
+                expectedFile.write(json.dumps({'dialog_id': line // 4 + 1, 'output_message': output}) + '\n')
+                if line % 11 == 0:
+                    output['output']['text'] = ['wrong answer']
+                receivedFile.write(json.dumps(output) + '\n')
+
+        reports = []
+        for workers in ['1', '3']:
+            outputJunitXmlPath = os.path.abspath(os.path.join(self.testOutputPath, 'test_workers' + workers + '.junit.xml'))
+            self.t_noException([[expectedJsonPath, receivedJsonPath, '-o', outputJunitXmlPath, '--workers', workers]])
+            with open(outputJunitXmlPath, 'r') as outputFile:
+                reports.append(re.sub(r' (timestamp|time)="[^"]*"| *(?=>)', '', outputFile.read()))
+
+        assert reports[0] == reports[1]
+        outputXml = LET.fromstring(reports[1])
+        assert outputXml.get('tests') == '3000'
+        assert outputXml.get('failures') == str(len(range(0, 3000, 11)))
+        assert len(outputXml) == 750
+
+    def test_areSame(self):
+        ''' Tests if the failure is described by the path of the first different element '''
+        expectedJson = {'output': {'text': ['a', 'b']}, 'context': None, 'intents': [{'intent': 'x'}]}
+        failureData = {}
+        assert workspace_test_evaluate.areSame(expectedJson, {'output': {'text': ['a', 'b']}, 'intents': [{'intent': 'x'}]}, failureData, 'root')
+        assert not failureData
+
+        assert not workspace_test_evaluate.areSame(expectedJson, {'output': {'text': ['a', 'c']}, 'intents': []}, failureData, 'root')
+        assert failureData == {'message': 'Received output differs from expected output. (root - output - text - 1th item in list)',
+                               'expectedElement': 'b', 'receivedElement': 'c'}
+
+        assert not workspace_test_evaluate.areSame(expectedJson, {'output': {'text': ['a', 'b']}, 'intents': [{'intent': 1}]}, failureData, 'root')
+        assert failureData == {'message': 'Received output differs in type from expected output. (root - intents - 0th item in list - intent)',
+                               'expectedElement': 'Element of the type string (x)', 'receivedElement': 'Element of the type int'}
@@ -16,7 +16,7 @@ limitations under the License.
 from EntityData import EntityData
 from IntentData import IntentData
 from NodeData import NodeData
-from wawCommons import getScriptLogger, toEntityName, toIntentName
+from wawCommons import getFreeNameSuffix, getScriptLogger, toEntityName, toIntentName
 
 logger = getScriptLogger(__file__)
 
@@ -44,6 +44,11 @@ class DialogData(object):
         self._config = config           # we need config to get NAME_POLICY, verbosity,..
         self._NAME_POLICY = 'soft'      # TBD: enable to set the NamePolicy from config file
 
+        # key: name prefix, value: lowest suffix which can be free - speeds up generating of the unique names
+        self._intentNameSuffixes = {}
+        self._entityNameSuffixes = {}
+        self._nodeNameSuffixes = {}
+
     #  LABEL
     #******************************************
 
@@ -160,19 +165,14 @@ class DialogData(object):
             intent_name is stripped from not allowed characters, spaces are replaced by _
             if the result exists a modifier is added at the end of the string
 
-            :returns unique intent_name or None if not able to create
+            :returns unique intent_name
         """
         #Normalize the string
         unique_intent_name = toIntentName( self._NAME_POLICY, [['$special', '\\A']], intent_name)
         if unique_intent_name not in self._intents:
             return unique_intent_name
-        #try to modify by a number
-        for modifier in range(0, 10000):
-            new_unique_intent_name=unique_intent_name+repr(modifier)  #create a modified one
-            # Check if the name exists
-            if new_unique_intent_name not in self._intents:
-                return new_unique_intent_name
-        return None
+        #modify by the lowest free number
+        return unique_intent_name + str(getFreeNameSuffix(unique_intent_name, self._intents, self._intentNameSuffixes))
 
     def createUniqueEntityName(self, entity_name):
         """
@@ -180,19 +180,14 @@ class DialogData(object):
             intent_name is stripped from not allowed characters, spaces are replaced by _
             if the result exists a modifier is added at the end of the string
 
-            :returns unique entity_name or None if not able to create
+            :returns unique entity_name
         """
         #Normalize the string
         unique_entity_name = toEntityName(self._NAME_POLICY, [['$special', '\\A']], entity_name)
         if unique_entity_name not in self._entities:
             return unique_entity_name
-        #try to modify by a number
-        for modifier in range(0, 10000):
-            new_unique_entity_name= unique_entity_name + repr(modifier)  #create a modified one
-            # Check if the name exists
-            if new_unique_entity_name not in self._entities:
-                return new_unique_entity_name
-        return None
+        #modify by the lowest free number
+        return unique_entity_name + str(getFreeNameSuffix(unique_entity_name, self._entities, self._entityNameSuffixes))
 
     def createUniqueNodeName(self, node_name):
         """
@@ -200,16 +195,11 @@ class DialogData(object):
             node_name is stripped from not allowed characters, spaces are replaced by _
             if the result exists a modifier is added at the end of the string
 
-            :return: unique node_name or None if not able to create
+            :return: unique node_name
         """
         # Normalize the string
         unique_node_name = toIntentName(self._NAME_POLICY, [['$special', '\\A']], node_name).upper()
         if unique_node_name not in self._nodes:
             return unique_node_name
-        # try to modify by a number
-        for modifier in range(0, 10000):
-            new_unique_node_name = unique_node_name + '_' + repr(modifier)  # create a modified one
-            # Check if the name exists
-            if new_unique_node_name not in self._nodes:
-                return new_unique_node_name
-        return None
+        # modify by the lowest free number
+        return unique_node_name + '_' + str(getFreeNameSuffix(unique_node_name + '_', self._nodes, self._nodeNameSuffixes))
@@ -34,6 +34,12 @@ limitations under the License.
    node_name - is derived from condition (unless we are using meta command to assign it)
        - they should be unique across all node names, if already exists - we ad _xxx where xxx is a unique number
 """
+import concurrent.futures
+import hashlib
+import io
+import itertools
+import json
+import logging
 import os
 import re
 from xml.sax.saxutils import escape
@@ -43,10 +49,131 @@ from openpyxl import load_workbook
 
 import DialogData as Dialog
 from DialogData import DialogData
-from wawCommons import getScriptLogger, toIntentName
+from wawCommons import getScriptLogger, setLoggerConfig, toIntentName
 
 logger = getScriptLogger(__file__)
 
+# version of the cache entries, it has to be increased when the format of the blocks changes
+XLSX_CACHE_VERSION = 1
+
+def initXLSXWorker(logLevel, isVerbose):
+    """ Initializes process of the pool reading the workbooks. """
+    if not hasattr(logging.Logger, 'verbose'):
+        # process was spawned (not forked), logging has to be configured again
+        setLoggerConfig(logLevel, isVerbose)
+
+def getXLSXCachePath(cacheDir, filename):
+    """ :return: path of the cache entry of the workbook, the entry is keyed by SHA-256 of the workbook content """
+    with open(filename, 'rb') as xlsxFile:
+        return os.path.join(cacheDir, hashlib.sha256(xlsxFile.read()).hexdigest() + '.json')
+
+def loadCachedXLSXBlocks(cachePath):
+    """ :return: list of tuples (prefix, rawBlock) stored in the cache entry or None if there is no valid entry """
+    if not os.path.exists(cachePath):
+        return None
+    with io.open(cachePath, 'r', encoding='utf-8') as cacheFile:
+        cacheEntry = json.load(cacheFile)
+    if cacheEntry.get('version') != XLSX_CACHE_VERSION:
+        return None
+    # rows of the blocks are tuples
+    return [(prefix, [tuple(row) for row in block]) for prefix, block in cacheEntry['blocks']]
+
+def saveCachedXLSXBlocks(cachePath, blocks):
+    """ Stores tuples (prefix, rawBlock) to the cache entry. """
+    cacheDir = os.path.dirname(cachePath)
+    if not os.path.exists(cacheDir):
+        os.makedirs(cacheDir)
+    # write to temporary file first, so parallel builds never read partially written entry
+    with io.open(cachePath + '.' + str(os.getpid()), 'w', encoding='utf-8') as cacheFile:
+        json.dump({'version': XLSX_CACHE_VERSION, 'blocks': blocks}, cacheFile, ensure_ascii=False, separators=(',', ':'))
+    os.replace(cachePath + '.' + str(os.getpid()), cachePath)
+
+def pruneXLSXCache(cacheDir, filenames):
+    """ Removes cache entries of all the workbooks except the given ones. """
+    if not os.path.isdir(cacheDir):
+        return
+    usedEntries = set(os.path.basename(getXLSXCachePath(cacheDir, filename)) for filename in filenames if os.path.exists(filename))
+    for entry in os.listdir(cacheDir):
+        if entry.endswith('.json') and entry not in usedEntries:
+            logger.verbose('Removing unused cache entry %s', entry)
+            os.remove(os.path.join(cacheDir, entry))
+
+def readXLSXBlocks(filename, namePolicy, cacheDir=None):
+    """ Reads Excel spreadsheet (in T2C format) and splits it to blocks.
+        It does not depend on any other file, so more files can be read in parallel.
+        If cacheDir is specified, blocks of the unchanged workbooks are taken from the cache without opening the workbook.
+        :return: list of tuples (domain, prefix, rawBlock)
+    """
+    blocks = []
+    logger.info('Processing xlsx file: %s', filename)
+    if not os.path.exists(filename):
+        logger.error('File does not exist: %s', filename)
+        return blocks
+
+    # Derive domain name from file name (use the same naming policy as for intents)
+    try:
+        domainName = toIntentName(namePolicy, None, os.path.splitext(os.path.split(filename)[1])[0])
+        try:
+            domainName = unicode(domainName, 'utf-8')  # Python 2
+        except NameError:
+            domainName = str(domainName)               # Python 3
+        if cacheDir:
+            # blocks do not depend on the file name, domain is not cached
+            cachePath = getXLSXCachePath(cacheDir, filename)
+            cachedBlocks = loadCachedXLSXBlocks(cachePath)
+            if cachedBlocks is not None:
+                logger.verbose('Using cached blocks of xlsx file: %s', filename)
+                return [(domainName, prefix, block) for prefix, block in cachedBlocks]
+        workbook = load_workbook(filename=filename, read_only=True)
+    except (IOError, BadZipfile):
+        logger.error('File does not seem to be a valid Excel spreadsheet: %s', filename)
+        return blocks
+
+    # Process all the tabs of the file
+    for sheet in workbook.worksheets:
+        # get prefix is a sheet title
+        logger.info(' Sheet: %s', sheet.title)
+        try:
+            prefix = unicode(sheet.title, 'utf-8')  # Python 2
+        except NameError:
+            prefix = str(sheet.title)               # Python 3
+
+        currentBlock = [] # Each cheet starts a new block
+        # Separate all data blocks in the sheet, if the currentBlock starts with header, the header is considered to be part of currentBlock
+        for row in sheet.iter_rows(max_col=4):
+            validRow = False
+            # Check if the row is valid. Row is valid if it contains at least one column not empty and different from comment
+            for columnIndex in range (0, 4):
+                if row[columnIndex] and row[columnIndex].value and not (row[columnIndex].value.startswith('//')):
+                    validRow = True
+            # Three slashes in the first cell cause whole rest of the line to be treated as comment
+            if row[0].value and row[0].value.startswith('///'):
+                validRow = False
+
+            if not validRow:
+                # If behind the block, we save the currentBlock (if any was populated)
+                if currentBlock:
+                    _appendBlock(blocks, domainName, prefix, currentBlock)
+                currentBlock = []
+            else:
+                # if valid row - we add the raw to block
+                currentBlock.append((escape(row[0].value.strip()) if row[0].value and not row[0].value.startswith('//') else None,
+                                     escape(row[1].value.strip()) if row[1].value and not row[1].value.startswith('//') else None,
+                                     escape(row[2].value.strip()) if row[2].value and not row[2].value.startswith('//') else None,
+                                     escape(row[3].value.strip()) if row[3].value and not row[3].value.startswith('//') else None))
+        if currentBlock:
+            _appendBlock(blocks, domainName, prefix, currentBlock)  # store the last block of the sheet
+    if cacheDir:
+        saveCachedXLSXBlocks(cachePath, [(prefix, block) for _, prefix, block in blocks])
+    return blocks
+
+def _appendBlock(blocks, domain, prefix, block):
+    """ Add the block to the block list """
+    if not block or not block[0][0]:
+        logger.warning('First cell of the data block does not contain any data. (domain=%s, prefix=%s)', domain, prefix)
+        return
+    blocks.append((domain, prefix, block))
+
 class XLSXHandler(object):
     """ Converts Excel spreadsheet forom multiple fles to an internal data representation in DialogData.
     """
@@ -66,69 +193,26 @@ class XLSXHandler(object):
         """ Return DialogData. This map is global across all processed Excel source files. """
         return self._dialogData
 
-    def parseXLSXIntoDataBlocks(self, filename):
+    def parseXLSXIntoDataBlocks(self, filename, cacheDir=None):
         """ Reads Excel spreadsheet (in T2C format). Splits it to blocks and
             stores the data as tuples (domain, prefix, intent, rawBlock) in _dataBlocks,
             THIS IS THE FIRST PASS THROUGH INPUT  (a single file of the INPUT)
+            Blocks are cached in cacheDir (if specified) by readXLSXBlocks.
         """
-        logger.info('Processing xlsx file: %s', filename)
-        if not os.path.exists(filename):
-            logger.error('File does not exist: %s', filename)
-            return {}
+        self._blocks.extend(readXLSXBlocks(filename, self._NAME_POLICY, cacheDir))
 
-        # Derive domain name from file name (use the same naming policy as for intents)
-        try:
-            domainName = toIntentName(self._NAME_POLICY, None, os.path.splitext(os.path.split(filename)[1])[0])
-            try:
-                domainName = unicode(domainName, 'utf-8')  # Python 2
-            except NameError:
-                domainName = str(domainName)               # Python 3
-            workbook = load_workbook(filename=filename, read_only=True)
-        except (IOError, BadZipfile):
-            logger.error('File does not seem to be a valid Excel spreadsheet: %s', filename)
-            return {}
-
-        # Process all the tabs of the file
-        for sheet in workbook.worksheets:
-            # get prefix is a sheet title
-            logger.info(' Sheet: %s', sheet.title)
-            try:
-                prefix = unicode(sheet.title, 'utf-8')  # Python 2
-            except NameError:
-                prefix = str(sheet.title)               # Python 3
-
-            currentBlock = [] # Each cheet starts a new block
-            # Separate all data blocks in the sheet, if the currentBlock starts with header, the header is considered to be part of currentBlock
-            for row in sheet.iter_rows(max_col=4):
-                validRow = False
-                # Check if the row is valid. Row is valid if it contains at least one column not empty and different from comment
-                for columnIndex in range (0, 4):
-                    if row[columnIndex] and row[columnIndex].value and not (row[columnIndex].value.startswith('//')):
-                        validRow = True
-                # Three slashes in the first cell cause whole rest of the line to be treated as comment
-                if row[0].value and row[0].value.startswith('///'):
-                    validRow = False
-
-                if not validRow:
-                    # If behind the block, we save the currentBlock (if any was populated)
-                    if currentBlock:
-                        self.__createBlock(domainName, prefix, currentBlock)
-                    currentBlock = []
-                else:
-                    # if valid row - we add the raw to block
-                    currentBlock.append((escape(row[0].value.strip()) if row[0].value and not row[0].value.startswith('//') else None,
-                                         escape(row[1].value.strip()) if row[1].value and not row[1].value.startswith('//') else None,
-                                         escape(row[2].value.strip()) if row[2].value and not row[2].value.startswith('//') else None,
-                                         escape(row[3].value.strip()) if row[3].value and not row[3].value.startswith('//') else None))
-            if currentBlock:
-                self.__createBlock(domainName, prefix, currentBlock)  # store the last block of the sheet
-
-    def __createBlock(self, domain, prefix, block):
-        """ Add the block to the block list """
-        if not block or not block[0][0]:
-            logger.warning('First cell of the data block does not contain any data. (domain=%s, prefix=%s)', domain, prefix)
-            return
-        self._blocks.append((domain, prefix, block))
+    def parseXLSXFilesIntoDataBlocks(self, filenames, workers=1, cacheDir=None):
+        """ Same as parseXLSXIntoDataBlocks, but for more files. If workers > 1, the files are read in a pool of processes
+            (one task per workbook), the blocks are stored in the order of the files anyway, so the result is deterministic.
+        """
+        if workers > 1 and len(filenames) > 1:
+            with concurrent.futures.ProcessPoolExecutor(min(workers, len(filenames)), initializer=initXLSXWorker,
+                    initargs=(logging.getLevelName(logging.getLogger().level), getattr(logging.Logger, 'isVerbose', False))) as executor:
+                for fileBlocks in executor.map(readXLSXBlocks, filenames, itertools.repeat(self._NAME_POLICY), itertools.repeat(cacheDir)):
+                    self._blocks.extend(fileBlocks)
+        else:
+            for filename in filenames:
+                self.parseXLSXIntoDataBlocks(filename, cacheDir)
 
     def __is_condition_block(self, block):
         """ :return: true if first cell contains X_PLACEHOLDER
@@ -24,10 +24,13 @@ from deepdiff import DeepDiff
 
 from _version import __version__
 from cfgCommons import Cfg
-from wawCommons import (convertApikeyToUsernameAndPassword,
+from httpCommons import configureHttp
+from wawCommons import (configureActivationPolling,
+                        convertApikeyToUsernameAndPassword,
                         getFunctionResponseJson, getOptionalParameter,
                         getParametersCombination, getRequiredParameter,
-                        getScriptLogger, replaceValue, setLoggerConfig)
+                        getScriptLogger, payloadLoader, replaceValues,
+                        setLoggerConfig)
 from ExceptionCommons import CFCallException
 
 logger = getScriptLogger(__file__)
@@ -97,6 +100,8 @@ def main(argv):
         setLoggerConfig(args.log, args.verbose)
 
     config = Cfg(args)
+    configureHttp(config)
+    configureActivationPolling(config)
 
     logger.info('STARTING: '+ os.path.basename(__file__))
 
@@ -149,6 +154,9 @@ def main(argv):
             else:
                 replaceDict[attr] = getattr(config, attr)
 
+    # targets are referenced in the tests as '::name'
+    replacements = {'::' + target: value for target, value in replaceDict.items()}
+
     # helper to create error errorMessage
     def errorJsonTemplate(message, type):
         return { 'message': message, 'type': type }
@@ -174,14 +182,12 @@ def main(argv):
                 testInputPath = os.path.join(os.path.dirname(args.inputFileName), testInputJson[1:])
                 logger.debug('Loading input payload from file: %s', testInputPath)
                 try:
-                    inputFile = open(testInputPath, 'r')
+                    testInputJson = payloadLoader.load(testInputPath)
                 except IOError:
                     errorMessage = "Cannot open input payload from file '{}'".format(testInputPath)
                     logger.error(errorMessage)
                     test['error'] = errorJsonTemplate(errorMessage, 'IOError')
                     continue
-                try:
-                    testInputJson = json.load(inputFile)
                 except ValueError as e:
                     errorMessage = "Cannot decode json from input payload from file '{}', error '{}'".format(testInputPath, str(e))
                     logger.error(errorMessage)
@@ -201,14 +207,12 @@ def main(argv):
                 testOutputExpectedPath = os.path.join(os.path.dirname(args.inputFileName), testOutputExpectedJson[1:])
                 logger.debug('Loading expected output payload from file: %s', testOutputExpectedPath)
                 try:
-                    outputExpectedFile = open(testOutputExpectedPath, 'r')
+                    testOutputExpectedJson = payloadLoader.load(testOutputExpectedPath)
                 except IOError:
                     errorMessage = "Cannot open expected output payload from file '{}'".format(testOutputExpectedPath)
                     logger.error(errorMessage)
                     test['error'] = errorJsonTemplate(errorMessage, 'IOError')
                     continue
-                try:
-                    testOutputExpectedJson = json.load(outputExpectedFile)
                 except ValueError as e:
                     errorMessage = "Cannot decode json from expected output payload from file '{}', error '{}'".format(testOutputExpectedPath, str(e))
                     logger.error(errorMessage)
@@ -222,13 +226,14 @@ def main(argv):
 
         logger.debug('Replacing values in input and expected output jsons by configuration parameters.')
 
-        for target, value in replaceDict.items():
-            testInputJson, replacementNumber = replaceValue(testInputJson, '::' + target, value, False)
+        testInputJson, replacementNumbers = replaceValues(testInputJson, replacements, False)
+        for target, replacementNumber in replacementNumbers.items():
             if replacementNumber > 0:
-                logger.debug('Replaced configuration parameter \'%s\' in input json, number of occurences: %d.', target, replacementNumber)
-            testOutputExpectedJson, replacementNumber = replaceValue(testOutputExpectedJson, '::' + target, value, False)
+                logger.debug('Replaced configuration parameter \'%s\' in input json, number of occurences: %d.', target[2:], replacementNumber)
+        testOutputExpectedJson, replacementNumbers = replaceValues(testOutputExpectedJson, replacements, False)
+        for target, replacementNumber in replacementNumbers.items():
             if replacementNumber > 0:
-                logger.debug('Replaced configuration parameter \'%s\' in expected output json, number of occurences: %d.', target, replacementNumber)
+                logger.debug('Replaced configuration parameter \'%s\' in expected output json, number of occurences: %d.', target[2:], replacementNumber)
 
         # call CF
         logger.debug('Sending input json: %s', json.dumps(testInputJson, ensure_ascii=False).encode('utf8'))
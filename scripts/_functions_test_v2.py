@@ -14,17 +14,22 @@ limitations under the License.
 '''
 
 import argparse
+import asyncio
 import json
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 from cfgCommons import Cfg
-from wawCommons import (convertApikeyToUsernameAndPassword,
-                        getFunctionResponseJson, getOptionalParameter,
+from httpCommons import DEFAULT_POOL_SIZE, configureHttp
+from wawCommons import (configureActivationPolling,
+                        convertApikeyToUsernameAndPassword,
+                        getFunctionResponseJsonAsync,
+                        getOptionalParameter,
                         getParametersCombination, getRequiredParameter,
                         getScriptLogger, getTimestampInMillis,
-                        replaceValue, setLoggerConfig)
+                        payloadLoader, replaceValues, setLoggerConfig)
 from ExceptionCommons import CFCallException
 
 logger = getScriptLogger(__file__)
@@ -47,12 +52,21 @@ def main(argv):
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
     parser.add_argument('--replace', required=False, help='string values to be replaced in input and expected output json (format \'valueToBeReplaced1:replacement1,valueToBeReplaced2:replacement2\')')
     parser.add_argument('-t','--time', required=False, help='measure time of each test', action='store_true')
+    parser.add_argument('-j', '--concurrency', type=int, default=1, help='number of tests running in parallel')
     args = parser.parse_args(argv)
 
     if __name__ == '__main__':
         setLoggerConfig(args.log, args.verbose)
 
     config = Cfg(args)
+    if args.concurrency < 1:
+        logger.critical('Concurrency has to be positive number, concurrency: %d', args.concurrency)
+        sys.exit(1)
+    if not hasattr(config, 'common_http_pool_size'):
+        # keep connection for every thread
+        config.common_http_pool_size = max(DEFAULT_POOL_SIZE, args.concurrency)
+    configureHttp(config)
+    configureActivationPolling(config)
 
     logger.info('STARTING: '+ os.path.basename(__file__))
 
@@ -107,6 +121,9 @@ def main(argv):
             else:
                 replaceDict[attr] = getattr(config, attr)
 
+    # targets are referenced in the tests as '::name'
+    replacements = {'::' + target: value for target, value in replaceDict.items()}
+
     # helper to create error errorMessage
     def errorJsonTemplate(message, type):
         return { 'message': message, 'type': type }
@@ -118,112 +135,117 @@ def main(argv):
             test['time'] = test['end'] - test['start']
         return test
 
-    # run tests
-    testCounter = -1
-    for test in inputJson:
-        if time:
-            test['start'] = getTimestampInMillis()
-        testCounter += 1
-        if not isinstance(test, dict):
-            errorMessage = "Input test array element {:d} is not dictionary. Each test has to be dictionary, please see doc!".format(testCounter)
-            logger.error(errorMessage)
-            inputJson[testCounter] = {}
-            inputJson[testCounter]['error'] = errorJsonTemplate(errorMessage, 'ValueError')
+    # run the test with given index, 'semaphore' limits the number of the tests running in parallel
+    async def runTest(testCounter, test, semaphore):
+        async with semaphore:
+            if not isinstance(test, dict):
+                errorMessage = "Input test array element {:d} is not dictionary. Each test has to be dictionary, please see doc!".format(testCounter)
+                logger.error(errorMessage)
+                inputJson[testCounter] = {}
+                inputJson[testCounter]['error'] = errorJsonTemplate(errorMessage, 'ValueError')
+                return
+            # the test starts when it gets its turn, not when it starts waiting for it
+            if time:
+                test['start'] = getTimestampInMillis()
+            logger.info("Test number %d, name '%s'", testCounter, (test['name'] if 'name' in test else '-'))
+
+            # load test input payload json
+            testInputJson = test['input']
+            testInputPath = None
+            try:
+                if testInputJson.startswith('@'):
+                    testInputPath = os.path.join(os.path.dirname(args.inputFileName), testInputJson[1:])
+                    logger.debug('Loading input payload from file: %s', testInputPath)
+                    try:
+                        testInputJson = payloadLoader.load(testInputPath)
+                    except IOError:
+                        errorMessage = "Cannot open input payload from file '{}'".format(testInputPath)
+                        logger.error(errorMessage)
+                        test['error'] = errorJsonTemplate(errorMessage, 'IOError')
+                        test = setDuration(test)
+                        return
+                    except ValueError as e:
+                        errorMessage = "Cannot decode json from input payload from file '{}', error '{}'".format(testInputPath, str(e))
+                        logger.error(errorMessage)
+                        test['error'] = errorJsonTemplate(errorMessage, 'IOError')
+                        test = setDuration(test)
+                        return
+            except AttributeError:
+                pass
+
+            if not testInputPath:
+                logger.debug('Input payload provided inside the test')
+
+            # load test expected output payload json
+            testOutputExpectedJson = test['outputExpected']
+            testOutputExpectedPath = None
+            try:
+                if testOutputExpectedJson.startswith('@'):
+                    testOutputExpectedPath = os.path.join(os.path.dirname(args.inputFileName), testOutputExpectedJson[1:])
+                    logger.debug('Loading expected output payload from file: %s', testOutputExpectedPath)
+                    try:
+                        testOutputExpectedJson = payloadLoader.load(testOutputExpectedPath)
+                    except IOError:
+                        errorMessage = "Cannot open expected output payload from file '{}'".format(testOutputExpectedPath)
+                        logger.error(errorMessage)
+                        test['error'] = errorJsonTemplate(errorMessage, 'IOError')
+                        test = setDuration(test)
+                        return
+                    except ValueError as e:
+                        errorMessage = "Cannot decode json from expected output payload from file '{}', error '{}'".format(testOutputExpectedPath, str(e))
+                        logger.error(errorMessage)
+                        test['error'] = errorJsonTemplate(errorMessage, 'IOError')
+                        test = setDuration(test)
+                        return
+            except AttributeError:
+                pass
+
+            if not testOutputExpectedPath:
+                logger.debug('Expected output payload provided inside the test')
+
+            logger.debug('Replacing values in input and expected output jsons by configuration parameters.')
+
+            testInputJson, replacementNumbers = replaceValues(testInputJson, replacements, False)
+            for target, replacementNumber in replacementNumbers.items():
+                if replacementNumber > 0:
+                    logger.debug('Replaced configuration parameter \'%s\' in input json, number of occurences: %d.', target[2:], replacementNumber)
+            testOutputExpectedJson, replacementNumbers = replaceValues(testOutputExpectedJson, replacements, False)
+            for target, replacementNumber in replacementNumbers.items():
+                if replacementNumber > 0:
+                    logger.debug('Replaced configuration parameter \'%s\' in expected output json, number of occurences: %d.', target[2:], replacementNumber)
+
+            # save the expected output as an object even it was specified as a file,
+            # because it can contain replaced value and the returned output is also an object
+            # (could be improved by parameter that save both to external files)
+            test['outputExpected'] = testOutputExpectedJson
+
+            # call CF
+            try:
+                logger.debug('Sending input json: %s', json.dumps(testInputJson, ensure_ascii=False).encode('utf8'))
+                testOutputReturnedJson = await getFunctionResponseJsonAsync(
+                    executor,
+                    url,
+                    namespace,
+                    username,
+                    password,
+                    (test['cf_package'] if 'cf_package' in test else package),
+                    (test['cf_function'] if 'cf_function' in test else function),
+                    {},
+                    testInputJson)
+
+                logger.debug('Received output json: %s', json.dumps(testOutputReturnedJson, ensure_ascii=False).encode('utf8'))
+                test['outputReturned'] = testOutputReturnedJson
+            except CFCallException as e:
+                test['error'] = e.toJson()
             test = setDuration(test)
-            continue
-        logger.info("Test number %d, name '%s'", testCounter, (test['name'] if 'name' in test else '-'))
-
-        # load test input payload json
-        testInputJson = test['input']
-        testInputPath = None
-        try:
-            if testInputJson.startswith('@'):
-                testInputPath = os.path.join(os.path.dirname(args.inputFileName), testInputJson[1:])
-                logger.debug('Loading input payload from file: %s', testInputPath)
-                try:
-                    inputFile = open(testInputPath, 'r')
-                except IOError:
-                    errorMessage = "Cannot open input payload from file '{}'".format(testInputPath)
-                    logger.error(errorMessage)
-                    test['error'] = errorJsonTemplate(errorMessage, 'IOError')
-                    test = setDuration(test)
-                    continue
-                try:
-                    testInputJson = json.load(inputFile)
-                except ValueError as e:
-                    errorMessage = "Cannot decode json from input payload from file '{}', error '{}'".format(testInputPath, str(e))
-                    logger.error(errorMessage)
-                    test['error'] = errorJsonTemplate(errorMessage, 'IOError')
-                    test = setDuration(test)
-                    continue
-        except AttributeError:
-            pass
-
-        if not testInputPath:
-            logger.debug('Input payload provided inside the test')
-
-        # load test expected output payload json
-        testOutputExpectedJson = test['outputExpected']
-        testOutputExpectedPath = None
-        try:
-            if testOutputExpectedJson.startswith('@'):
-                testOutputExpectedPath = os.path.join(os.path.dirname(args.inputFileName), testOutputExpectedJson[1:])
-                logger.debug('Loading expected output payload from file: %s', testOutputExpectedPath)
-                try:
-                    outputExpectedFile = open(testOutputExpectedPath, 'r')
-                except IOError:
-                    errorMessage = "Cannot open expected output payload from file '{}'".format(testOutputExpectedPath)
-                    logger.error(errorMessage)
-                    test['error'] = errorJsonTemplate(errorMessage, 'IOError')
-                    test = setDuration(test)
-                    continue
-                try:
-                    testOutputExpectedJson = json.load(outputExpectedFile)
-                except ValueError as e:
-                    errorMessage = "Cannot decode json from expected output payload from file '{}', error '{}'".format(testOutputExpectedPath, str(e))
-                    logger.error(errorMessage)
-                    test['error'] = errorJsonTemplate(errorMessage, 'IOError')
-                    test = setDuration(test)
-                    continue
-        except AttributeError:
-            pass
-
-        if not testOutputExpectedPath:
-            logger.debug('Expected output payload provided inside the test')
-
-        logger.debug('Replacing values in input and expected output jsons by configuration parameters.')
-
-        for target, value in replaceDict.items():
-            testInputJson, replacementNumber = replaceValue(testInputJson, '::' + target, value, False)
-            if replacementNumber > 0:
-                logger.debug('Replaced configuration parameter \'%s\' in input json, number of occurences: %d.', target, replacementNumber)
-            testOutputExpectedJson, replacementNumber = replaceValue(testOutputExpectedJson, '::' + target, value, False)
-            if replacementNumber > 0:
-                logger.debug('Replaced configuration parameter \'%s\' in expected output json, number of occurences: %d.', target, replacementNumber)
-
-        # save the expected output as an object even it was specified as a file,
-        # because it can contain replaced value and the returned output is also an object
-        # (could be improved by parameter that save both to external files)
-        test['outputExpected'] = testOutputExpectedJson
-
-        # call CF
-        try:
-            logger.debug('Sending input json: %s', json.dumps(testInputJson, ensure_ascii=False).encode('utf8'))
-            testOutputReturnedJson = getFunctionResponseJson(
-                url,
-                namespace,
-                username,
-                password,
-                (test['cf_package'] if 'cf_package' in test else package),
-                (test['cf_function'] if 'cf_function' in test else function),
-                {},
-                testInputJson)
-
-            logger.debug('Received output json: %s', json.dumps(testOutputReturnedJson, ensure_ascii=False).encode('utf8'))
-            test['outputReturned'] = testOutputReturnedJson
-        except CFCallException as e:
-            test['error'] = e.toJson()
-        test = setDuration(test)
+
+    async def runTests(executor):
+        semaphore = asyncio.Semaphore(args.concurrency)
+        await asyncio.gather(*[runTest(testCounter, test, semaphore) for testCounter, test in enumerate(inputJson)])
+
+    # run tests, requests are sent by the threads of the executor, other tests continue while some test waits for the result
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        asyncio.run(runTests(executor))
 
     outputFile.write(json.dumps(inputJson, indent=4, ensure_ascii=False) + '\n')
     outputFile.close()
@@ -35,23 +35,27 @@ def convertDialog(dialogNodesJSON):
 
     dialogXML = LET.Element("nodes", nsmap=NSMAP)
 
-    topNodes = popAllChildren(dialogNodesJSON, None)
+    nodeIndex, duplicateNodesJSON = buildNodeIndex(dialogNodesJSON)
+
+    topNodes = popAllChildren(nodeIndex, None)
     for topNode in topNodes:
-        dialogXML.append(expandNode(dialogNodesJSON, topNode))
-    
-    if (len(dialogNodesJSON) > 0):
-        logger.error("There are " + str(len(dialogNodesJSON)) + " unprocessed nodes: " + str(dialogNodesJSON))
+        dialogXML.append(expandNode(nodeIndex, topNode))
+
+    unprocessedNodesJSON = list(nodeIndex.values()) + duplicateNodesJSON
+    if (len(unprocessedNodesJSON) > 0):
+        reportUnprocessedNodes(dialogNodesJSON, nodeIndex, duplicateNodesJSON)
+        logger.error("There are " + str(len(unprocessedNodesJSON)) + " unprocessed nodes: " + str(unprocessedNodesJSON))
     return dialogXML
 
-# dialogNodesJSON: rest of nodes to process
+# nodeIndex: rest of nodes to process indexed by (parent, previous_sibling)
 # nodeJSON: node to expand
 # Converts this node and recursively all its children
-def expandNode(dialogNodesJSON, nodeJSON):
+def expandNode(nodeIndex, nodeJSON):
     nodeXML = convertNode(nodeJSON)
 
     childrenXML = []
-    for childJSON in popAllChildren(dialogNodesJSON, nodeJSON): 
-        childrenXML.append(expandNode(dialogNodesJSON, childJSON))
+    for childJSON in popAllChildren(nodeIndex, nodeJSON):
+        childrenXML.append(expandNode(nodeIndex, childJSON))
 
     lastChildContainerTag = ''
     childContainer = None
@@ -369,36 +373,80 @@ def convertAll(upperNodeXML, nodeJSON, keyJSON, nameXML = None):
     else:
         logger.error("Unknown value type")
 
-# find and return node with specific parent and previous sibling
-# removing it from the list
-def findNode(dialogNodesJSON, parentName, siblingName):
+# builds index of nodes by their position in the tree, i.e. (parent, previous_sibling) tuple
+# returns the index and list of nodes whose position is already taken by another node
+def buildNodeIndex(dialogNodesJSON):
+    nodeIndex = {}
+    duplicateNodesJSON = []
     for nodeJSON in dialogNodesJSON:
-        if getValue(nodeJSON, 'parent') == parentName and getValue(nodeJSON, 'previous_sibling') == siblingName:
-            dialogNodesJSON.remove(nodeJSON)
-            return nodeJSON
-    return None
+        position = (getValue(nodeJSON, 'parent'), getValue(nodeJSON, 'previous_sibling'))
+        if position in nodeIndex:
+            duplicateNodesJSON.append(nodeJSON)
+        else:
+            nodeIndex[position] = nodeJSON
+    return nodeIndex, duplicateNodesJSON
 
-def popFirstChild(dialogNodesJSON, parentNode):
-    return findNode(dialogNodesJSON, getValue(parentNode, 'dialog_node'), None)
+# find and return node with specific parent and previous sibling
+# removing it from the index
+def findNode(nodeIndex, parentName, siblingName):
+    return nodeIndex.pop((parentName, siblingName), None)
+
+def popFirstChild(nodeIndex, parentNode):
+    return findNode(nodeIndex, getValue(parentNode, 'dialog_node'), None)
 
-def popNextSibling(dialogNodesJSON, parentNode, siblingNode):
-    return findNode(dialogNodesJSON, getValue(parentNode, 'dialog_node'), getValue(siblingNode, 'dialog_node'))
+def popNextSibling(nodeIndex, parentNode, siblingNode):
+    return findNode(nodeIndex, getValue(parentNode, 'dialog_node'), getValue(siblingNode, 'dialog_node'))
 
-def popAllChildren(dialogNodesJSON, node):
+def popAllChildren(nodeIndex, node):
     if not node:
         node = {'dialog_node': None}
     children = []
-    child = popFirstChild(dialogNodesJSON, node)
+    child = popFirstChild(nodeIndex, node)
     if child:
         children.append(child)
         while True:
-            child = popNextSibling(dialogNodesJSON, node, child)
+            child = popNextSibling(nodeIndex, node, child)
             if child:
                 children.append(child)
             else:
                 break
     return children
 
+# logs the reason why the nodes remaining in the index (and the duplicates) were not attached to the tree
+# each node is reachable only through its predecessor (previous sibling, or parent if it is the first child),
+# so the unprocessed nodes are either orphans (predecessor is missing) or they form a cycle of predecessors
+def reportUnprocessedNodes(dialogNodesJSON, nodeIndex, duplicateNodesJSON):
+    nodesByName = {getValue(nodeJSON, 'dialog_node'): nodeJSON for nodeJSON in dialogNodesJSON}
+
+    for nodeJSON in duplicateNodesJSON:
+        logger.error("Node '%s' has the same parent '%s' and previous sibling '%s' as another node",
+                     getValue(nodeJSON, 'dialog_node'), getValue(nodeJSON, 'parent'), getValue(nodeJSON, 'previous_sibling'))
+
+    predecessors = {}
+    for (parentName, siblingName), nodeJSON in nodeIndex.items():
+        predecessorName = siblingName if siblingName is not None else parentName
+        if predecessorName not in nodesByName:
+            logger.error("Node '%s' is an orphan, its %s '%s' does not exist", getValue(nodeJSON, 'dialog_node'),
+                         'previous sibling' if siblingName is not None else 'parent', predecessorName)
+        elif siblingName is not None and getValue(nodesByName[siblingName], 'parent') != parentName:
+            logger.error("Node '%s' is an orphan, its previous sibling '%s' has a different parent",
+                         getValue(nodeJSON, 'dialog_node'), siblingName)
+        else:
+            predecessors[getValue(nodeJSON, 'dialog_node')] = predecessorName
+
+    # each node has at most one predecessor, so every cycle is found by following the predecessors from any of its nodes
+    visited = set()
+    for startName in predecessors:
+        path = []
+        nodeName = startName
+        while nodeName in predecessors and nodeName not in visited:
+            visited.add(nodeName)
+            path.append(nodeName)
+            nodeName = predecessors[nodeName]
+        if nodeName in path:
+            cycle = path[path.index(nodeName):]
+            logger.error("Nodes form a cycle: %s", ' -> '.join(cycle + [nodeName]))
+
 def getValue(dict, key):
     if key in dict:
         # check another null like values
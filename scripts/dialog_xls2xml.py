@@ -21,7 +21,7 @@ import sys
 
 from cfgCommons import Cfg
 from wawCommons import getScriptLogger, openFile, setLoggerConfig
-from XLSXHandler import XLSXHandler
+from XLSXHandler import XLSXHandler, pruneXLSXCache
 from XMLHandler import XMLHandler
 
 logger = getScriptLogger(__file__)
@@ -79,6 +79,10 @@ def main(argv):
     parser.add_argument('-ge', '--common_generated_entities', nargs='?', help='directory for generated entities')
     parser.add_argument('-c', '--common_configFilePaths', help='configuaration file', action='append')
     parser.add_argument('-oc', '--common_output_config', help='output configuration file')
+    parser.add_argument('-xc', '--common_xls_cache', required=False, help='directory with cache of blocks read from the xlsx files, unchanged files are not opened again (files are not cached if not specified)')
+    parser.add_argument('-xnc', '--common_xls_no_cache', required=False, help='read all the xlsx files, do not use the cache even if it is specified', action='store_true', default="")
+    parser.add_argument('-xcp', '--common_xls_cache_prune', required=False, help='remove cache entries of the xlsx files which are not processed by this run', action='store_true', default="")
+    parser.add_argument('-xw', '--common_xls_workers', required=False, help='number of processes reading the xlsx files (default is 1, which reads them one by one in the main process)')
     parser.add_argument('-v', '--verbose', required=False, help='verbosity', action='store_true')
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
     args = parser.parse_args(argv)
@@ -103,6 +107,7 @@ def main(argv):
     xlsxHandler = XLSXHandler(config)
 
     logger.info(getattr(config, 'common_xls'))
+    xlsFiles = []
     for fileOrFolder in getattr(config, 'common_xls'):
         logger.verbose('Searching in path: %s', fileOrFolder)
         if os.path.isdir(fileOrFolder):
@@ -110,13 +115,20 @@ def main(argv):
             for xlsFile in xlsDirList:
                 if os.path.isfile(os.path.join(fileOrFolder, xlsFile)) and xlsFile.endswith('.xlsx') and \
                         not(xlsFile.startswith('~')) and not(xlsFile.startswith('.')):
-                    xlsxHandler.parseXLSXIntoDataBlocks(fileOrFolder + "/" + xlsFile)
+                    xlsFiles.append(fileOrFolder + "/" + xlsFile)
                 else:
                     logger.warning('The file %s skipped due to failing file selection policy check. '
                             'It should be .xlsx file not starting with ~ or .(dot).', os.path.join(fileOrFolder, xlsFile))
 
         elif os.path.exists(fileOrFolder):
-            xlsxHandler.parseXLSXIntoDataBlocks(fileOrFolder)
+            xlsFiles.append(fileOrFolder)
+
+    # workbooks are independent, they can be read in parallel (blocks are kept in the order of the files)
+    workers = int(getattr(config, 'common_xls_workers')) if hasattr(config, 'common_xls_workers') else 1
+    cacheDir = getattr(config, 'common_xls_cache') if hasattr(config, 'common_xls_cache') and not hasattr(config, 'common_xls_no_cache') else None
+    xlsxHandler.parseXLSXFilesIntoDataBlocks(xlsFiles, workers, cacheDir)
+    if cacheDir and hasattr(config, 'common_xls_cache_prune'):
+        pruneXLSXCache(cacheDir, xlsFiles)
 
     xlsxHandler.convertBlocksToDialogData() # Blocks-> DialogData
     xlsxHandler.updateReferences()          # Resolving cross references
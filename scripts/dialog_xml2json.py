@@ -13,8 +13,10 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 import argparse
+import concurrent.futures
 import copy
 import datetime
+import hashlib
 import io
 import json
 import logging
@@ -26,7 +28,7 @@ from xml.sax.saxutils import unescape
 import lxml.etree as LET
 
 from cfgCommons import Cfg
-from wawCommons import getRequiredParameter, getOptionalParameter, getScriptLogger, setLoggerConfig
+from wawCommons import getFreeNameSuffix, getRequiredParameter, getOptionalParameter, getScriptLogger, setLoggerConfig, writeJsonArray
 
 logger = getScriptLogger(__file__)
 
@@ -134,16 +136,17 @@ DEFAULT_GENERIC.set('propagate','true')
 # on
 DEFAULT_GENERIC.set('on','false')
 
-# GLOBAL VARIABLES
-counter = 0
-firstNode = True
-parent_map = {}
-rootGlobal = None
-schema = None
+# XML namespaces
+XSI_NAMESPACE = "http://www.w3.org/2001/XMLSchema-instance"
+XSI = "{%s}" % XSI_NAMESPACE
+NSMAP = {"xsi" : XSI_NAMESPACE}
 
-def replace_config_variables (importTree):
-     global config
-     replaces = importTree.xpath('//replace')
+# compiler of the process validating the dialog files
+validationWorkerCompiler = None
+
+def replace_config_variables (replaces, config):
+     """Replaces <replace> elements by values of config variables, returns dict of used variables and their values."""
+     variables = {}
 
      for repl in replaces:
          # repl.text  - name of the variable to be replaced
@@ -153,20 +156,38 @@ def replace_config_variables (importTree):
              middle= unicode(datetime.datetime.now().strftime("%y-%m-%d-%H-%M"))
          else:
             middle=getattr(config, repl.text) if hasattr(config, repl.text) else ""
+         variables[repl.text] = middle
          repl.getparent().text = ("" if repl.getparent().text is None else repl.getparent().text) + middle + ("" if repl.tail is None else repl.tail)
          repl.getparent().remove(repl)
-
-def validate(xml, filePath, imported):
-    importedStr = "imported" if imported else "root"
-    global schema
-    try:
-        schema.assertValid(xml)
-        logger.verbose("%s XML %s is valid", importedStr, filePath)
-    except LET.DocumentInvalid as e:
-        logger.critical("Invalid %s XML: %s", importedStr, filePath)
-        logger.critical(e)
-        exit(1)
-
+     return variables
+
+def initValidationWorker(workerConfig, schemaFile, logLevel, isVerbose):
+    """Initializes process of the validation pool, the schema is compiled just once for each worker."""
+    global validationWorkerCompiler
+    if not hasattr(logging.Logger, 'verbose'):
+        # process was spawned (not forked), logging has to be configured again
+        setLoggerConfig(logLevel, isVerbose)
+    validationWorkerCompiler = DialogCompiler(schemaFile, 1)
+    validationWorkerCompiler.config = workerConfig
+
+def validateImportedFileInWorker(filePath):
+    return validationWorkerCompiler.validateImportedFile(filePath)
+
+def getImportPath(importXML, config):
+    return os.path.join(os.path.dirname(getattr(config, 'common_dialog_main')), *importXML.text.split('/'))
+
+def findImportedFiles(nodesXML, imported, config):
+    """Returns paths of files imported by the <nodes> element and its nested <nodes> elements in the same way as importNodes does,
+    <import> elements directly in the root of the imported file are ignored."""
+    importPaths = []
+    if not imported:
+        for importXML in nodesXML.findall('import'):
+            importPaths.append(getImportPath(importXML, config))
+    for node in nodesXML.findall('node'):
+        children = node.find('nodes')
+        if children is not None:
+            importPaths.extend(findImportedFiles(children, False, config))
+    return importPaths
 
 def getNodeWithTheSameCondition(root, testNode):
     testNodeCondition = testNode.find('condition').text if testNode.find('condition') is not None else 'anything_else'
@@ -175,136 +196,44 @@ def getNodeWithTheSameCondition(root, testNode):
         if testNodeCondition == nodeCondition:
             return node
 
-def importText(importTree, config):
-    imports = importTree.xpath('//importText')
+def importText(imports, config):
+    """Replaces <importText> elements by content of the text files, returns list of paths of the imported files."""
+    importedPaths = []
     for imp in imports:
         filename = imp.text.split('/')
-        logger.verbose('Importing %s', os.path.join(os.path.dirname(getRequiredParameter(config, 'common_dialog_main')), *filename))
-        fp = io.open(os.path.join(os.path.dirname(getRequiredParameter(config, 'common_dialog_main')),*filename) ,'r', encoding='utf-8')
+        importedPath = os.path.join(os.path.dirname(getRequiredParameter(config, 'common_dialog_main')), *filename)
+        logger.verbose('Importing %s', importedPath)
+        fp = io.open(importedPath, 'r', encoding='utf-8')
         importTxt = fp.read()
         fp.close()
+        importedPaths.append(importedPath)
         imp.getparent().text = ("" if imp.getparent().text is None else imp.getparent().text) + importTxt + ("" if imp.tail is None else imp.tail)
         imp.getparent().remove(imp)
+    return importedPaths
 
-def importNodes(root, config):
-    global rootGlobal, names
-    # IMPORT AND APPEND NODES
-    defaultNode = None
-    if len(root) > 0 and (root[len(root)-1].find('condition') is None or (root[len(root)-1].find('condition') is not None and root[len(root)-1].find('condition').text == 'anything_else')):
-        # IF LAST NODE DOES NOT HAVE CONDITION OR HAS CONDITION SET TO 'anything_else'
-        defaultNode = root[len(root)-1]
-
-    for node in root.findall('import'):
-        logger.verbose('Importing %s', os.path.join(os.path.dirname(getattr(config, 'common_dialog_main')), node.text))
-        importPathSplit = node.text.split('/')
-        importPath = os.path.join(os.path.dirname(getattr(config, 'common_dialog_main')), *importPathSplit)
-        if not os.path.exists(importPath):
-            logger.critical('Imported dialog file %s not found.', importPath)
-            exit(1)
-        importTree = LET.parse(importPath)
-        importText(importTree, config)
-        replace_config_variables(importTree)
-
-        if schema is not None:
-            validate(importTree, importPath[0], True)
-
-        importRoot = importTree.getroot()
-        childIndex = 1
-        for importChild in importRoot.findall('node'):
-            #logger.info('  Importing node: %s', importChild)
-            """
-            nodeWithTheSameCondition = getNodeWithTheSameCondition(root, importChild)
-            if nodeWithTheSameCondition is not None:
-                # SKIP NODES WITH SAME CONDITIONS
-                #logger.info('    Skipping node (same condition): %s', nodeWithTheSameCondition)
-                if importChild.find('context') is not None:
-                    #logger.info('      Context found for node: %s', importChild)
-                    if nodeWithTheSameCondition.find('context') is None:
-                        #logger.info('      Creating context for node: %s', nodeWithTheSameCondition)
-                        nodeWithTheSameConditionContext = LET.Element('context')
-                        nodeWithTheSameCondition.append(nodeWithTheSameConditionContext)
-                    # COPY ALL CONTEXT TO NODE WITH SAME CONDITION
-                    for context in importChild.find('context'):
-                        #logger.info('      Appending context: %s', context)
-                        nodeWithTheSameCondition.find('context').append(context)
-            else:
-                # INSERT NODE
-
-                #logger.info('    Appending node: %s', importChild)
-            """
-            root.insert(root.index(node) + childIndex, importChild)
-            childIndex += 1
+def preprocessImport(importTree, config):
+    """Replaces <importText> and <replace> elements of the imported dialog file, both are found in single pass over the tree.
 
-
-    if defaultNode is not None:
-        # MOVE DEFAULT_NODE TO THE END
-        root.remove(defaultNode)
-        root.append(defaultNode)
-
-    # PROCESS CHILD NODES
-    for node in root.findall('node'):
-        children = node.find('nodes')
-        if children is not None:
-            importNodes(children, config)
-
-def removeAllComments(tree):
-    comments = tree.xpath('//comment()')
-    for c in comments:
-        p = c.getparent()
-        p.remove(c)
-
-def removeOutOfScopeNodes(tree):
-    scopedNodes = tree.xpath('//*[@scope]')
-    for scopedNode in scopedNodes:
-        if not inScope(scopedNode):
-            p = scopedNode.getparent()
-            p.remove(scopedNode)
-
-def inScope(node):
-    if not hasattr(config, 'common_scope'):
-        return False # no scope specified -> remove all scoped nodes
-    scope = getattr(config, 'common_scope')
-    if scope == node.get('scope'):
-        return True
-    else:
-        return False
-
-# When duplicit node is found, exit with error
-def findAllNodeNames(tree):
-    names = []
-    nodesWithNames = tree.xpath('//node[@name]')
-    for nodeWithName in nodesWithNames:
-        if nodeWithName.get('name') in names:
-            logger.error("Duplicit node name found: '%s'", nodeWithName.get('name'))
-            exit(1)
-        else:
-            names.append(nodeWithName.get('name'))
-    return names
-
-# creates name tag for given node using its 'name' attribute, if there is one,
-# otherwise generates first unique combination of 'node_' + number.
-def generateNodeName(node, prefix):
-    global counter, names
-    name = node.find('name')
-    if name is None:
-        if 'name' in node.attrib:
-            nodeName = LET.Element('name')
-            nodeName.text = node.get('name')
-            node.append(nodeName)
+    Returns:
+        tuple: dict of used config variables and their values, list of paths of the imported text files
+    """
+    imports = []
+    replaces = []
+    for element in importTree.iter('importText', 'replace'):
+        if element.tag == 'importText':
+            imports.append(element)
         else:
-            while ("node_" + str(counter) in names):
-                counter += 1
-            nodeName = LET.Element('name')
-            nodeName.text = "node_" + str(counter)
-            node.append(nodeName)
-            counter += 1
-#        logger.error('Generate node name: %s', nodeName.text)
-    if prefix:
-        node.find('name').text = prefix + node.find('name').text
-    validateNodeName(node)
+            replaces.append(element)
+    # texts are imported first, they can not contain any elements
+    textPaths = importText(imports, config)
+    variables = replace_config_variables(replaces, config)
+    return variables, textPaths
+
+def getFileHash(filePath):
+    with open(filePath, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
 def validateNodeName(node):
-    global names
     name = node.find('name').text
     # check characters (Node names can only contain letters, numbers, hyphens and underscores)
     pattern = re.compile("[\\w-]+", re.UNICODE)
@@ -334,103 +263,6 @@ def isFalse(autogenerate, attributeName):
             logger.error('Unknown value of \'%s\' tag: %s.', attributeName, attributeValue)
             return False
 
-def generateNodes(root, parent, parentAbortSettings, parentAgainSettings, parentBackSettings, parentRepeatSettings, parentGenericSettings):
-    global parent_map
-    # GENERATE NAMES
-    for node in root.findall('node'):
-        generateNodeName(node, '')
-        logger.verbose('Found node: %s in: %s', node.find('name').text, parent.find('name').text if parent is not None else 'root')
-
-    # READ NODES PROPERTIES
-    abortSettings = None
-    againSettings = None
-    backSettings = None
-    repeatSettings = None
-    genericSettings = None
-
-    for autogenerate in root.findall('autogenerate'):
-        if autogenerate.get('type') == 'abort':
-            logger.verbose('Abort settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
-            abortSettings = autogenerate
-        if autogenerate.get('type') == 'again':
-            logger.verbose('Again settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
-            againSettings = autogenerate
-        if autogenerate.get('type') == 'back':
-            logger.verbose('Back settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
-            backSettings = autogenerate
-        if autogenerate.get('type') == 'repeat':
-            logger.verbose('Repeat settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
-            repeatSettings = autogenerate
-        if autogenerate.get('type') == 'generic':
-            logger.verbose('Generic settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
-            genericSettings = autogenerate
-
-    abortSettings = mergeSettings(abortSettings, parentAbortSettings)
-    # TODO discuss how those funcitonality should work and if it is possible to implement it just in conversation
-    #againSettings = mergeSettings(againSettings, parentAgainSettings)
-    #backSettings = mergeSettings(backSettings, parentBackSettings)
-    repeatSettings = mergeSettings(repeatSettings, parentRepeatSettings)
-    genericSettings = mergeSettings(genericSettings, parentGenericSettings)
-
-    # generate if settings exist and are not switched off
-    abort = True if (abortSettings is not None and not isFalse(abortSettings, 'on')) else False
-    again = True if (againSettings is not None and not isFalse(againSettings, 'on')) else False
-    back = True if (backSettings is not None and not isFalse(backSettings, 'on')) else False
-    repeat = True if (repeatSettings is not None and not isFalse(repeatSettings, 'on')) else False
-    generic = True if (genericSettings is not None and not isFalse(genericSettings, 'on')) else False
-
-    indexOfInsertion = len(root)
-    for index in range(0, len(root)):
-        node = root[index]
-        if node.tag == 'node':
-            condition = node.find('condition')
-            # TODO check if we generate condition 'anything_else' for nodes without condition
-            # we want to generate CONTROL nodes before repeat section
-            if condition is None or \
-               not condition.text or \
-               condition.text == 'anything_else' or \
-               condition.text.startswith(('anything_else', '$tries')):
-                indexOfInsertion = index
-                break
-
-    # GENERATE NEW NODES
-    if abort:
-        # ABORT NODE RETURNING TO THE MAIN MENU
-        root.insert(indexOfInsertion, generateAbortNode(root, parent, abortSettings))
-        indexOfInsertion = indexOfInsertion + 1
-    if again:
-        # AGAIN NODE REPEAT CURRENT STEP
-        root.insert(indexOfInsertion, generateAgainNode(root, parent, againSettings))
-        indexOfInsertion = indexOfInsertion + 1
-    if back:
-        # BACK NODE RETURNING TO PREVIOUS NODE
-        root.insert(indexOfInsertion, generateBackNode(root, parent, backSettings))
-        indexOfInsertion = indexOfInsertion + 1
-    if generic:
-        # GENERIC NODE
-        for genericChild in genericSettings:
-            genericChildCopy = copy.deepcopy(genericChild)
-            generateNodeName(genericChildCopy, 'GENERIC_')
-            root.insert(indexOfInsertion, genericChildCopy)
-            indexOfInsertion = indexOfInsertion + 1
-    if repeat:
-        generateRepeatNodes(root, parent, repeatSettings)
-
-    for node in root.findall('node'):
-        # PROCESS CHILD NODES
-        children = node.find('nodes')
-        if children is not None:
-            # propagate settings only if propagation not switched off
-            generateNodes(
-                children,
-                node,
-                abortSettings if abortSettings is not None and not isFalse(abortSettings, 'propagate') else None,
-                againSettings if againSettings is not None and not isFalse(againSettings, 'propagate') else None,
-                backSettings if backSettings is not None and not isFalse(backSettings, 'propagate') else None,
-                repeatSettings if repeatSettings is not None and not isFalse(repeatSettings, 'propagate') else None,
-                genericSettings if genericSettings is not None and not isFalse(genericSettings, 'propagate') else None
-            )
-
 def mergeSettings(childSettings, parentSettings):
     if childSettings is None:
         logger.verbose('Returning parent settings')
@@ -449,300 +281,701 @@ def mergeSettings(childSettings, parentSettings):
     logger.verbose('Returning merged settings')
     return childSettings
 
-def generateAbortNode(root, parent, settings):
-    # node
-    abortNode = LET.Element('node')
-    generateNodeName(abortNode, 'ABORT_')
-    logger.verbose('Generate abort node for parent: %s named: %s', parent.find('name').text if parent is not None else 'root', abortNode.find('name').text)
-    # condition
-    abortNodeCondition = LET.Element('condition')
-    abortNodeCondition.text = DEFAULT_CONDITION_ABORT + (' and intent.confidence >' + settings.get('confidence') if 'confidence' in settings.attrib else '')
-
-    abortNode.append(abortNodeCondition)
-    # output
-    abortNodeOutput = LET.Element('output')
-    if parent is not None:
-        abortNodeOutput.text = settings.find('message').text if settings.find('message') is not None else DEFAULT_ABORT_MESSAGE.text
-    else:
-        abortNodeOutput.text = settings.find('message_cannot').text if settings.find('message_cannot') is not None else DEFAULT_ABORT_MESSAGE_CANNOT.text
-    abortNode.append(abortNodeOutput)
-    # goto
-    if settings.find('goto') is not None:
-        abortNode.append(copy.deepcopy(settings.find('goto')))
-    return abortNode
-
-def generateAgainNode(root, parent, settings):
-    # node
-    againNode = LET.Element('node')
-    generateNodeName(againNode ,'AGAIN_')
-    logger.verbose('Generate again node for parent: %s named: %s', parent.find('name').text if parent is not None else 'root', againNode.find('name').text)
-    # condition
-    againNodeCondition = LET.Element('condition')
-    againNodeCondition.text = DEFAULT_CONDITION_AGAIN + (' and intent.confidence >' + settings.get('confidence') if 'confidence' in settings.attrib else '')
-    againNode.append(againNodeCondition)
-    # output
-    againNodeOutput = LET.Element('output')
-    againNodeOutput.text = '$againMessage'
-    againNode.append(againNodeOutput)
-    # goto
-    againNodeGoto = LET.Element('goto')
-    againNodeGotoTarget = LET.Element('target')
-    againNodeGotoTarget.text = root.find('node').find('name').text
-    againNodeGoto.append(againNodeGotoTarget)
-    againNode.append(againNodeGoto)
-    return againNode
-
-def generateBackNode(root, parent, settings):
-    # node
-    backNode = LET.Element('node')
-    generateNodeName(backNode, 'BACK_')
-    logger.verbose('Generate back node for parent: %s named: %s', parent.find('name').text if parent is not None else 'root', backNode.find('name').text)
-    # condition
-    backNodeCondition = LET.Element('condition')
-    backNodeCondition.text = DEFAULT_CONDITION_BACK + (' and intent.confidence >' + settings.get('confidence') if 'confidence' in settings.attrib else '')
-    backNode.append(backNodeCondition)
-    if parent is not None and parent in parent_map and parent_map[parent] in parent_map:
-        # output
-        backNodeOutput = LET.Element('output')
-        backNodeOutput.text = settings.find('message').text if settings.find('message') is not None else DEFAULT_BACK_MESSAGE.text
-        backNode.append(backNodeOutput)
-        # goto
-        backNodeGoto = LET.Element('goto', {'selector':'body'})
-        backNodeTarget = LET.Element('target')
-        backNodeTarget.text = parent_map[parent_map[parent]].find('name').text
-        backNodeGoto.append(backNodeTarget)
-        backNode.append(backNodeGoto)
-    else:
+class DialogCompiler(object):
+    """Compiles dialog in WAW xml format to the list of WA dialog nodes.
+
+    All the state of the compilation is kept in the instance, so several dialogs can be compiled in one process.
+    The schema is loaded just once when the compiler is created and it is reused by all the compilations.
+    Single instance can not be used by more threads at once, create one compiler for each thread instead.
+    """
+
+    def __init__(self, schemaFile=None, validationWorkers=None):
+        """
+        Args:
+            schemaFile (string): path of the schema file, dialog is not validated if it is not specified
+            validationWorkers (int): number of processes validating dialog files (number of CPUs is the default)
+        """
+        self.schemaFile = schemaFile
+        self.schema = LET.XMLSchema(LET.parse(schemaFile)) if schemaFile else None
+        self.schemaHash = getFileHash(schemaFile) if schemaFile else None
+        self.validationWorkers = validationWorkers or os.cpu_count()
+        self.config = None
+        self.nameSuffixes = {}
+        self.names = set()
+        self.parent_map = {}
+
+    def compile(self, tree, config):
+        """Converts parsed dialog to the list of WA dialog nodes.
+
+        Args:
+            tree (_ElementTree): parsed root dialog file, it is modified by the compilation
+            config (Cfg): configuration, 'common_dialog_main' parameter is used to locate imported files
+
+        Returns:
+            list: WA dialog nodes
+        """
+        return list(self.compileIter(tree, config))
+
+    def compileIter(self, tree, config):
+        """Same as compile, but the dialog nodes are yielded one by one as they are generated."""
+        self.config = config
+        self.nameSuffixes = {}
+
+        if self.schema is not None:
+            self.validateAll(tree)
+
+        # process dialog tree
+        root = tree.getroot()
+        self.importNodes(root)
+
+        # remove comments and out of scope nodes, find all node names and parents
+        self.preprocessNodes(root)
+
+        # default settings are merged with the settings from the dialog, so each compilation needs its own copy
+        self.generateNodes(root, None, copy.deepcopy(DEFAULT_ABORT), copy.deepcopy(DEFAULT_AGAIN), copy.deepcopy(DEFAULT_BACK),
+                           copy.deepcopy(DEFAULT_REPEAT), copy.deepcopy(DEFAULT_GENERIC))
+
+        # convert XML tree to JSON structure
+        return self.printNodes(root, None)
+
+    def getSchemaErrors(self, tree, filePath):
+        if self.schema.validate(tree):
+            return []
+        return ['%s:%d: %s' % (filePath, error.line, error.message) for error in self.schema.error_log]
+
+    def validateImportedFile(self, filePath):
+        """Validates imported dialog file against the schema, the file is preprocessed before the validation in the same way as in importNodes.
+
+        Returns:
+            tuple: list of validation errors and list of paths of the files imported by the validated file
+        """
+        if not os.path.exists(filePath):
+            return ['Imported dialog file %s not found.' % filePath], []
+        useCache = hasattr(self.config, 'common_import_cache')
+        if useCache:
+            tree = self.loadCachedImport(filePath)
+            if tree is not None:
+                return [], findImportedFiles(tree.getroot(), True, self.config)
+        try:
+            tree = LET.parse(filePath)
+            variables, textPaths = preprocessImport(tree, self.config)
+        except (IOError, LET.XMLSyntaxError) as e:
+            return [str(e)], []
+        errors = self.getSchemaErrors(tree, filePath)
+        if errors:
+            return errors, []
+        if useCache:
+            self.saveCachedImport(filePath, tree, variables, textPaths)
+        return [], findImportedFiles(tree.getroot(), True, self.config)
+
+    def validateAll(self, tree):
+        """Validates the root dialog, discovers all the imported dialog files and validates them in a pool of processes.
+        All the errors are reported at once, script exits if any of the files is invalid."""
+        dialogTreeFile = getattr(self.config, 'common_dialog_main')
+        filePaths = [dialogTreeFile]
+        errorsByFile = {dialogTreeFile: self.getSchemaErrors(tree, dialogTreeFile)}
+        executor = None
+        if self.validationWorkers > 1:
+            executor = concurrent.futures.ProcessPoolExecutor(self.validationWorkers, initializer=initValidationWorker,
+                initargs=(self.config, self.schemaFile, logging.getLevelName(logging.getLogger().level), getattr(logging.Logger, 'isVerbose', False)))
+        try:
+            # each file is validated just once, import graph is processed level by level
+            filesToValidate = findImportedFiles(tree.getroot(), False, self.config)
+            while filesToValidate:
+                filePaths.extend(filesToValidate)
+                if executor:
+                    results = list(executor.map(validateImportedFileInWorker, filesToValidate))
+                else:
+                    results = [self.validateImportedFile(filePath) for filePath in filesToValidate]
+                filesToValidate = []
+                for filePath, (errors, importedPaths) in zip(filePaths[-len(results):], results):
+                    errorsByFile[filePath] = errors
+                    for importedPath in importedPaths:
+                        if importedPath not in errorsByFile and importedPath not in filesToValidate:
+                            filesToValidate.append(importedPath)
+        finally:
+            if executor:
+                executor.shutdown()
+
+        invalidFilePaths = [filePath for filePath in filePaths if errorsByFile[filePath]]
+        for filePath in invalidFilePaths:
+            logger.critical("Invalid %s XML: %s", "root" if filePath == dialogTreeFile else "imported", filePath)
+            for error in errorsByFile[filePath]:
+                logger.critical(error)
+        if invalidFilePaths:
+            logger.critical("%d of %d dialog files are invalid", len(invalidFilePaths), len(filePaths))
+            exit(1)
+        logger.verbose("All %d dialog files are valid", len(filePaths))
+
+    def getImportCachePath(self, importPath):
+        """Returns path of the cache entry of the imported dialog file, the entry is keyed by hash of the file and hash of the schema.
+        Config variables and text files used by the import are stored in the entry and checked when the entry is loaded."""
+        key = hashlib.sha256((getFileHash(importPath) + ':' + (self.schemaHash or '')).encode('utf-8')).hexdigest()
+        return os.path.join(getattr(self.config, 'common_import_cache'), key + '.json')
+
+    def loadCachedImport(self, importPath):
+        """Returns preprocessed and validated tree of the imported dialog file from the cache or None if it is not cached
+        or if config variables or imported text files it depends on were changed."""
+        cachePath = self.getImportCachePath(importPath)
+        if not os.path.exists(cachePath):
+            return None
+        with io.open(cachePath, 'r', encoding='utf-8') as cacheFile:
+            cacheEntry = json.load(cacheFile)
+        for variableName, value in cacheEntry['variables'].items():
+            if (getattr(self.config, variableName) if hasattr(self.config, variableName) else "") != value:
+                logger.verbose('Cached import %s is outdated, config variable %s has changed', importPath, variableName)
+                return None
+        for textPath, textHash in cacheEntry['texts'].items():
+            if not os.path.exists(textPath) or getFileHash(textPath) != textHash:
+                logger.verbose('Cached import %s is outdated, imported text %s has changed', importPath, textPath)
+                return None
+        logger.verbose('Using cached import %s', importPath)
+        return LET.ElementTree(LET.fromstring(cacheEntry['dialog'].encode('utf-8')))
+
+    def saveCachedImport(self, importPath, importTree, variables, textPaths):
+        """Stores preprocessed and validated tree of the imported dialog file to the cache."""
+        if 'internal_build_date_time' in variables:
+            # build time differs in every run
+            return
+        cacheDir = getattr(self.config, 'common_import_cache')
+        if not os.path.exists(cacheDir):
+            os.makedirs(cacheDir)
+        cacheEntry = {
+            'variables': variables,
+            'texts': {textPath: getFileHash(textPath) for textPath in textPaths},
+            'dialog': LET.tostring(importTree, encoding='unicode')
+        }
+        cachePath = self.getImportCachePath(importPath)
+        # write to temporary file first, so parallel builds never read partially written entry
+        with io.open(cachePath + '.' + str(os.getpid()), 'w', encoding='utf-8') as cacheFile:
+            json.dump(cacheEntry, cacheFile, ensure_ascii=False)
+        os.replace(cachePath + '.' + str(os.getpid()), cachePath)
+
+    def loadImport(self, importPath):
+        """Returns parsed and preprocessed tree of the imported dialog file, uses cache if it is specified.
+        Imported files are validated in advance by validateAll."""
+        useCache = hasattr(self.config, 'common_import_cache')
+        if useCache:
+            importTree = self.loadCachedImport(importPath)
+            if importTree is not None:
+                return importTree
+
+        importTree = LET.parse(importPath)
+        variables, textPaths = preprocessImport(importTree, self.config)
+
+        if useCache:
+            self.saveCachedImport(importPath, importTree, variables, textPaths)
+        return importTree
+
+    def importNodes(self, root):
+        # IMPORT AND APPEND NODES
+        defaultNode = None
+        if len(root) > 0 and (root[len(root)-1].find('condition') is None or (root[len(root)-1].find('condition') is not None and root[len(root)-1].find('condition').text == 'anything_else')):
+            # IF LAST NODE DOES NOT HAVE CONDITION OR HAS CONDITION SET TO 'anything_else'
+            defaultNode = root[len(root)-1]
+
+        for node in root.findall('import'):
+            logger.verbose('Importing %s', os.path.join(os.path.dirname(getattr(self.config, 'common_dialog_main')), node.text))
+            importPath = getImportPath(node, self.config)
+            if not os.path.exists(importPath):
+                logger.critical('Imported dialog file %s not found.', importPath)
+                exit(1)
+            importTree = self.loadImport(importPath)
+
+            importRoot = importTree.getroot()
+            childIndex = 1
+            for importChild in importRoot.findall('node'):
+                #logger.info('  Importing node: %s', importChild)
+                """
+                nodeWithTheSameCondition = getNodeWithTheSameCondition(root, importChild)
+                if nodeWithTheSameCondition is not None:
+                    # SKIP NODES WITH SAME CONDITIONS
+                    #logger.info('    Skipping node (same condition): %s', nodeWithTheSameCondition)
+                    if importChild.find('context') is not None:
+                        #logger.info('      Context found for node: %s', importChild)
+                        if nodeWithTheSameCondition.find('context') is None:
+                            #logger.info('      Creating context for node: %s', nodeWithTheSameCondition)
+                            nodeWithTheSameConditionContext = LET.Element('context')
+                            nodeWithTheSameCondition.append(nodeWithTheSameConditionContext)
+                        # COPY ALL CONTEXT TO NODE WITH SAME CONDITION
+                        for context in importChild.find('context'):
+                            #logger.info('      Appending context: %s', context)
+                            nodeWithTheSameCondition.find('context').append(context)
+                else:
+                    # INSERT NODE
+
+                    #logger.info('    Appending node: %s', importChild)
+                """
+                root.insert(root.index(node) + childIndex, importChild)
+                childIndex += 1
+
+
+        if defaultNode is not None:
+            # MOVE DEFAULT_NODE TO THE END
+            root.remove(defaultNode)
+            root.append(defaultNode)
+
+        # PROCESS CHILD NODES
+        for node in root.findall('node'):
+            children = node.find('nodes')
+            if children is not None:
+                self.importNodes(children)
+
+    def preprocessNodes(self, root):
+        """Prepares the dialog tree for the generation in single pass over the tree:
+        removes all comments and nodes which are out of specified scope (including their subtrees),
+        collects names of the nodes and builds the map of parents.
+        When duplicit node name is found, exit with error.
+        """
+        self.names = set()
+        self.parent_map = {}
+        # the tree can not be modified while it is iterated, removal is postponed after the pass
+        removedElements = []
+        removedSubtrees = set()
+        for element in root.iter():
+            parent = element.getparent()
+            if parent in removedSubtrees:
+                removedSubtrees.add(element)
+                continue
+            if element.tag is LET.Comment:
+                removedElements.append(element)
+                continue
+            if isinstance(element.tag, str):
+                if element.get('scope') is not None and not self.inScope(element):
+                    removedElements.append(element)
+                    removedSubtrees.add(element)
+                    continue
+                if element.tag == 'node' and element.get('name') is not None:
+                    if element.get('name') in self.names:
+                        logger.error("Duplicit node name found: '%s'", element.get('name'))
+                        exit(1)
+                    self.names.add(element.get('name'))
+            if parent is not None:
+                self.parent_map[element] = parent
+
+        for element in removedElements:
+            element.getparent().remove(element)
+
+    def inScope(self, node):
+        if not hasattr(self.config, 'common_scope'):
+            return False # no scope specified -> remove all scoped nodes
+        scope = getattr(self.config, 'common_scope')
+        if scope == node.get('scope'):
+            return True
+        else:
+            return False
+
+    # creates name tag for given node using its 'name' attribute, if there is one,
+    # otherwise generates first unique combination of 'node_' + number.
+    def generateNodeName(self, node, prefix):
+        name = node.find('name')
+        if name is None:
+            if 'name' in node.attrib:
+                nodeName = LET.Element('name')
+                nodeName.text = node.get('name')
+                node.append(nodeName)
+            else:
+                nodeName = LET.Element('name')
+                nodeName.text = "node_" + str(getFreeNameSuffix("node_", self.names, self.nameSuffixes))
+                node.append(nodeName)
+                self.names.add(nodeName.text)
+    #        logger.error('Generate node name: %s', nodeName.text)
+        if prefix:
+            node.find('name').text = prefix + node.find('name').text
+        validateNodeName(node)
+
+    def generateNodes(self, root, parent, parentAbortSettings, parentAgainSettings, parentBackSettings, parentRepeatSettings, parentGenericSettings):
+        # GENERATE NAMES
+        for node in root.findall('node'):
+            self.generateNodeName(node, '')
+            logger.verbose('Found node: %s in: %s', node.find('name').text, parent.find('name').text if parent is not None else 'root')
+
+        # READ NODES PROPERTIES
+        abortSettings = None
+        againSettings = None
+        backSettings = None
+        repeatSettings = None
+        genericSettings = None
+
+        for autogenerate in root.findall('autogenerate'):
+            if autogenerate.get('type') == 'abort':
+                logger.verbose('Abort settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
+                abortSettings = autogenerate
+            if autogenerate.get('type') == 'again':
+                logger.verbose('Again settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
+                againSettings = autogenerate
+            if autogenerate.get('type') == 'back':
+                logger.verbose('Back settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
+                backSettings = autogenerate
+            if autogenerate.get('type') == 'repeat':
+                logger.verbose('Repeat settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
+                repeatSettings = autogenerate
+            if autogenerate.get('type') == 'generic':
+                logger.verbose('Generic settings found in parent: %s', parent.find('name').text if parent is not None else 'root')
+                genericSettings = autogenerate
+
+        abortSettings = mergeSettings(abortSettings, parentAbortSettings)
+        # TODO discuss how those funcitonality should work and if it is possible to implement it just in conversation
+        #againSettings = mergeSettings(againSettings, parentAgainSettings)
+        #backSettings = mergeSettings(backSettings, parentBackSettings)
+        repeatSettings = mergeSettings(repeatSettings, parentRepeatSettings)
+        genericSettings = mergeSettings(genericSettings, parentGenericSettings)
+
+        # generate if settings exist and are not switched off
+        abort = True if (abortSettings is not None and not isFalse(abortSettings, 'on')) else False
+        again = True if (againSettings is not None and not isFalse(againSettings, 'on')) else False
+        back = True if (backSettings is not None and not isFalse(backSettings, 'on')) else False
+        repeat = True if (repeatSettings is not None and not isFalse(repeatSettings, 'on')) else False
+        generic = True if (genericSettings is not None and not isFalse(genericSettings, 'on')) else False
+
+        indexOfInsertion = len(root)
+        for index in range(0, len(root)):
+            node = root[index]
+            if node.tag == 'node':
+                condition = node.find('condition')
+                # TODO check if we generate condition 'anything_else' for nodes without condition
+                # we want to generate CONTROL nodes before repeat section
+                if condition is None or \
+                   not condition.text or \
+                   condition.text == 'anything_else' or \
+                   condition.text.startswith(('anything_else', '$tries')):
+                    indexOfInsertion = index
+                    break
+
+        # GENERATE NEW NODES
+        if abort:
+            # ABORT NODE RETURNING TO THE MAIN MENU
+            root.insert(indexOfInsertion, self.generateAbortNode(root, parent, abortSettings))
+            indexOfInsertion = indexOfInsertion + 1
+        if again:
+            # AGAIN NODE REPEAT CURRENT STEP
+            root.insert(indexOfInsertion, self.generateAgainNode(root, parent, againSettings))
+            indexOfInsertion = indexOfInsertion + 1
+        if back:
+            # BACK NODE RETURNING TO PREVIOUS NODE
+            root.insert(indexOfInsertion, self.generateBackNode(root, parent, backSettings))
+            indexOfInsertion = indexOfInsertion + 1
+        if generic:
+            # GENERIC NODE
+            for genericChild in genericSettings:
+                genericChildCopy = copy.deepcopy(genericChild)
+                self.generateNodeName(genericChildCopy, 'GENERIC_')
+                root.insert(indexOfInsertion, genericChildCopy)
+                indexOfInsertion = indexOfInsertion + 1
+        if repeat:
+            self.generateRepeatNodes(root, parent, repeatSettings)
+
+        for node in root.findall('node'):
+            # PROCESS CHILD NODES
+            children = node.find('nodes')
+            if children is not None:
+                # propagate settings only if propagation not switched off
+                self.generateNodes(
+                    children,
+                    node,
+                    abortSettings if abortSettings is not None and not isFalse(abortSettings, 'propagate') else None,
+                    againSettings if againSettings is not None and not isFalse(againSettings, 'propagate') else None,
+                    backSettings if backSettings is not None and not isFalse(backSettings, 'propagate') else None,
+                    repeatSettings if repeatSettings is not None and not isFalse(repeatSettings, 'propagate') else None,
+                    genericSettings if genericSettings is not None and not isFalse(genericSettings, 'propagate') else None
+                )
+
+    def generateAbortNode(self, root, parent, settings):
+        # node
+        abortNode = LET.Element('node')
+        self.generateNodeName(abortNode, 'ABORT_')
+        logger.verbose('Generate abort node for parent: %s named: %s', parent.find('name').text if parent is not None else 'root', abortNode.find('name').text)
+        # condition
+        abortNodeCondition = LET.Element('condition')
+        abortNodeCondition.text = DEFAULT_CONDITION_ABORT + (' and intent.confidence >' + settings.get('confidence') if 'confidence' in settings.attrib else '')
+
+        abortNode.append(abortNodeCondition)
         # output
-        backNodeOutput = LET.Element('output')
+        abortNodeOutput = LET.Element('output')
         if parent is not None:
-            backNodeOutput.text = settings.find('message_to_main').text if settings.find('message_to_main') is not None else DEFAULT_BACK_MESSAGE_TO_MAIN.text
+            abortNodeOutput.text = settings.find('message').text if settings.find('message') is not None else DEFAULT_ABORT_MESSAGE.text
         else:
-            backNodeOutput.text = settings.find('message_cannot').text if settings.find('message_cannot') is not None else DEFAULT_BACK_MESSAGE_CANNOT.text
-        backNode.append(backNodeOutput)
-    return backNode
-
-def generateRepeatNodes(root, parent, settings):
-    if parent is None: return
-    logger.verbose('Generate repeat nodes for parent: %s START', parent.find('name').text if parent is not None else 'root')
-    # ADD VARIABLE 'attempts_*' TO PARENT'S CONTEXT AND SET IT TO ZERO (FOR SURE)
-    repeatVarName = 'attempts_' + parent.find('name').text.replace('-', '') # remove hyphens (they cause problems in mathematical expressions where they act as minus signs)
-    # context
-    context = parent.find('context')
-    if context is None:
-        context = LET.Element('context')
-        parent.append(context)
-    contextRepeat = LET.Element(repeatVarName, {'type':'number'})
-    contextRepeat.text = '0'
-    context.append(contextRepeat)
-    # goto for repetation
-    if root.find('node') is None:
-      logger.error('Repeat node without options to input something!!!')
-    repeatNodeGoto = LET.Element('goto')
-    repeatNodeGotoTarget = LET.Element('target')
-    repeatNodeGotoTarget.text = root.find('node').find('name').text
-    repeatNodeGoto.append(repeatNodeGotoTarget)
-    # max attempts
-    maxAttempts = int(settings.find('attempts').text) if settings is not None and settings.find('attempts') is not None else DEFAULT_REPEAT_ATTEMPTS
-    logger.verbose('maxAttempts: %s', maxAttempts)
-    # output sentences
-    outputs = settings.find('outputs').findall('output') if settings.find('outputs') is not None and len(settings.find('outputs').findall('output')) > 0 else DEFAULT_REPEAT_MESS_TEMPLATES['default']
-    logger.verbose('nOutputs: %s', len(outputs))
-    # LAST NODE (RETURNING TO THE MAIN MENU)
-    generateRepeatNode(parent, root, outputs[-1], maxAttempts-1, repeatVarName, 0, settings.find('goto'))
-    logger.verbose('LAST NODE')
-    # MIDDLE NODE
-    for i in range(min(maxAttempts-1, len(outputs)-1) -1, 0, -1):
-        generateRepeatNode(parent, root, outputs[i], i, repeatVarName, '<?$' + repeatVarName +' + 1?>', repeatNodeGoto)
-        logger.verbose('MIDDLE NODE number: %d', i)
-    # FIRST (DEFAULT) NODE
-    generateRepeatNode(parent, root, outputs[0], 0, repeatVarName, '<? $' + repeatVarName + ' == null ? 0 : $' + repeatVarName + ' + 1 ?>', repeatNodeGoto)
-    logger.verbose('FIRST NODE')
-    logger.verbose('Generate repeat nodes for parent: %s ', parent.find('name').text if parent is not None else 'root')
-
-def generateRepeatNode(parent, root, output, attempts, varName, varValue, goto):
-    # node
-    repeatNode = LET.Element('node')
-    generateNodeName(repeatNode, 'REPEAT_')
-    logger.verbose('Generate repeat node for parent: %s named: %s START', parent.find('name').text if parent is not None else 'root', repeatNode.find('name').text)
-    # condition
-    repeatNodeCondition = LET.Element('condition')
-    repeatNodeCondition.text = ('$' + varName + ' == null or ' if attempts == 0 else '') + '$' + varName + ' >= ' + str(attempts)
-    repeatNode.append(repeatNodeCondition)
-    # context
-    repeatNodeContext = LET.Element('context')
-    repeatVariable = LET.Element(varName)
-    repeatVariable.text = str(varValue)
-    if isinstance(varValue, int):
-        repeatVariable.set('type', 'number')
-    repeatNodeContext.append(repeatVariable)
-    repeatNode.append(repeatNodeContext)
-    # output
-    repeatNode.append(copy.deepcopy(output))
-    # goto
-    if goto is not None:
-        repeatNode.append(copy.deepcopy(goto))
-    root.append(repeatNode)
-    logger.verbose('Generate repeat node for parent: %s named: %s END', parent.find('name').text if parent is not None else 'root', repeatNode.find('name').text)
-
-def printNodes(root, parent, dialogJSON):
-    """Converts parsed XML to JSON structure
-
-    Args:
-        root (_Element): root of the parsed XML tree - (typically there is element "nodes" )
-        parent (_Element): initially None, then parent
-        dialogJSON (string): generated JSON
-    """
-    global firstNode
-    # PROCESS SIBLINGS
-    previousSibling = None
-    for nodeXML in root: # for each node in nodes
-        if not (nodeXML.tag == 'node' or nodeXML.tag == 'slot' or nodeXML.tag == 'handler' or nodeXML.tag == 'response'):
-            continue
-        # fix name
-        if nodeXML.find('name') is None:
-            generateNodeName(nodeXML, '')
+            abortNodeOutput.text = settings.find('message_cannot').text if settings.find('message_cannot') is not None else DEFAULT_ABORT_MESSAGE_CANNOT.text
+        abortNode.append(abortNodeOutput)
+        # goto
+        if settings.find('goto') is not None:
+            abortNode.append(copy.deepcopy(settings.find('goto')))
+        return abortNode
+
+    def generateAgainNode(self, root, parent, settings):
+        # node
+        againNode = LET.Element('node')
+        self.generateNodeName(againNode ,'AGAIN_')
+        logger.verbose('Generate again node for parent: %s named: %s', parent.find('name').text if parent is not None else 'root', againNode.find('name').text)
+        # condition
+        againNodeCondition = LET.Element('condition')
+        againNodeCondition.text = DEFAULT_CONDITION_AGAIN + (' and intent.confidence >' + settings.get('confidence') if 'confidence' in settings.attrib else '')
+        againNode.append(againNodeCondition)
+        # output
+        againNodeOutput = LET.Element('output')
+        againNodeOutput.text = '$againMessage'
+        againNode.append(againNodeOutput)
+        # goto
+        againNodeGoto = LET.Element('goto')
+        againNodeGotoTarget = LET.Element('target')
+        againNodeGotoTarget.text = root.find('node').find('name').text
+        againNodeGoto.append(againNodeGotoTarget)
+        againNode.append(againNodeGoto)
+        return againNode
+
+    def generateBackNode(self, root, parent, settings):
+        # node
+        backNode = LET.Element('node')
+        self.generateNodeName(backNode, 'BACK_')
+        logger.verbose('Generate back node for parent: %s named: %s', parent.find('name').text if parent is not None else 'root', backNode.find('name').text)
+        # condition
+        backNodeCondition = LET.Element('condition')
+        backNodeCondition.text = DEFAULT_CONDITION_BACK + (' and intent.confidence >' + settings.get('confidence') if 'confidence' in settings.attrib else '')
+        backNode.append(backNodeCondition)
+        if parent is not None and parent in self.parent_map and self.parent_map[parent] in self.parent_map:
+            # output
+            backNodeOutput = LET.Element('output')
+            backNodeOutput.text = settings.find('message').text if settings.find('message') is not None else DEFAULT_BACK_MESSAGE.text
+            backNode.append(backNodeOutput)
+            # goto
+            backNodeGoto = LET.Element('goto', {'selector':'body'})
+            backNodeTarget = LET.Element('target')
+            backNodeTarget.text = self.parent_map[self.parent_map[parent]].find('name').text
+            backNodeGoto.append(backNodeTarget)
+            backNode.append(backNodeGoto)
         else:
-            validateNodeName(nodeXML)
-        nodeJSON = {'dialog_node':nodeXML.find('name').text}
-        dialogJSON.append(nodeJSON)
-        logger.verbose("===============================")
-        logger.verbose("name %s", nodeXML.find('name').text)
-
-        children = []
-
-        # TITLE
-        if nodeXML.get('title') is not None:
-            nodeJSON['title'] = nodeXML.get('title')
-        # TYPE
-        if nodeXML.find('type') is not None:
-            nodeJSON['type'] = nodeXML.find('type').text
-        elif nodeXML.find('slots') is not None:
-            nodeJSON['type'] = "frame"
-        elif nodeXML.tag == 'slot':
-            nodeJSON['type'] = "slot"
-        # disabled
-        if nodeXML.find('disabled') is not None:
-            if nodeXML.find('disabled').text in ["True", "true"]:
-                nodeJSON['disabled'] = True
-            elif nodeXML.find('disabled').text in ["False", "false"]:
-                nodeJSON['disabled'] = False
+            # output
+            backNodeOutput = LET.Element('output')
+            if parent is not None:
+                backNodeOutput.text = settings.find('message_to_main').text if settings.find('message_to_main') is not None else DEFAULT_BACK_MESSAGE_TO_MAIN.text
             else:
-                nodeJSON['disabled'] = nodeXML.find('disabled').text
-                logger.error("Unable to parse boolean " + nodeXML.find('disabled').text)
-        # EVENTNAME
-        if nodeXML.get('eventName') is not None:
-            nodeJSON['event_name'] = nodeXML.get('eventName')
-            nodeJSON['type'] = 'event_handler'
-        if nodeXML.find('event_name') is not None:
-            nodeJSON['event_name'] = nodeXML.find('event_name').text
-        # VARIABLE
-        if nodeXML.get('variable') is not None:
-            nodeJSON['variable'] = nodeXML.get('variable')
-            nodeJSON['type'] = 'slot'
-        if nodeXML.tag == 'response':
-            nodeJSON['type'] = 'response_condition'
-        # CONDITION
-        if nodeXML.find('condition') is not None:
-            if nodeXML.find('condition').text is not None:
-                nodeJSON['conditions'] = nodeXML.find('condition').text
+                backNodeOutput.text = settings.find('message_cannot').text if settings.find('message_cannot') is not None else DEFAULT_BACK_MESSAGE_CANNOT.text
+            backNode.append(backNodeOutput)
+        return backNode
+
+    def generateRepeatNodes(self, root, parent, settings):
+        if parent is None: return
+        logger.verbose('Generate repeat nodes for parent: %s START', parent.find('name').text if parent is not None else 'root')
+        # ADD VARIABLE 'attempts_*' TO PARENT'S CONTEXT AND SET IT TO ZERO (FOR SURE)
+        repeatVarName = 'attempts_' + parent.find('name').text.replace('-', '') # remove hyphens (they cause problems in mathematical expressions where they act as minus signs)
+        # context
+        context = parent.find('context')
+        if context is None:
+            context = LET.Element('context')
+            parent.append(context)
+        contextRepeat = LET.Element(repeatVarName, {'type':'number'})
+        contextRepeat.text = '0'
+        context.append(contextRepeat)
+        # goto for repetation
+        if root.find('node') is None:
+          logger.error('Repeat node without options to input something!!!')
+        repeatNodeGoto = LET.Element('goto')
+        repeatNodeGotoTarget = LET.Element('target')
+        repeatNodeGotoTarget.text = root.find('node').find('name').text
+        repeatNodeGoto.append(repeatNodeGotoTarget)
+        # max attempts
+        maxAttempts = int(settings.find('attempts').text) if settings is not None and settings.find('attempts') is not None else DEFAULT_REPEAT_ATTEMPTS
+        logger.verbose('maxAttempts: %s', maxAttempts)
+        # output sentences
+        outputs = settings.find('outputs').findall('output') if settings.find('outputs') is not None and len(settings.find('outputs').findall('output')) > 0 else DEFAULT_REPEAT_MESS_TEMPLATES['default']
+        logger.verbose('nOutputs: %s', len(outputs))
+        # LAST NODE (RETURNING TO THE MAIN MENU)
+        self.generateRepeatNode(parent, root, outputs[-1], maxAttempts-1, repeatVarName, 0, settings.find('goto'))
+        logger.verbose('LAST NODE')
+        # MIDDLE NODE
+        for i in range(min(maxAttempts-1, len(outputs)-1) -1, 0, -1):
+            self.generateRepeatNode(parent, root, outputs[i], i, repeatVarName, '<?$' + repeatVarName +' + 1?>', repeatNodeGoto)
+            logger.verbose('MIDDLE NODE number: %d', i)
+        # FIRST (DEFAULT) NODE
+        self.generateRepeatNode(parent, root, outputs[0], 0, repeatVarName, '<? $' + repeatVarName + ' == null ? 0 : $' + repeatVarName + ' + 1 ?>', repeatNodeGoto)
+        logger.verbose('FIRST NODE')
+        logger.verbose('Generate repeat nodes for parent: %s ', parent.find('name').text if parent is not None else 'root')
+
+    def generateRepeatNode(self, parent, root, output, attempts, varName, varValue, goto):
+        # node
+        repeatNode = LET.Element('node')
+        self.generateNodeName(repeatNode, 'REPEAT_')
+        logger.verbose('Generate repeat node for parent: %s named: %s START', parent.find('name').text if parent is not None else 'root', repeatNode.find('name').text)
+        # condition
+        repeatNodeCondition = LET.Element('condition')
+        repeatNodeCondition.text = ('$' + varName + ' == null or ' if attempts == 0 else '') + '$' + varName + ' >= ' + str(attempts)
+        repeatNode.append(repeatNodeCondition)
+        # context
+        repeatNodeContext = LET.Element('context')
+        repeatVariable = LET.Element(varName)
+        repeatVariable.text = str(varValue)
+        if isinstance(varValue, int):
+            repeatVariable.set('type', 'number')
+        repeatNodeContext.append(repeatVariable)
+        repeatNode.append(repeatNodeContext)
+        # output
+        repeatNode.append(copy.deepcopy(output))
+        # goto
+        if goto is not None:
+            repeatNode.append(copy.deepcopy(goto))
+        root.append(repeatNode)
+        logger.verbose('Generate repeat node for parent: %s named: %s END', parent.find('name').text if parent is not None else 'root', repeatNode.find('name').text)
+
+    def printNodes(self, root, parent):
+        """Converts parsed XML to JSON structure
+
+        Args:
+            root (_Element): root of the parsed XML tree - (typically there is element "nodes" )
+            parent (_Element): initially None, then parent
+
+        Yields:
+            dict: generated JSON of the nodes, each node is yielded before its children
+        """
+        # PROCESS SIBLINGS
+        previousSibling = None
+        for nodeXML in root: # for each node in nodes
+            if not (nodeXML.tag == 'node' or nodeXML.tag == 'slot' or nodeXML.tag == 'handler' or nodeXML.tag == 'response'):
+                continue
+            # fix name
+            if nodeXML.find('name') is None:
+                self.generateNodeName(nodeXML, '')
+            else:
+                validateNodeName(nodeXML)
+            nodeJSON = {'dialog_node':nodeXML.find('name').text}
+            logger.verbose("===============================")
+            logger.verbose("name %s", nodeXML.find('name').text)
+
+            children = []
+
+            # TITLE
+            if nodeXML.get('title') is not None:
+                nodeJSON['title'] = nodeXML.get('title')
+            # TYPE
+            if nodeXML.find('type') is not None:
+                nodeJSON['type'] = nodeXML.find('type').text
+            elif nodeXML.find('slots') is not None:
+                nodeJSON['type'] = "frame"
+            elif nodeXML.tag == 'slot':
+                nodeJSON['type'] = "slot"
+            # disabled
+            if nodeXML.find('disabled') is not None:
+                if nodeXML.find('disabled').text in ["True", "true"]:
+                    nodeJSON['disabled'] = True
+                elif nodeXML.find('disabled').text in ["False", "false"]:
+                    nodeJSON['disabled'] = False
+                else:
+                    nodeJSON['disabled'] = nodeXML.find('disabled').text
+                    logger.error("Unable to parse boolean " + nodeXML.find('disabled').text)
+            # EVENTNAME
+            if nodeXML.get('eventName') is not None:
+                nodeJSON['event_name'] = nodeXML.get('eventName')
+                nodeJSON['type'] = 'event_handler'
+            if nodeXML.find('event_name') is not None:
+                nodeJSON['event_name'] = nodeXML.find('event_name').text
+            # VARIABLE
+            if nodeXML.get('variable') is not None:
+                nodeJSON['variable'] = nodeXML.get('variable')
+                nodeJSON['type'] = 'slot'
+            if nodeXML.tag == 'response':
+                nodeJSON['type'] = 'response_condition'
+            # CONDITION
+            if nodeXML.find('condition') is not None:
+                if nodeXML.find('condition').text is not None:
+                    nodeJSON['conditions'] = nodeXML.find('condition').text
+                else:
+                    nodeJSON['conditions'] = ""
+            elif 'type' in nodeJSON:
+                if nodeJSON['type'] == 'default':
+                    nodeJSON['conditions'] = DEFAULT_CONDITION_ELSE
+                elif nodeJSON['type'] == 'yes':
+                    nodeJSON['conditions'] = DEFAULT_CONDITION_YES
+                elif nodeJSON['type'] == 'no':
+                    nodeJSON['conditions'] = DEFAULT_CONDITION_NO
+    #            else:
+    #                nodeJSON['conditions'] = DEFAULT_CONDITION_ELSE
             else:
-                nodeJSON['conditions'] = ""
-        elif 'type' in nodeJSON:
-            if nodeJSON['type'] == 'default':
                 nodeJSON['conditions'] = DEFAULT_CONDITION_ELSE
-            elif nodeJSON['type'] == 'yes':
-                nodeJSON['conditions'] = DEFAULT_CONDITION_YES
-            elif nodeJSON['type'] == 'no':
-                nodeJSON['conditions'] = DEFAULT_CONDITION_NO
-#            else:
-#                nodeJSON['conditions'] = DEFAULT_CONDITION_ELSE
-        else:
-            nodeJSON['conditions'] = DEFAULT_CONDITION_ELSE
-        # OUTPUT
-        if nodeXML.find('output') is not None:
-            outputNodeXML = nodeXML.find('output')
-            for responseNodeXML in outputNodeXML.findall('response'): #responses are translated to seperate nodes
-                children.append(responseNodeXML)
-                outputNodeXML.remove(responseNodeXML)
-            # this should be somewhere in generate
-            if outputNodeXML.text: # if any free text - create an element <text> txt </text> out of it and delete it
-                if outputNodeXML.text.strip():
-                    outputNodeTextXML = LET.Element('text')
-                    outputNodeTextXML.text = outputNodeXML.text
-                    outputNodeXML.append(outputNodeTextXML)
-                    # TODO save againMessage
-                outputNodeXML.text = None
-            if outputNodeXML.find('textValues') is not None:
-                outputNodeTextXML = outputNodeXML.find('textValues')
-                if outputNodeTextXML.get('structure') is not None:
-                    for outputNodeTextValueXML in outputNodeTextXML.findall('values'):
-                        outputNodeTextValueXML.attrib['structure'] = outputNodeTextXML.get('structure')
-                    outputNodeTextXML.attrib.pop('structure')
-                #rename textValues element to text
-                outputNodeTextXML.tag = 'text'
-
-            #if len(outputNodeXML.getchildren()) == 0: # remove empy output ("output": Null cannot be uploaded to WA)
-            #    nodeXML.remove(outputNodeXML)
-            #else:
-            convertAll(nodeJSON, outputNodeXML)
-        # CONTEXT
-        if nodeXML.find('context') is not None:
-            convertAll(nodeJSON, nodeXML.find('context'))
-        # METADATA
-        if nodeXML.find('metadata') is not None:
-            convertAll(nodeJSON, nodeXML.find('metadata'))
-        # ACTIONS
-        if nodeXML.find('actions') is not None:
-            actionsXML = nodeXML.find('actions')
-            nodeJSON['actions'] = []
-            for actionXML in actionsXML.findall('action'):
-                actionJSON = {}
-                convertAll(actionJSON, actionXML)
-                nodeJSON['actions'].append(actionJSON['action'])
-        # GO TO
-        if nodeXML.find('goto') is not None:
-            if nodeXML.find('goto').find('target') is None:
-                logger.warning('missing goto target in node: %s', nodeXML.find('name').text)
-            elif nodeXML.find('goto').find('target').text == '::FIRST_SIBLING':
-                nodeXML.find('goto').find('target').text = next(x for x in root if x.tag == 'node').find('name').text
-            gotoJson = {}
-            gotoJson['behavior'] = nodeXML.find('goto').find('behavior').text if nodeXML.find('goto').find('behavior') is not None else DEFAULT_BEHAVIOR
-            if nodeXML.find('goto').find('target') is not None:
-                gotoJson['dialog_node'] = nodeXML.find('goto').find('target').text
-            if nodeXML.find('goto').find('selector') is not None:
-                gotoJson['selector'] = nodeXML.find('goto').find('selector').text
-            nodeJSON['next_step'] = gotoJson
-        # PARENT
-        if parent is not None:
-            nodeJSON['parent'] = parent.find('name').text
-        # PREVIOUS SIBLING
-        if previousSibling is not None:
-            nodeJSON['previous_sibling'] = previousSibling.find('name').text
-        # DIGRESSION SETTINGS
-        if nodeXML.find('digress_in') is not None:
-            nodeJSON['digress_in'] = nodeXML.find('digress_in').text
-        if nodeXML.find('digress_out') is not None:
-            nodeJSON['digress_out'] = nodeXML.find('digress_out').text
-        if nodeXML.find('digress_out_slots') is not None:
-            nodeJSON['digress_out_slots'] = nodeXML.find('digress_out_slots').text
-
-        # TYPE DEFAULT
-        if not 'type' in nodeJSON:
-            nodeJSON['type'] = "standard"
-
-        # CLOSE NODE
-        previousSibling = nodeXML
-
-        for node in list(nodeXML):
-            if node.tag in ['node', 'slot', 'handler']:
-                children.append(node)
-            if node.tag in ['nodes', 'slots', 'handlers']:
-                children.extend(node)
-
-        # PROCESS ALL CHILDREN
-        if children:
-            printNodes(children, nodeXML, dialogJSON)
+            # OUTPUT
+            if nodeXML.find('output') is not None:
+                outputNodeXML = nodeXML.find('output')
+                for responseNodeXML in outputNodeXML.findall('response'): #responses are translated to seperate nodes
+                    children.append(responseNodeXML)
+                    outputNodeXML.remove(responseNodeXML)
+                # this should be somewhere in generate
+                if outputNodeXML.text: # if any free text - create an element <text> txt </text> out of it and delete it
+                    if outputNodeXML.text.strip():
+                        outputNodeTextXML = LET.Element('text')
+                        outputNodeTextXML.text = outputNodeXML.text
+                        outputNodeXML.append(outputNodeTextXML)
+                        # TODO save againMessage
+                    outputNodeXML.text = None
+                if outputNodeXML.find('textValues') is not None:
+                    outputNodeTextXML = outputNodeXML.find('textValues')
+                    if outputNodeTextXML.get('structure') is not None:
+                        for outputNodeTextValueXML in outputNodeTextXML.findall('values'):
+                            outputNodeTextValueXML.attrib['structure'] = outputNodeTextXML.get('structure')
+                        outputNodeTextXML.attrib.pop('structure')
+                    #rename textValues element to text
+                    outputNodeTextXML.tag = 'text'
+
+                #if len(outputNodeXML.getchildren()) == 0: # remove empy output ("output": Null cannot be uploaded to WA)
+                #    nodeXML.remove(outputNodeXML)
+                #else:
+                convertAll(nodeJSON, outputNodeXML)
+            # CONTEXT
+            if nodeXML.find('context') is not None:
+                convertAll(nodeJSON, nodeXML.find('context'))
+            # METADATA
+            if nodeXML.find('metadata') is not None:
+                convertAll(nodeJSON, nodeXML.find('metadata'))
+            # ACTIONS
+            if nodeXML.find('actions') is not None:
+                actionsXML = nodeXML.find('actions')
+                nodeJSON['actions'] = []
+                for actionXML in actionsXML.findall('action'):
+                    actionJSON = {}
+                    convertAll(actionJSON, actionXML)
+                    nodeJSON['actions'].append(actionJSON['action'])
+            # GO TO
+            if nodeXML.find('goto') is not None:
+                if nodeXML.find('goto').find('target') is None:
+                    logger.warning('missing goto target in node: %s', nodeXML.find('name').text)
+                elif nodeXML.find('goto').find('target').text == '::FIRST_SIBLING':
+                    nodeXML.find('goto').find('target').text = next(x for x in root if x.tag == 'node').find('name').text
+                gotoJson = {}
+                gotoJson['behavior'] = nodeXML.find('goto').find('behavior').text if nodeXML.find('goto').find('behavior') is not None else DEFAULT_BEHAVIOR
+                if nodeXML.find('goto').find('target') is not None:
+                    gotoJson['dialog_node'] = nodeXML.find('goto').find('target').text
+                if nodeXML.find('goto').find('selector') is not None:
+                    gotoJson['selector'] = nodeXML.find('goto').find('selector').text
+                nodeJSON['next_step'] = gotoJson
+            # PARENT
+            if parent is not None:
+                nodeJSON['parent'] = parent.find('name').text
+            # PREVIOUS SIBLING
+            if previousSibling is not None:
+                nodeJSON['previous_sibling'] = previousSibling.find('name').text
+            # DIGRESSION SETTINGS
+            if nodeXML.find('digress_in') is not None:
+                nodeJSON['digress_in'] = nodeXML.find('digress_in').text
+            if nodeXML.find('digress_out') is not None:
+                nodeJSON['digress_out'] = nodeXML.find('digress_out').text
+            if nodeXML.find('digress_out_slots') is not None:
+                nodeJSON['digress_out_slots'] = nodeXML.find('digress_out_slots').text
+
+            # TYPE DEFAULT
+            if not 'type' in nodeJSON:
+                nodeJSON['type'] = "standard"
+
+            # CLOSE NODE
+            previousSibling = nodeXML
+            yield nodeJSON
+
+            for node in list(nodeXML):
+                if node.tag in ['node', 'slot', 'handler']:
+                    children.append(node)
+                if node.tag in ['nodes', 'slots', 'handlers']:
+                    children.extend(node)
+
+            # PROCESS ALL CHILDREN
+            if children:
+                yield from self.printNodes(children, nodeXML)
+
 
 
 def convertAll(upperNodeJson, nodeXml):
@@ -850,10 +1083,11 @@ def main(argv):
     parser.add_argument('-sc', '--common_scope', required=False, help='scope of dialog, e.g. type-local')
     parser.add_argument('-of', '--common_outputs_directory', required=False, help='directory where the outputs will be stored (outputs is default)')
     parser.add_argument('-od', '--common_outputs_dialogs', required=False, help='name of generated file (dialog.json is the default)')
+    parser.add_argument('-vw', '--common_validation_workers', required=False, help='number of processes validating dialog files against the schema (number of CPUs is the default)')
+    parser.add_argument('-ic', '--common_import_cache', required=False, help='directory with cache of preprocessed imported dialog files, imports are not cached if not specified')
     parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
     args = parser.parse_args(argv)
-    global config
 
     if __name__ == '__main__':
         setLoggerConfig(args.log, args.verbose)
@@ -862,14 +1096,6 @@ def main(argv):
 
     logger.info('STARTING: ' + os.path.basename(__file__))
 
-    # XML namespaces
-    global XSI_NAMESPACE
-    global XSI
-    global NSMAP
-    XSI_NAMESPACE = "http://www.w3.org/2001/XMLSchema-instance"
-    XSI = "{%s}" % XSI_NAMESPACE
-    NSMAP = {"xsi" : XSI_NAMESPACE}
-
     # load dialogue from XML
     dialogTreeFile = getOptionalParameter(config, 'common_dialog_main') or sys.stdin
 
@@ -880,6 +1106,7 @@ def main(argv):
     dialogTree = LET.parse(dialogTreeFile)
 
     # load schema
+    schemaFile = None
     schemaParam = getOptionalParameter(config, 'common_schema')
     if schemaParam:
         schemaDirname = os.path.split(os.path.abspath(__file__))[0]
@@ -887,47 +1114,30 @@ def main(argv):
         if not os.path.exists(schemaFile):
             logger.critical('Schema file %s not found.', schemaFile)
             exit(1)
-        #TODO might need UTF-8
-        schemaTree = LET.parse(schemaFile)
-        global schema
-        schema = LET.XMLSchema(schemaTree)
-        validate(dialogTree, dialogTreeFile, False)
-
-    # process dialog tree
-    root = dialogTree.getroot()
-    global rootGlobal
-    rootGlobal = root
-    importNodes(root, config)
-
-    # remove all comments
-    removeAllComments(dialogTree)
-
-    # remove nodes which are out of specified scope
-    removeOutOfScopeNodes(dialogTree)
-
-    # find all node names
-    global names
-    names = findAllNodeNames(dialogTree)
-
-    global parent_map
-    parent_map = dict((c, p) for p in dialogTree.getiterator() for c in p)
-    generateNodes(root, None, DEFAULT_ABORT, DEFAULT_AGAIN, DEFAULT_BACK, DEFAULT_REPEAT, DEFAULT_GENERIC)
 
-    # create dialog structure for JSON
-    dialogNodes = []
+    validationWorkers = int(getattr(config, 'common_validation_workers')) if hasattr(config, 'common_validation_workers') else None
+    compiler = DialogCompiler(schemaFile, validationWorkers)
 
-    # convert XML tree to JSON structure
-    printNodes(root, None, dialogNodes)
+    # convert XML tree to JSON structure, nodes are written one by one as they are generated
+    dialogNodes = compiler.compileIter(dialogTree, config)
 
     if hasattr(config, 'common_outputs_directory') and hasattr(config, 'common_outputs_dialogs'):
         if not os.path.exists(getattr(config, 'common_outputs_directory')):
             os.makedirs(getattr(config, 'common_outputs_directory'))
             logger.info("Created new output directory %s", getattr(config, 'common_outputs_directory'))
-        with io.open(os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_dialogs')), 'w', encoding='utf-8') as outputFile:
-            outputFile.write(json.dumps(dialogNodes, indent=4, ensure_ascii=False))
-        logger.info("File %s created", os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_dialogs')))
+        outputPath = os.path.join(getattr(config, 'common_outputs_directory'), getattr(config, 'common_outputs_dialogs'))
+        # compilation can still fail while the nodes are written, the output file is replaced only by the complete array
+        try:
+            with io.open(outputPath + '.tmp', 'w', encoding='utf-8') as outputFile:
+                writeJsonArray(outputFile, dialogNodes)
+        except BaseException:
+            os.remove(outputPath + '.tmp')
+            raise
+        os.replace(outputPath + '.tmp', outputPath)
+        logger.info("File %s created", outputPath)
     else:
-        print(json.dumps(dialogNodes, indent=4, ensure_ascii=False))
+        writeJsonArray(sys.stdout, dialogNodes)
+        print()
 
     if hasattr(config, 'common_output_config'):
         config.saveConfiguration(getattr(config, 'common_output_config'))
@@ -17,12 +17,14 @@ import argparse
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote
 
 import requests
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
 from cfgCommons import Cfg
+from httpCommons import DEFAULT_POOL_SIZE, configureHttp, httpDelete, httpGet
 from wawCommons import (convertApikeyToUsernameAndPassword, errorsInResponse,
                         filterPackages, getOptionalParameter,
                         getParametersCombination, getRequiredParameter,
@@ -30,6 +32,8 @@ from wawCommons import (convertApikeyToUsernameAndPassword, errorsInResponse,
 
 logger = getScriptLogger(__file__)
 
+DEFAULT_DELETE_WORKERS = 8
+
 def main(argv):
     """Deletes the cloudfunctions package specified in the configuration file or as CLI argument."""
     parser = argparse.ArgumentParser(description="Deletes cloud functions package.",
@@ -43,6 +47,7 @@ def main(argv):
     parser.add_argument('--cloudfunctions_package', required=False, help="cloud functions package name")
     parser.add_argument('--cloudfunctions_package_pattern', required=False, help='regex pattern specifying a name of workspaces to be deleted')
     parser.add_argument('--cloudfunctions_url', required=False, help="url of cloud functions API")
+    parser.add_argument('--cloudfunctions_delete_workers', type=int, required=False, help="number of actions deleted in parallel (default " + str(DEFAULT_DELETE_WORKERS) + ")")
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
 
     args = parser.parse_args(argv)
@@ -77,6 +82,14 @@ def main(argv):
         return False
 
     config = Cfg(args)
+    workers = int(getattr(config, 'cloudfunctions_delete_workers', None) or DEFAULT_DELETE_WORKERS)
+    if workers < 1:
+        logger.error('Number of delete workers has to be positive number, workers: %d', workers)
+        sys.exit(1)
+    if not hasattr(config, 'common_http_pool_size'):
+        # keep connection for every worker
+        config.common_http_pool_size = max(DEFAULT_POOL_SIZE, workers)
+    configureHttp(config)
     logger.info('STARTING: '+ os.path.basename(__file__))
 
     namespace = getRequiredParameter(config, 'cloudfunctions_namespace')
@@ -91,7 +104,7 @@ def main(argv):
         password = auth['cloudfunctions_password']
 
     packagesUrl = cloudfunctionsUrl + '/' + urlNamespace + '/packages'
-    response = requests.get(packagesUrl, auth=(username, password), headers={'Content-Type': 'application/json'})
+    response = httpGet(packagesUrl, auth=(username, password), headers={'Content-Type': 'application/json'})
     if not handleResponse(response):
         logger.critical("Unable to get available packages.")
         sys.exit(1)
@@ -107,44 +120,72 @@ def main(argv):
             logger.info("No matching packages to delete.")
             return
 
-    for package in matchedPackages:
-        packageName = package['name']
+    requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+    actionsUrl = cloudfunctionsUrl + '/' + urlNamespace + '/actions'
+    failures = []
 
+    def getPackageActions(packageName):
+        """Returns actions of the package or None if the package information is not available."""
         logger.info("Will delete cloud functions in package '" + packageName + "'.")
-
-        requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
-        packageUrl = packagesUrl + '/' + packageName
-        response = requests.get(packageUrl, auth=(username, password), headers={'Content-Type': 'application/json'})
+        response = httpGet(packagesUrl + '/' + packageName, auth=(username, password), headers={'Content-Type': 'application/json'})
         if not handleResponse(response):
-            logger.critical("Unable to get information about package '" + packageName + "'.")
-            sys.exit(1)
-
-        actions = response.json()['actions']
-        # put the sequences at the beggining
-        actions.sort(key=lambda action: isActionSequence(action))
-
-        for action in actions:
-            name = action['name']
-            actionUrl = cloudfunctionsUrl + '/' + urlNamespace + '/actions/' + packageName + '/' + name
-            logger.verbose("Deleting action '" + name + "' at " + actionUrl)
-            response = requests.delete(actionUrl, auth=(username, password), headers={'Content-Type': 'application/json'})
-            if not handleResponse(response):
-                logger.critical("Unable to delete action " + name + "' at " + actionUrl)
-                sys.exit(1)
-            logger.verbose("Action deleted.")
-
-        logger.verbose("Deleting package '" + packageName + "' at " + packageUrl)
-        response = requests.delete(packageUrl, auth=(username, password), headers={'Content-Type': 'application/json'})
+            logger.error("Unable to get information about package '" + packageName + "'.")
+            return None
+        return response.json()['actions']
+
+    def delete(description, url):
+        """Deletes the resource, returns True if it was deleted (or it does not exist anymore)."""
+        logger.verbose("Deleting " + description + " at " + url)
+        response = httpDelete(url, auth=(username, password), headers={'Content-Type': 'application/json'})
+        if response.status_code == 404:
+            # deleted by someone else meanwhile
+            logger.verbose("Already deleted " + description + ".")
+            return True
         if not handleResponse(response):
-            logger.critical("Unable to delete package '" + packageName + "' at " + packageUrl)
-            sys.exit(1)
-        logger.verbose("Package deleted.")
-        logger.info("Cloud functions in package %s successfully deleted.", packageName)
+            logger.error("Unable to delete " + description + " at " + url)
+            return False
+        logger.verbose("Deleted " + description + ".")
+        return True
+
+    # sequences have to be deleted before the actions they consist of, actions before their package;
+    # resources in every phase are deleted in parallel, failures are reported at the end
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        packageNames = [package['name'] for package in matchedPackages]
+        packagesActions = dict(zip(packageNames, executor.map(getPackageActions, packageNames)))
+        # packages which can not be deleted, because their actions are not known or not deleted
+        failedPackageNames = set(packageName for packageName, actions in packagesActions.items() if actions is None)
+
+        for deleteSequences in [True, False]:
+            deletions = []
+            for packageName, actions in packagesActions.items():
+                for action in actions or []:
+                    if isActionSequence(action) == deleteSequences:
+                        description = ("sequence" if deleteSequences else "action") + " '" + packageName + "/" + action['name'] + "'"
+                        url = actionsUrl + '/' + packageName + '/' + action['name']
+                        deletions.append((packageName, description, executor.submit(delete, description, url)))
+            for packageName, description, deletion in deletions:
+                if not deletion.result():
+                    failures.append(description)
+                    failedPackageNames.add(packageName)
+
+        deletions = [(packageName, executor.submit(delete, "package '" + packageName + "'", packagesUrl + '/' + packageName))
+                     for packageName in packageNames if packageName not in failedPackageNames]
+        for packageName, deletion in deletions:
+            if deletion.result():
+                logger.info("Cloud functions in package %s successfully deleted.", packageName)
+            else:
+                failedPackageNames.add(packageName)
+        failures.extend("package '" + packageName + "'" for packageName in packageNames if packageName in failedPackageNames)
+        deletedPackagesCount = len(packageNames) - len(failedPackageNames)
+
+    if failures:
+        logger.critical("Unable to delete %d resources: %s", len(failures), ', '.join(failures))
+        sys.exit(1)
 
-    if (len(matchedPackages) == 1):
+    if (deletedPackagesCount == 1):
         logger.info("One package has been successfully deleted.")
     else:
-        logger.info("%s packages have been successfully deleted.", len(matchedPackages))
+        logger.info("%s packages have been successfully deleted.", deletedPackagesCount)
 
 if __name__ == '__main__':
     main(sys.argv[1:])
@@ -15,17 +15,20 @@ limitations under the License.
 
 import argparse
 import base64
+import hashlib
 import json
 import logging
 import os
 import sys
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote
 
 import requests
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 
 from cfgCommons import Cfg
+from httpCommons import DEFAULT_POOL_SIZE, configureHttp, httpGet, httpPut
 from wawCommons import (convertApikeyToUsernameAndPassword, errorsInResponse,
                         getFilesAtPath, getOptionalParameter,
                         getParametersCombination, getRequiredParameter,
@@ -33,6 +36,10 @@ from wawCommons import (convertApikeyToUsernameAndPassword, errorsInResponse,
 
 logger = getScriptLogger(__file__)
 
+DEFAULT_DEPLOY_WORKERS = 8
+# annotation of the deployed actions with hash of their content, unchanged actions are not deployed again
+CONTENT_HASH_ANNOTATION = 'wawContentHash'
+
 interpretedRuntimes = {
     '.js': 'nodejs',
     '.py': 'python',
@@ -82,6 +89,8 @@ def main(argv):
     parser.add_argument('--cloudfunctions_url', required=False, help="url of cloud functions API")
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
     parser.add_argument('--cloudfunctions_sequences', nargs='+', required=False, help="cloud functions sequence names")
+    parser.add_argument('--cloudfunctions_deploy_workers', type=int, required=False, help="number of functions deployed in parallel (default " + str(DEFAULT_DEPLOY_WORKERS) + ")")
+    parser.add_argument('--cloudfunctions_force_deploy', required=False, help="deploy all the functions and sequences, even if they are not changed", action='store_true', default="")
 
     for runtime in list(interpretedRuntimes.values()) + list(compiledRuntimes.values()):
         parser.add_argument('--cloudfunctions_' + runtime + '_version', required=False,
@@ -128,6 +137,14 @@ def main(argv):
         return True
 
     config = Cfg(args)
+    workers = int(getattr(config, 'cloudfunctions_deploy_workers', None) or DEFAULT_DEPLOY_WORKERS)
+    if workers < 1:
+        logger.error('Number of deploy workers has to be positive number, workers: %d', workers)
+        sys.exit(1)
+    if not hasattr(config, 'common_http_pool_size'):
+        # keep connection for every worker
+        config.common_http_pool_size = max(DEFAULT_POOL_SIZE, workers)
+    configureHttp(config)
 
     namespace = getRequiredParameter(config, 'cloudfunctions_namespace')
     urlNamespace = quote(namespace)
@@ -135,6 +152,9 @@ def main(argv):
     package = getRequiredParameter(config, 'cloudfunctions_package')
     cloudFunctionsUrl = getRequiredParameter(config, 'cloudfunctions_url')
     functionDir = getRequiredParameter(config, 'common_functions')
+    # functions directory from command line is not a list (in contrast to the one from configuration file)
+    if type(functionDir) is str:
+        functionDir = [functionDir]
     # If sequence names are already defined (from console), do nothing. Else look for them in the configuration.
     if not sequenceNames:
         sequenceNames = getOptionalParameter(config, 'cloudfunctions_sequences') or []
@@ -155,10 +175,15 @@ def main(argv):
         runtimeVersions[runtime] = runtime + ':' + getattr(config, 'cloudfunctions_' + runtime + '_version', 'default')
 
     requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
-    packageUrl = cloudFunctionsUrl + '/' + urlNamespace + '/packages/' + package + '?overwrite=true'
+    packageUrl = cloudFunctionsUrl + '/' + urlNamespace + '/packages/' + package
+    forceDeploy = hasattr(config, 'cloudfunctions_force_deploy') and getattr(config, 'cloudfunctions_force_deploy')
+    deployedHashes = {}
+    if not forceDeploy:
+        deployedHashes = _getDeployedHashes(packageUrl, username, password)
+
     logger.info("Will create cloudfunctions package %s.", package)
-    response = requests.put(packageUrl, auth=(username, password), headers={'Content-Type': 'application/json'},
-                            data='{}')
+    response = httpPut(packageUrl + '?overwrite=true', auth=(username, password),
+                       headers={'Content-Type': 'application/json'}, data='{}')
     if not handleResponse(response):
         logger.critical("Cannot create cloud functions package %s.", package)
         sys.exit(1)
@@ -171,68 +196,121 @@ def main(argv):
 
     logger.info("Will deploy functions at paths %s.", functionDir)
 
-    for functionFilePath in filesAtPath:
-        fileName = os.path.basename(functionFilePath)
-        (funcName, ext) = os.path.splitext(fileName)
-
-        runtime = None
-        binary = False
-        # if the file is zip, it's necessary to look inside
-        if ext == '.zip':
-            runtime = _getZipPackageType(functionFilePath)
-            if not runtime:
-                logger.warning("Cannot determine function type from zip file '%s'. Skipping!", functionFilePath)
-                continue
-            binary = True
-        else:
-            if ext in interpretedRuntimes:
-                runtime = interpretedRuntimes[ext]
-                binary = False
-            elif ext in compiledRuntimes:
-                runtime = compiledRuntimes[ext]
+    # key: function name, value: future returning True if the function was deployed
+    deployments = {}
+    failedNames = []
+    skippedCount = 0
+
+    def deploy(name, execJson, contentHash):
+        """Deploys the action (function or sequence) to the package, returns True if the deployment succeeded."""
+        actionUrl = cloudFunctionsUrl + '/' + urlNamespace + '/actions/' + package + '/' + name + '?overwrite=true'
+        payload = {'exec': execJson, 'annotations': [{'key': CONTENT_HASH_ANNOTATION, 'value': contentHash}]}
+        logger.verbose("Deploying %s", name)
+        response = httpPut(actionUrl, auth=(username, password), headers={'Content-Type': 'application/json'},
+                           data=json.dumps(payload), verify=False)
+        if not handleResponse(response):
+            logger.error("Cannot deploy %s.", name)
+            return False
+        logger.verbose('%s successfully deployed.', name)
+        return True
+
+    def isUnchanged(name, contentHash):
+        return not forceDeploy and deployedHashes.get(name) == contentHash
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for functionFilePath in filesAtPath:
+            fileName = os.path.basename(functionFilePath)
+            (funcName, ext) = os.path.splitext(fileName)
+
+            runtime = None
+            binary = False
+            # if the file is zip, it's necessary to look inside
+            if ext == '.zip':
+                runtime = _getZipPackageType(functionFilePath)
+                if not runtime:
+                    logger.warning("Cannot determine function type from zip file '%s'. Skipping!", functionFilePath)
+                    continue
                 binary = True
             else:
-                logger.warning("Cannot determine function type of '%s'. Skipping!", functionFilePath)
+                if ext in interpretedRuntimes:
+                    runtime = interpretedRuntimes[ext]
+                    binary = False
+                elif ext in compiledRuntimes:
+                    runtime = compiledRuntimes[ext]
+                    binary = True
+                else:
+                    logger.warning("Cannot determine function type of '%s'. Skipping!", functionFilePath)
+                    continue
+
+            if binary:
+                with open(functionFilePath, 'rb') as functionFile:
+                    content = base64.b64encode(functionFile.read()).decode('utf-8')
+            else:
+                with open(functionFilePath, 'r') as functionFile:
+                    content = functionFile.read()
+            execJson = {'kind': runtimeVersions[runtime], 'binary': binary, 'code': content}
+
+            contentHash = _getContentHash(execJson)
+            if isUnchanged(funcName, contentHash):
+                logger.verbose("Function %s is not changed, skipping.", funcName)
+                skippedCount += 1
                 continue
+            deployments[funcName] = executor.submit(deploy, funcName, execJson, contentHash)
+
+        if sequences:
+            logger.info("Will deploy cloudfunction sequences.")
+
+        # sequence can be created only when all its functions exist, deployments of the sequence functions are awaited
+        for seqName in sequences:
+            functionNames = sequences[seqName]
+            failedFunctionNames = [functionName for functionName in functionNames
+                                   if functionName in deployments and not deployments[functionName].result()]
+            if failedFunctionNames:
+                logger.error("Cannot deploy cloudfunctions sequence %s, its functions %s were not deployed.",
+                             seqName, failedFunctionNames)
+                failedNames.append(seqName)
+                continue
+            fullFunctionNames = [namespace + '/' + package +'/' + functionName for functionName in functionNames]
+            execJson = {'kind': 'sequence', 'binary': False, 'components': fullFunctionNames}
+            contentHash = _getContentHash(execJson)
+            if isUnchanged(seqName, contentHash):
+                logger.verbose("Sequence %s is not changed, skipping.", seqName)
+                skippedCount += 1
+                continue
+            logger.verbose("Deploying cloudfunctions sequence '%s': %s", seqName, functionNames)
+            deployments[seqName] = executor.submit(deploy, seqName, execJson, contentHash)
 
-        functionUrl = cloudFunctionsUrl + '/' + urlNamespace + '/actions/' + package + '/' + funcName + '?overwrite=true'
-
-        if binary:
-            content = base64.b64encode(open(functionFilePath, 'rb').read()).decode('utf-8')
-        else:
-            content = open(functionFilePath, 'r').read()
-        payload = {'exec': {'kind': runtimeVersions[runtime], 'binary': binary, 'code': content}}
+        failedNames.extend(name for name, deployment in deployments.items() if not deployment.result())
 
-        logger.verbose("Deploying function %s", funcName)
-        response = requests.put(functionUrl, auth=(username,password), headers={'Content-Type': 'application/json'},
-                                data=json.dumps(payload), verify=False)
-        if not handleResponse(response):
-            logger.critical("Cannot deploy cloud function %s.", funcName)
-            sys.exit(1)
-        else:
-            logger.verbose('Cloud function %s successfully deployed.', funcName)
-    logger.info("Cloudfunctions successfully deployed.")
-
-    if sequences:
-        logger.info("Will deploy cloudfunction sequences.")
-
-    for seqName in sequences:
-        sequenceUrl = cloudFunctionsUrl + '/' + urlNamespace + '/actions/' + package + '/' + seqName + '?overwrite=true'
-        functionNames = sequences[seqName]
-        fullFunctionNames = [namespace + '/' + package +'/' + functionName for functionName in functionNames]
-        payload = {'exec': {'kind': 'sequence', 'binary': False, 'components': fullFunctionNames}}
-        logger.verbose("Deploying cloudfunctions sequence '%s': %s", seqName, functionNames)
-        response = requests.put(sequenceUrl, auth=(username, password), headers={'Content-Type': 'application/json'},
-                                    data=json.dumps(payload), verify=False)
-        if not handleResponse(response):
-            logger.critical("Cannot deploy cloudfunctions sequence %s", seqName)
-            sys.exit(1)
-        else:
-            logger.verbose("Sequence '%s' deployed.", seqName)
-    if sequences:
-        logger.info("Cloudfunction sequences successfully deployed.")
+    if failedNames:
+        logger.critical("Cannot deploy cloud functions and sequences: %s", ', '.join(sorted(failedNames)))
+        sys.exit(1)
+    logger.info("Cloudfunctions successfully deployed (%d deployed, %d not changed).",
+                len(deployments), skippedCount)
     logger.info('FINISHING: ' + os.path.basename(__file__))
 
+def _getContentHash(execJson):
+    """Returns hash of the deployed code (including runtime) of the action."""
+    return hashlib.sha256(json.dumps(execJson, sort_keys=True).encode('utf-8')).hexdigest()
+
+def _getDeployedHashes(packageUrl, username, password):
+    """Returns dictionary {<action name>: <content hash>} of the actions deployed in the package by previous runs.
+    If the package can not be read, returns empty dictionary, so all the actions are deployed."""
+    response = httpGet(packageUrl, auth=(username, password), headers={'Accept': 'application/json'})
+    if response.status_code == 404:
+        logger.verbose("Package does not exist yet, all functions will be deployed.")
+        return {}
+    if response.status_code != requests.codes.ok:
+        logger.warning("Cannot read deployed functions of the package (Error code %s), all functions will be deployed.",
+                       response.status_code)
+        return {}
+    deployedHashes = {}
+    for action in response.json().get('actions', []):
+        for annotation in action.get('annotations', []):
+            if annotation.get('key') == CONTENT_HASH_ANNOTATION:
+                deployedHashes[action['name']] = annotation.get('value')
+    return deployedHashes
+
 def _getZipPackageType(zipFilePath):
     with zipfile.ZipFile(zipFilePath, 'r') as functionsZip:
         for zipMember in functionsZip.namelist():
@@ -24,7 +24,8 @@ from deepdiff import DeepDiff
 from junitparser import Error, Failure, JUnitXml, TestCase, TestSuite
 
 from cfgCommons import Cfg
-from wawCommons import getScriptLogger, setLoggerConfig, getOptionalParameter
+from wawCommons import (getOptionalParameter, getScriptLogger, payloadLoader,
+                        setLoggerConfig)
 
 logger = getScriptLogger(__file__)
 
@@ -134,14 +135,12 @@ def main(argv):
                 testOutputExpectedPath = os.path.join(os.path.dirname(args.inputFileName), testOutputExpectedJson[1:])
                 logger.debug("Loading expected output payload from file '%s'", testOutputExpectedPath)
                 try:
-                    outputExpectedFile = open(testOutputExpectedPath, 'r')
+                    testOutputExpectedJson = payloadLoader.load(testOutputExpectedPath)
                 except IOError:
                     errorMessage = "Cannot open expected output payload from file '{}'".format(testOutputExpectedPath)
                     logger.error(errorMessage)
                     case.result = Error(errorMessage, 'IOError')
                     continue
-                try:
-                    testOutputExpectedJson = json.load(outputExpectedFile)
                 except ValueError as e:
                     errorMessage = "Cannot decode json from expected output payload from file '{}', error '{}'".format(testOutputExpectedPath, str(e))
                     logger.error(errorMessage)
@@ -161,14 +160,12 @@ def main(argv):
                 testOutputReturnedPath = os.path.join(os.path.dirname(args.inputFileName), testOutputReturnedJson[1:])
                 logger.debug("Loading returned output payload from file '%s'", testOutputReturnedPath)
                 try:
-                    outputReturnedFile = open(testOutputReturnedPath, 'r')
+                    testOutputReturnedJson = payloadLoader.load(testOutputReturnedPath)
                 except IOError:
                     errorMessage = "Cannot open returned output payload from file '{}'".format(testOutputReturnedPath)
                     logger.error(errorMessage)
                     case.result = Error(errorMessage, 'IOError')
                     continue
-                try:
-                    testOutputReturnedJson = json.load(outputReturnedFile)
                 except ValueError as e:
                     errorMessage = "Cannot decode json from returned output payload from file '{}', error '{}'".format(testOutputReturnedPath, str(e))
                     logger.error(errorMessage)
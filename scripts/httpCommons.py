@@ -0,0 +1,144 @@
+"""
+Copyright 2019 IBM Corporation
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# HTTP client shared by all the scripts calling Watson Assistant and Cloud Functions.
+# Connections are kept in a pooled session per base url (scheme and host), so consecutive requests do not open
+# new TLS connection. Requests have default timeout and are retried with exponential backoff on 429 and 5xx.
+
+import logging
+import os
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# wawCommons uses this module, so getScriptLogger can not be imported from it
+logger = logging.getLogger("common." + os.path.splitext(os.path.basename(__file__))[0])
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 10  # seconds
+DEFAULT_READ_TIMEOUT = 300    # seconds, workspace deploy and blocking function calls can take long
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5  # seconds, sleep before n-th retry is backoff_factor * 2^(n-1)
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+# POST is not idempotent (e.g. function invocation), it is retried only when the request was surely not processed
+POST_RETRY_STATUSES = frozenset([429, 503])
+
+_settings = {
+    'poolSize': DEFAULT_POOL_SIZE,
+    'timeout': (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+    'retries': DEFAULT_RETRIES,
+    'backoffFactor': DEFAULT_BACKOFF_FACTOR
+}
+_sessions = {}  # key: base url, value: session
+_sessionsLock = threading.Lock()
+
+
+class _Retry(Retry):
+    """Retry policy which does not repeat POST requests which could have been already processed."""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        if method and method.upper() == 'POST' and status_code not in POST_RETRY_STATUSES:
+            return False
+        return super(_Retry, self).is_retry(method, status_code, has_retry_after)
+
+
+class _TimeoutSession(requests.Session):
+    """Session which uses default timeout for requests without explicit timeout."""
+
+    def __init__(self, timeout):
+        super(_TimeoutSession, self).__init__()
+        self._timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self._timeout)
+        return super(_TimeoutSession, self).request(method, url, **kwargs)
+
+
+def _createRetry(retries, backoffFactor):
+    retryArgs = {
+        'total': retries,
+        'connect': retries,
+        'read': 0,  # request could have been processed, it is not safe to send it again
+        'status': retries,
+        'backoff_factor': backoffFactor,
+        'status_forcelist': RETRY_STATUSES,
+        'raise_on_status': False  # the last response is returned, scripts handle the status codes themselves
+    }
+    methods = frozenset(['HEAD', 'GET', 'PUT', 'DELETE', 'OPTIONS', 'TRACE', 'POST'])
+    try:
+        return _Retry(allowed_methods=methods, **retryArgs)
+    except TypeError:
+        return _Retry(method_whitelist=methods, **retryArgs)  # urllib3 < 1.26
+
+
+def configureHttp(config):
+    """Sets parameters of the sessions from the configuration, all of them are optional:
+        common_http_pool_size - maximal number of connections kept open to each host (default 10)
+        common_http_timeout - read timeout of the requests in seconds (default 300, connect timeout is 10)
+        common_http_retries - number of retries of failed requests (default 3)
+        common_http_backoff_factor - backoff factor of the retries in seconds (default 0.5)
+    Already created sessions are closed, so the new parameters are used by all the following requests.
+    """
+    _settings['poolSize'] = int(getattr(config, 'common_http_pool_size', DEFAULT_POOL_SIZE))
+    _settings['timeout'] = (DEFAULT_CONNECT_TIMEOUT, float(getattr(config, 'common_http_timeout', DEFAULT_READ_TIMEOUT)))
+    _settings['retries'] = int(getattr(config, 'common_http_retries', DEFAULT_RETRIES))
+    _settings['backoffFactor'] = float(getattr(config, 'common_http_backoff_factor', DEFAULT_BACKOFF_FACTOR))
+    closeSessions()
+
+
+def getSession(url):
+    """Returns pooled session for the base url (scheme and host) of the given url, the session is created on the first use.
+    Sessions can be shared by more threads."""
+    urlParts = urlparse(url)
+    baseUrl = urlParts.scheme + '://' + urlParts.netloc
+    with _sessionsLock:
+        if baseUrl not in _sessions:
+            logger.debug("Creating session for %s", baseUrl)
+            session = _TimeoutSession(_settings['timeout'])
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_settings['poolSize'],
+                                  max_retries=_createRetry(_settings['retries'], _settings['backoffFactor']))
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[baseUrl] = session
+        return _sessions[baseUrl]
+
+
+def closeSessions():
+    """Closes all the sessions and their connections."""
+    with _sessionsLock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def httpRequest(method, url, **kwargs):
+    """Sends request by the session of the url, arguments are the same as the arguments of requests.request."""
+    return getSession(url).request(method, url, **kwargs)
+
+def httpGet(url, **kwargs):
+    return httpRequest('GET', url, **kwargs)
+
+def httpPost(url, **kwargs):
+    return httpRequest('POST', url, **kwargs)
+
+def httpPut(url, **kwargs):
+    return httpRequest('PUT', url, **kwargs)
+
+def httpDelete(url, **kwargs):
+    return httpRequest('DELETE', url, **kwargs)
@@ -15,22 +15,28 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import asyncio
+import collections
 import copy
 import fnmatch
+import functools
 import io
 import json
 import logging
 import os
+import random
 import re
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from logging.config import fileConfig
 from urllib.parse import urlencode, urlparse, urlunparse
 
-import requests
 import unidecode
 
 from ExceptionCommons import CFCallException, CFCallStatusException
+from httpCommons import httpGet, httpPost
+
 
 
 def openFile(name, *args, **kwargs):
@@ -39,16 +45,147 @@ def openFile(name, *args, **kwargs):
     f = io.open(name,*args, **kwargs)
     return f
 
+def writeJsonArray(outputFile, items, indent=4):
+    """Writes items to the file as JSON array, one item after another, so the whole array does not have to be kept in memory.
+    The output is the same as the output of json.dumps(list(items), indent=indent, ensure_ascii=False)."""
+    itemIndentation = '\n' + ' ' * indent
+    outputFile.write('[')
+    isFirst = True
+    for item in items:
+        outputFile.write(('' if isFirst else ',') + itemIndentation)
+        # JSON strings can not contain new lines, so all of them belong to the structure and can be indented
+        outputFile.write(json.dumps(item, indent=indent, ensure_ascii=False).replace('\n', itemIndentation))
+        isFirst = False
+    outputFile.write(']' if isFirst else '\n]')
+
+class PayloadLoader(object):
+    """Loads JSON payloads referenced by '@path' from the test files. Parsed payloads are cached in LRU cache
+    keyed by absolute path and modification time of the file, so a payload shared by many tests is parsed once
+    and a changed file is parsed again. The returned objects are shared, they must not be modified
+    (replaceValue returns modified copy).
+    """
+
+    def __init__(self, cacheSize=256):
+        self._loadCached = functools.lru_cache(maxsize=cacheSize)(self._load)
+
+    def _load(self, path, mtime):
+        with openFile(path, 'r') as payloadFile:
+            return json.load(payloadFile)
+
+    def load(self, path):
+        """Returns parsed JSON from the file, raises IOError if the file can not be read and ValueError if it is not valid JSON."""
+        path = os.path.abspath(path)
+        return self._loadCached(path, os.stat(path).st_mtime_ns)
+
+payloadLoader = PayloadLoader()
+
+def getFreeNameSuffix(prefix, existingNames, nextSuffixes):
+    """Returns the lowest number such that prefix followed by the number is not in existingNames.
+    nextSuffixes (dict keyed by prefix) remembers the last returned number, so checking starts there next time
+    and allocation of many names with the same prefix is not quadratic. Names must not be removed from existingNames."""
+    suffix = nextSuffixes.get(prefix, 0)
+    while prefix + str(suffix) in existingNames:
+        suffix += 1
+    nextSuffixes[prefix] = suffix
+    return suffix
+
 restrictionTextNamePolicy = "NAME_POLICY can be only set to either 'soft', 'soft_verbose' or 'hard'"
 
+class NameNormalizer(object):
+    """Normalizes codes, intent and entity names according to the restrictions given by WA and user.
+    WA patterns are compiled once for all instances, user-defined patterns once per instance.
+    Results are cached in LRU cache keyed by (policy, userReplacements, name), where policy is one of
+    'code', 'intent' or 'entity'. Only the normalization is cached, NAME_POLICY is applied by the callers.
+    """
+
+    # WA restrictions (https://console.bluemix.net/docs/services/conversation/intents.html#defining-intents)
+    CODE_SPACE_PATTERN = re.compile(' ')
+    CODE_INVALID_PATTERN = re.compile('[^\\w-]') # everything that is not unicode letter or hyphen
+    INTENT_SEPARATOR_PATTERN = re.compile(' ;')
+    INTENT_INVALID_PATTERN = re.compile(u'[^\\wÀ-ÖØ-öø-ÿĀ-ž-\\.]') # everything that is not unicode letter, hyphen or period
+    ENTITY_SPACE_PATTERN = re.compile(' ')
+    ENTITY_INVALID_PATTERN = re.compile(u'[^\\wÀ-ÖØ-öø-ÿĀ-ž-]') # everything that is not unicode letter or hyphen
+
+    WA_RESTRICTION_TEXTS = {
+        'intent': "The intent name can only contain letters (in Unicode), numbers, underscores, hyphens, and periods.",
+        'entity': "The entity name can only contain letters (in Unicode), numbers, underscores, and hyphens."
+    }
+
+    def __init__(self, cacheSize=8192):
+        self._userPatterns = {} # key: user-defined regex, value: compiled regex
+        self._normalizeCached = functools.lru_cache(maxsize=cacheSize)(self._normalize)
+
+    def normalize(self, policy, userReplacements, name):
+        """Returns tuple of the normalized name and tuple of texts describing the triggered restrictions.
+
+        Args:
+            policy (string): 'code', 'intent' or 'entity'
+            userReplacements (list): pairs of regex and replacement, e.g. [['$special', '\\L'], ['-', '_']], can be None
+            name (string): stripped name to be normalized
+        """
+        replacementsKey = tuple(tuple(replacementPair) for replacementPair in userReplacements) if userReplacements else ()
+        return self._normalizeCached(policy, replacementsKey, name)
+
+    def _getUserPattern(self, regex):
+        if regex not in self._userPatterns:
+            self._userPatterns[regex] = re.compile(regex)
+        return self._userPatterns[regex]
+
+    def _normalize(self, policy, userReplacements, name):
+        if policy == 'code':
+            newCode = self.CODE_SPACE_PATTERN.sub('_', name).upper()
+            newCode = unidecode.unidecode(newCode) # remove accents
+            return self.CODE_INVALID_PATTERN.sub('', newCode), ()
+
+        restrictionTexts = []
+        # apply WA restrictions
+        if policy == 'intent':
+            nameWA = self.INTENT_SEPARATOR_PATTERN.sub('_', name) # replace space and ; by underscore
+            nameWA = self.INTENT_INVALID_PATTERN.sub('', nameWA)
+        else:
+            nameWA = self.ENTITY_SPACE_PATTERN.sub('_', name) # replace spaces with underscores
+            nameWA = self.ENTITY_INVALID_PATTERN.sub('', nameWA)
+        if nameWA != name: # WA restriction triggered
+            restrictionTexts.append(self.WA_RESTRICTION_TEXTS[policy])
+        # apply user-defined restrictions
+        nameUser = nameWA
+        if userReplacements:
+            triggeredUserRegex = []
+            # re.sub for all pairs (regex, replacement)
+            for regex, replacement in userReplacements:
+                #special case
+                if regex.startswith('$'):
+                    if replacement == r'\L':
+                        newNameUser = nameUser.lower()
+                        triggeredUserRegexToAppend = policy + " name should be lowercase"
+                    elif replacement == r'\U':
+                        newNameUser = nameUser.upper()
+                        triggeredUserRegexToAppend = policy + " name should be uppercase"
+                    elif replacement == r'\A':
+                        newNameUser = unidecode.unidecode(nameUser)
+                        triggeredUserRegexToAppend = policy + " name cannot contain accented letters"
+                    else:
+                        logger.error("unsupported special regex opperation '%s'", replacement)
+                        exit(1)
+                # use regex
+                else:
+                    newNameUser = self._getUserPattern(regex).sub(replacement, nameUser)
+                    triggeredUserRegexToAppend = regex + "' should be replaced with '" + replacement
+                # this replacement pair triggered
+                if newNameUser != nameUser:
+                    triggeredUserRegex.append(triggeredUserRegexToAppend)
+                nameUser = newNameUser
+            if nameUser != nameWA: # user restriction triggered
+                restrictionTexts.append("User-defined regex: '" + "', '".join(triggeredUserRegex) + "'.")
+        return nameUser, tuple(restrictionTexts)
+
+nameNormalizer = NameNormalizer()
+
 def toCode(NAME_POLICY, code):
     global restrictionTextNamePolicy
     restrictionTextCode = "The code can only contain uppercase letters (in Unicode), numbers, underscores, and hyphens."
     code = code.strip()
-    newCode = re.sub(' ', '_', code, re.UNICODE).upper()
-    newCode = unidecode.unidecode(newCode) #unicodedata.normalize('NFKD', newCode.decode('utf-8')).encode('ASCII', 'ignore')  # remove accents
-    # remove everything that is not unicode letter or hyphen
-    newCode = re.sub('[^\\w-]', '', newCode, re.UNICODE)
+    newCode, _ = nameNormalizer.normalize('code', None, code)
     if newCode != code:
         if NAME_POLICY == 'soft_verbose':
             logger.warning("Illegal value of the code: '%s'- %s", code, restrictionTextCode)
@@ -66,7 +203,6 @@ def normalizeIntentName(intentName):
     return re.sub('[-_]', '', intentName).upper()
 
 
-#TODO uncomplicate
 def toIntentName(NAME_POLICY, userReplacements, *intentSubnames):
     """Concatenates intent names with underscores,
     checks if the intent name satisfies all restrictions given by WA and user.
@@ -77,83 +213,33 @@ def toIntentName(NAME_POLICY, userReplacements, *intentSubnames):
      e.g. userReplacements = [['$special', '\\L'], ['-', '_']] which change all letters to lowercase and replace all hyphens for underscores
     If the name does not satisfy all restrictions, this function will return corrected name and print warning (NAME_POLICY soft_verbose)
     or it will end up with an error (NAME_POLICY hard)"""
-    """Removes all unexpected characters from the intent names, normalize them to upper case and concatenate them with the underscores"""
     global restrictionTextNamePolicy
     restrictionTextIntentName = []
     uNewIntentName = u""
     for intentSubname in intentSubnames:
         if not intentSubname: continue
-        intentSubname = intentSubname.strip()
-        uIntentSubname = intentSubname
-        # apply WA restrictions (https://console.bluemix.net/docs/services/conversation/intents.html#defining-intents)
-        uIntentSubnameWA = re.sub(' ;', '_', uIntentSubname, re.UNICODE) # replace space and ; by underscore
-        uIntentSubnameWA = re.sub(u'[^\\wÀ-ÖØ-öø-ÿĀ-ž-\\.]', '', uIntentSubnameWA, re.UNICODE) # remove everything that is not unicode letter, hyphen or period
-        if uIntentSubnameWA != uIntentSubname: # WA restriction triggered
-            restrictionTextIntentName.append("The intent name can only contain letters (in Unicode), numbers, underscores, hyphens, and periods.")
-        # apply user-defined restrictions
-        uIntentSubnameUser = uIntentSubnameWA
-        if userReplacements:
-            triggeredUserRegex = []
-            # re.sub for all pairs (regex, replacement)
-            for replacementPair in userReplacements:
-                #special case
-                if replacementPair[0].startswith('$'):
-                    if replacementPair[1] == r'\L':
-                        uNewIntentSubnameUser = uIntentSubnameUser.lower()
-                        triggeredUserRegexToAppend = "intent name should be lowercase"
-                    elif replacementPair[1] == r'\U':
-                        uNewIntentSubnameUser = uIntentSubnameUser.upper()
-                        triggeredUserRegexToAppend = "intent name should be uppercase"
-                    elif replacementPair[1] == r'\A':
-                        uNewIntentSubnameUser = unidecode.unidecode(uIntentSubnameUser)
-                        triggeredUserRegexToAppend = "intent name cannot contain accented letters"
-                    else:
-                        logger.error("unsupported special regex opperation '" + replacementPair[1].decode('utf-8'))
-                        exit(1)
-                # use regex
-                else:
-                    uNewIntentSubnameUser = re.sub(replacementPair[0], replacementPair[1], uIntentSubnameUser, re.UNICODE)
-                    triggeredUserRegexToAppend = replacementPair[0] + "' should be replaced with '" + replacementPair[1]
-                # this replacement pair triggered
-                if uNewIntentSubnameUser != uIntentSubnameUser:
-                    triggeredUserRegex.append(triggeredUserRegexToAppend)
-                uIntentSubnameUser = uNewIntentSubnameUser
-            if uIntentSubnameUser != uIntentSubnameWA: # user restriction triggered
-                restrictionTextIntentName.append("User-defined regex: '" + "', '".join(triggeredUserRegex) + "'.")
+        uIntentSubname = intentSubname.strip()
+        uIntentSubnameUser, restrictionTexts = nameNormalizer.normalize('intent', userReplacements, uIntentSubname)
+        restrictionTextIntentName.extend(restrictionTexts)
 
         if uIntentSubnameUser != uIntentSubname:
             if NAME_POLICY == 'soft':
-                uIntentSubnameUser=uIntentSubnameUser; #TBD- delete this when logging is fixed
-                #logger.warning("Illegal value of the intent name: '%s'- %s", uIntentSubname, ' '.join(restrictionTextIntentName).decode('utf-8'))
+                pass #TBD- delete this when logging is fixed
+                #logger.warning("Illegal value of the intent name: '%s'- %s", uIntentSubname, ' '.join(restrictionTextIntentName))
                 #logger.warning("Intent name \'%s\' changed to: '%s'", uIntentSubname, uIntentSubnameUser)
             elif NAME_POLICY == 'hard':
-                logger.error("Illegal value of the intent name: '%s' - %s", uIntentSubname, ' '.join(restrictionTextIntentName).decode('utf-8'))
+                logger.error("Illegal value of the intent name: '%s' - %s", uIntentSubname, ' '.join(restrictionTextIntentName))
                 exit(1)
             else:
                 logger.error("Unknown value of the NAME_POLICY: '%s' - %s", NAME_POLICY, restrictionTextNamePolicy)
                 exit(1)
 
-        #uIntentSubnameNoHash = uIntentSubname[1:] if uIntentSubname.startswith(u'#') else uIntentSubname
-        #uIntentSubnameNoHash = uIntentSubnameUser[1:] if uIntentSubnameUser.startswith(u'#') else uIntentSubname
-
-        # if uIntentSubnameUser != uIntentSubnameNoHash:
-        #     if NAME_POLICY == 'soft_verbose':
-        #         logger.warning("Illegal value of the intent name: '%s' - %s", uIntentSubname, ' '.join(restrictionTextIntentName).decode('utf-8'))
-        #         logger.warning("Intent name \'%s\' changed to: '%s'", uIntentSubname, uIntentSubnameUser)
-        #     elif NAME_POLICY == 'hard':
-        #         logger.error("Illegal value of the intent name: '%s' - %s", uIntentSubname, ' '.join(restrictionTextIntentName).decode('utf-8'))
-        #         exit(1)
-        #     elif NAME_POLICY == 'soft':
-        #         exit(1)
-        #     else:
-        #         logger.error("Unknown value of the NAME_POLICY: '%s' - %s", NAME_POLICY, restrictionTextNamePolicy)
-        #         exit(1)
         if not uIntentSubnameUser:
             logger.error("empty intent name")
             exit(1)
         uNewIntentName = uNewIntentName + u'_' + uIntentSubnameUser if uNewIntentName else uIntentSubnameUser
     return uNewIntentName
-# TODO uncomplicate
+
 def toEntityName(NAME_POLICY, userReplacements, entityName):
     """Checks if the entity name satisfies all restrictions given by WA and user.
     WA replacements:
@@ -164,51 +250,15 @@ def toEntityName(NAME_POLICY, userReplacements, entityName):
     If the name does not satisfy all restrictions, this function will return corrected name and print warning (NAME_POLICY soft)
     or it will end up with an error (NAME_POLICY hard)"""
     global restrictionTextNamePolicy
-    restrictionTextEntityName = []
-    entityName = entityName.strip()
-    uEntityName = entityName
-    # apply WA restrictions (https://console.bluemix.net/docs/services/conversation/entities.html#defining-entities)
-    uEntityNameWA = re.sub(' ', '_', uEntityName, re.UNICODE) # replace spaces with underscores
-    uEntityNameWA = re.sub(u'[^\\wÀ-ÖØ-öø-ÿĀ-ž-]', '', uEntityNameWA, re.UNICODE) # remove everything that is not unicode letter or hyphen
-    if uEntityNameWA != uEntityName: # WA restriction triggered
-        restrictionTextEntityName.append("The entity name can only contain letters (in Unicode), numbers, underscores, and hyphens.")
-    # apply user-defined restrictions
-    uEntityNameUser = uEntityNameWA
-    if userReplacements:
-        triggeredUserRegex = []
-        # re.sub for all pairs (regex, replacement)
-        for replacementPair in userReplacements:
-            #special case
-            if replacementPair[0].startswith('$'):
-                if replacementPair[1] == r'\L':
-                    uNewEntityNameUser = uEntityNameUser.lower()
-                    triggeredUserRegexToAppend = "entity name should be lowercase"
-                elif replacementPair[1] == r'\U':
-                    uNewEntityNameUser = uEntityNameUser.upper()
-                    triggeredUserRegexToAppend = "entity name should be uppercase"
-                elif replacementPair[1] == r'\A':
-                    #uNewIntentSubnameUser = unidecode.unidecode(uEntityNameUser)
-                    triggeredUserRegexToAppend = "entity name cannot contain accented letters"
-                else:
-                    logger.error("unsupported special regex opperation '" + replacementPair[1].decode('utf-8'))
-                    exit(1)
-            # use regex
-            else:
-                uNewEntityNameUser = re.sub(replacementPair[0], replacementPair[1], uEntityNameUser, re.UNICODE)
-                triggeredUserRegexToAppend = replacementPair[0] + "' should be replaced with '" + replacementPair[1]
-            # this replacement pair triggered
-            if uNewEntityNameUser != uEntityNameUser:
-                triggeredUserRegex.append(triggeredUserRegexToAppend)
-            uEntityNameUser = uNewEntityNameUser
-        if uEntityNameUser != uEntityNameWA: # user restriction triggered
-            restrictionTextEntityName.append("User-defined regex: '" + "', '".join(triggeredUserRegex) + "'.")
+    uEntityName = entityName.strip()
+    uEntityNameUser, restrictionTextEntityName = nameNormalizer.normalize('entity', userReplacements, uEntityName)
     # return error or name
     if uEntityNameUser != uEntityName: # allowed name differs from the given one
         if NAME_POLICY == 'soft':
-            logger.warning("Illegal value of the entity name: '%s' - %s", uEntityName, " ".join(restrictionTextEntityName).decode('utf-8'))
+            logger.warning("Illegal value of the entity name: '%s' - %s", uEntityName, " ".join(restrictionTextEntityName))
             logger.warning("Entity name \'%s\' was changed to: '%s'", uEntityName, uEntityNameUser)
         elif NAME_POLICY == 'hard':
-            logger.error("Illegal value of the entity name: '%s' - %s", uEntityName, " ".join(restrictionTextEntityName).decode('utf-8'))
+            logger.error("Illegal value of the entity name: '%s' - %s", uEntityName, " ".join(restrictionTextEntityName))
             exit(1)
         else:
             logger.error("Unknown value of the NAME_POLICY: '%s' - %s", NAME_POLICY, restrictionTextNamePolicy)
@@ -272,28 +322,43 @@ def _fileMatchesPatterns(filename, patterns):
             return True
     return False
 
-def getWorkspaces(workspacesUrl, version, username, password):
+DEFAULT_WORKSPACES_PAGE_LIMIT = 100
+
+def iterateWorkspaces(workspacesUrl, version, username, password, pageLimit=DEFAULT_WORKSPACES_PAGE_LIMIT):
     """
-    Returns a list of all workspaces that match given criteria.
+    Yields all workspaces of the instance. Workspaces are retrieved by pages of 'pageLimit' workspaces,
+    next page is requested (by the cursor returned with the previous one) only when the previous page is consumed.
     """
+    cursor = None
+    while True:
+        parameters = {'version': version, 'page_limit': pageLimit}
+        if cursor:
+            parameters['cursor'] = cursor
+        requestUrl = workspacesUrl + '?' + urlencode(parameters)
+        logger.info("request url: %s", requestUrl)
+        response = httpGet(requestUrl, auth=(username, password))
+        responseJson = response.json()
+        logger.debug("response: %s", responseJson)
+        if errorsInResponse(responseJson):
+            logger.error('Cannot retrieve workspaces.')
+            sys.exit(1)
+        if 'workspaces' not in responseJson:
+            logger.error('No workspaces key in the response')
+            sys.exit(1)
 
-    # get all workspaces
-    requestUrl = workspacesUrl + '?version=' + version
-    logger.info("request url: %s", requestUrl)
-    response = requests.get(requestUrl, auth=(username, password))
-    responseJson = response.json()
-    logger.debug("response: %s", responseJson)
-    if not errorsInResponse(responseJson):
-        logger.info('Workspaces successfully retrieved.')
-    else:
-        logger.error('Cannot retrieve workspaces.')
-        sys.exit(1)
+        for workspace in responseJson['workspaces']:
+            yield workspace
 
-    if 'workspaces' in responseJson:
-        return responseJson['workspaces']
-    else:
-        logger.error('No workspaces key in the response')
-        sys.exit(1)
+        cursor = responseJson.get('pagination', {}).get('next_cursor')
+        if not cursor:
+            logger.info('Workspaces successfully retrieved.')
+            return
+
+def getWorkspaces(workspacesUrl, version, username, password, pageLimit=DEFAULT_WORKSPACES_PAGE_LIMIT):
+    """
+    Returns a list of all workspaces of the instance.
+    """
+    return list(iterateWorkspaces(workspacesUrl, version, username, password, pageLimit))
 
 def filterWorkspaces(config, workspaces):
 
@@ -538,8 +603,162 @@ def replaceValue(sourceJson, target, replacementJson, matchKey = True):
             replacedValuesNumber += 1
     return targetJson, replacedValuesNumber
 
-def getFunctionResponseJson(cloudFunctionsUrl, urlNamespace, username, password, package, functionName, parameters, data):
+def replaceValues(sourceJson, replacements, matchKey = True):
+    """
+    Same as replaceValue, but replaces all the targets at once in one traversal of 'sourceJson'.
+    Only the lists and dicts containing replaced values are copied, unchanged parts of 'sourceJson'
+    are shared by the modified json (sourceJson is not changed). Replacements are not searched for targets.
 
+    Parameters
+    ----------
+    sourceJson : object
+    replacements : dict
+        Keys are targets, values are their replacements.
+    matchKey: boolean
+
+    Returns
+    -------
+    tuple : (targetJson, replacedValuesNumbers)
+        Modified json and dict with number of replacements of each target.
+    """
+    replacedValuesNumbers = dict.fromkeys(replacements, 0)
+
+    def replace(sourceJson):
+        if not sourceJson:
+            return sourceJson
+        if isinstance(sourceJson, (list, dict)):
+            targetJson = None # copy is created by the first change
+            for key, item in (enumerate(sourceJson) if isinstance(sourceJson, list) else sourceJson.items()):
+                if matchKey and isinstance(sourceJson, dict) and key in replacements:
+                    rJson = copy.deepcopy(replacements[key])
+                    replacedValuesNumbers[key] += 1
+                else:
+                    rJson = replace(item)
+                if rJson is not item:
+                    if targetJson is None:
+                        targetJson = copy.copy(sourceJson)
+                    targetJson[key] = rJson
+            return sourceJson if targetJson is None else targetJson
+        if not matchKey and sourceJson in replacements:
+            replacedValuesNumbers[sourceJson] += 1
+            return copy.deepcopy(replacements[sourceJson])
+        return sourceJson
+
+    return (replace(sourceJson) if replacements else sourceJson), replacedValuesNumbers
+
+class ActivationPolling(object):
+    """Strategy of polling for the result of not finished function activation. The first delay is short, following
+    delays grow exponentially up to the maximal delay and every delay is randomized by jitter, so the results of
+    many activations are not requested at the same moment. Polling is given up when the next request would be
+    after the deadline (measured from the first request).
+    """
+
+    def __init__(self, initialDelay=1.0, maxDelay=10.0, backoffFactor=2.0, jitter=0.2, deadline=30.0):
+        self.initialDelay = initialDelay # in seconds
+        self.maxDelay = maxDelay # in seconds
+        self.backoffFactor = backoffFactor
+        self.jitter = jitter # delay is multiplied by random number from <1 - jitter, 1 + jitter>
+        self.deadline = deadline # in seconds
+
+    @classmethod
+    def fromConfig(cls, config, prefix='cloudfunctions_poll', default=None):
+        """Creates the strategy from the configuration, all the parameters are optional (parameters of 'default'
+        strategy are used):
+            <prefix>_initial_delay, <prefix>_max_delay, <prefix>_backoff_factor, <prefix>_jitter, <prefix>_deadline
+        """
+        default = default or cls()
+        return cls(float(getattr(config, prefix + '_initial_delay', default.initialDelay)),
+                   float(getattr(config, prefix + '_max_delay', default.maxDelay)),
+                   float(getattr(config, prefix + '_backoff_factor', default.backoffFactor)),
+                   float(getattr(config, prefix + '_jitter', default.jitter)),
+                   float(getattr(config, prefix + '_deadline', default.deadline)))
+
+    def delays(self):
+        """Yields delays (in seconds) before the following requests until the deadline."""
+        start = time.monotonic()
+        delaysSum = 0
+        delay = self.initialDelay
+        while True:
+            jitteredDelay = delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+            # time spent by the requests counts as well as the delays themselves
+            if max(time.monotonic() - start, delaysSum) + jitteredDelay > self.deadline:
+                return
+            yield jitteredDelay
+            delaysSum += jitteredDelay
+            delay = min(delay * self.backoffFactor, self.maxDelay)
+
+activationPolling = ActivationPolling()
+
+def configureActivationPolling(config):
+    """Sets the default strategy of polling for the activation results from the configuration (see ActivationPolling.fromConfig)."""
+    global activationPolling
+    activationPolling = ActivationPolling.fromConfig(config)
+
+# the same strategy is used for polling for the end of workspace training, training takes longer than function call
+DEFAULT_WORKSPACE_POLLING = ActivationPolling(initialDelay=1.0, maxDelay=10.0, backoffFactor=1.5, jitter=0.1, deadline=5 * 60)
+workspacePolling = DEFAULT_WORKSPACE_POLLING
+
+# workspace statuses which do not change without another update of the workspace
+WORKSPACE_FINAL_STATUSES = ['Available', 'Failed']
+
+def configureWorkspacePolling(config):
+    """Sets the default strategy of polling for the workspace status from the configuration, parameters are the same
+    as the ActivationPolling.fromConfig ones with 'conversation_poll' prefix (e.g. conversation_poll_deadline)."""
+    global workspacePolling
+    workspacePolling = ActivationPolling.fromConfig(config, 'conversation_poll', DEFAULT_WORKSPACE_POLLING)
+
+def _waitForWorkspace(workspacesUrl, version, username, password, workspaceId, polling):
+    """Polls for the workspace status until the workspace is available (or the status is final or the deadline is
+    reached), returns the last status. Number of responses with each status and the waiting time are logged."""
+    requestUrl = workspacesUrl + '/' + workspaceId + '?version=' + version
+    start = time.monotonic()
+    statusCounts = collections.Counter()
+    delays = polling.delays()
+    while True:
+        logger.debug("requestUrl: %s", requestUrl)
+        response = httpGet(requestUrl, auth=(username, password))
+        if response.status_code == 200:
+            status = response.json()['status']
+            statusCounts[status] += 1
+            if status in WORKSPACE_FINAL_STATUSES:
+                break
+        else:
+            # unknown status code is also polled again, too many requests and server errors are retried by httpCommons
+            status = None
+            statusCounts['error ' + str(response.status_code)] += 1
+            if response.status_code in [400, 401, 403, 404]:
+                logger.error('Cannot get status of workspace %s, status code: %s', workspaceId, response.status_code)
+                break
+        delay = next(delays, None)
+        if delay is None:
+            logger.error('Workspace %s has not become available before timeout, timeout: %d s', workspaceId, polling.deadline)
+            break
+        time.sleep(delay)
+    logger.info('WCS WORKSPACE STATUS: %s (workspace %s, waited %.1f s, %s)', status, workspaceId,
+                time.monotonic() - start, ', '.join('%s: %d' % item for item in sorted(statusCounts.items())))
+    return status
+
+def waitUntilAvailable(workspacesUrl, version, username, password, workspaceIds, polling=None):
+    """
+    Waits until the workspaces are trained. Statuses of the workspaces are polled in parallel, delays between
+    the requests grow exponentially up to the deadline given by polling strategy (default is workspacePolling).
+    Returns dictionary {<workspace id>: <last status>}, status is 'Available' for the workspaces which are ready
+    and None if the status could not be retrieved.
+    """
+    polling = polling or workspacePolling
+    if len(workspaceIds) == 1:
+        return {workspaceIds[0]: _waitForWorkspace(workspacesUrl, version, username, password, workspaceIds[0], polling)}
+    with ThreadPoolExecutor(max_workers=len(workspaceIds)) as executor:
+        statuses = executor.map(lambda workspaceId: _waitForWorkspace(workspacesUrl, version, username, password,
+                                                                      workspaceId, polling),
+                                workspaceIds)
+        return dict(zip(workspaceIds, statuses))
+
+def invokeFunction(cloudFunctionsUrl, urlNamespace, username, password, package, functionName, parameters, data):
+    """
+    Calls the function and waits for its result. Returns tuple (function result json, None), or (None, activation id)
+    if the function did not finish in time and its result has to be retrieved later by getActivationResultJson.
+    """
     functionUrl = cloudFunctionsUrl + '/' + urlNamespace + '/actions/' + package + '/' + functionName
     url_parts = list(urlparse(functionUrl))
     params = {'blocking':True, 'result': True} # wait for result and return only result
@@ -549,10 +768,10 @@ def getFunctionResponseJson(cloudFunctionsUrl, urlNamespace, username, password,
 
     logger.info("Calling function url '%s'", functionCallUrl)
 
-    functionResponse = requests.post(functionCallUrl, auth=(username, password),
-                                 headers={'Content-Type': 'application/json',
-                                          'accept': 'application/json'},
-                                 data=json.dumps(data, ensure_ascii=False).encode('utf8'))
+    functionResponse = httpPost(functionCallUrl, auth=(username, password),
+                            headers={'Content-Type': 'application/json',
+                                     'accept': 'application/json'},
+                            data=json.dumps(data, ensure_ascii=False).encode('utf8'))
 
     if functionResponse.status_code == 200:
 
@@ -568,72 +787,14 @@ def getFunctionResponseJson(cloudFunctionsUrl, urlNamespace, username, password,
             logger.error(exception)
             raise exception
 
-        return functionResponse.json()
+        return functionResponse.json(), None
 
     elif functionResponse.status_code == 202: # try once more
         # 202 Accepted activation request (should not happen while sending 'blocking=true&result=true')
         logger.warning("Did not receive response from function '%s' in package '%s', trying once more.", functionName, package)
         logger.info(json.dumps(functionResponse.json()))
         responseJson = functionResponse.json()
-        activationId = responseJson['activationId']
-        functionCallUrl = cloudFunctionsUrl + '/' + urlNamespace + '/activations/' + activationId + '/result'
-        max_attempts = 4
-        sleep_after_failure = 10
-        while True:
-            logger.info("Trying to get function result from url '%s'", functionCallUrl)
-            functionResponse = requests.get(functionCallUrl, auth=(username, password),
-                                        headers={})
-            if functionResponse.status_code == 200:
-
-                responseContentType = functionResponse.headers.get('content-type')
-                if responseContentType != 'application/json':
-                    exception = CFCallException(
-                        functionName, 
-                        package, 
-                        functionResponse, 
-                        "Response content type is not json",
-                        None,
-                        {'activationId': activationId, 'contentType': responseContentType})
-                    logger.error(exception)
-                    raise exception
-
-                responseJson = functionResponse.json()
-                if isinstance(responseJson, dict) and 'result' in responseJson:
-                    if isinstance(responseJson['result'], dict) and 'payload' in responseJson['result']:
-                        return responseJson['result']['payload']
-                    else:
-                        return responseJson['result']
-                else:
-                    exception = CFCallException(
-                        functionName, 
-                        package, 
-                        functionResponse, 
-                        "Bad response format received", 
-                        "expected was {\"result\":{\"payload\":\"<function_payload>\"}}", 
-                        {'activationId': activationId})
-                    logger.error(exception)
-                    raise exception
-            elif functionResponse.status_code == 404:
-                max_attempts = max_attempts - 1
-                if not max_attempts:
-                    logger.info("Results not ready. Giving up.")
-                    break
-                logger.info("Results not ready. Waiting for %d before retrying.", sleep_after_failure)
-                time.sleep(sleep_after_failure)
-            elif functionResponse.status_code in [403, 408]: # not so serious errors, the next request may be fine
-                # 403 Forbidden (could be just for specific package or function)
-                # 408 Request Timeout (could happen e.g. for CF that requests some REST APIs, e.g. Discovery service)
-                exception = CFCallStatusException(functionName, package, functionResponse, {'activationId': activationId})
-                logger.error(exception)
-                raise exception
-            else: # serious errors, stop the process
-                # 401 Unauthorized (while we use same credentials for all tests then we want to end after the first test returns bad authentification)
-                # 500 Internal Server Error (could happen that IBM Cloud has several issue and is not able to handle incoming requests,
-                # then it would be probably same for all requests)
-                # 502 Bad Gateway (when the CF raises exception, e.g. bad params were provided)
-                exception = CFCallStatusException(functionName, package, functionResponse, {'activationId': activationId})
-                logger.critical(exception)
-                sys.exit(1)
+        return None, responseJson['activationId']
 
     elif functionResponse.status_code in [403, 404, 408]: # not so serious errors, the next request may be fine
         # 403 Forbidden (could be just for specific package or function)
@@ -651,6 +812,123 @@ def getFunctionResponseJson(cloudFunctionsUrl, urlNamespace, username, password,
         logger.critical(exception)
         sys.exit(1)
 
+def getActivationResultJson(cloudFunctionsUrl, urlNamespace, username, password, package, functionName, activationId):
+    """
+    Returns tuple (True, function result json) if the function activation has finished, (False, None) otherwise.
+    """
+    functionCallUrl = cloudFunctionsUrl + '/' + urlNamespace + '/activations/' + activationId + '/result'
+    logger.info("Trying to get function result from url '%s'", functionCallUrl)
+    functionResponse = httpGet(functionCallUrl, auth=(username, password),
+                           headers={})
+    if functionResponse.status_code == 200:
+
+        responseContentType = functionResponse.headers.get('content-type')
+        if responseContentType != 'application/json':
+            exception = CFCallException(
+                functionName, 
+                package, 
+                functionResponse, 
+                "Response content type is not json",
+                None,
+                {'activationId': activationId, 'contentType': responseContentType})
+            logger.error(exception)
+            raise exception
+
+        responseJson = functionResponse.json()
+        if isinstance(responseJson, dict) and 'result' in responseJson:
+            if isinstance(responseJson['result'], dict) and 'payload' in responseJson['result']:
+                return True, responseJson['result']['payload']
+            else:
+                return True, responseJson['result']
+        else:
+            exception = CFCallException(
+                functionName, 
+                package, 
+                functionResponse, 
+                "Bad response format received", 
+                "expected was {\"result\":{\"payload\":\"<function_payload>\"}}", 
+                {'activationId': activationId})
+            logger.error(exception)
+            raise exception
+    elif functionResponse.status_code == 404:
+        return False, None
+    elif functionResponse.status_code in [403, 408]: # not so serious errors, the next request may be fine
+        # 403 Forbidden (could be just for specific package or function)
+        # 408 Request Timeout (could happen e.g. for CF that requests some REST APIs, e.g. Discovery service)
+        exception = CFCallStatusException(functionName, package, functionResponse, {'activationId': activationId})
+        logger.error(exception)
+        raise exception
+    else: # serious errors, stop the process
+        # 401 Unauthorized (while we use same credentials for all tests then we want to end after the first test returns bad authentification)
+        # 500 Internal Server Error (could happen that IBM Cloud has several issue and is not able to handle incoming requests,
+        # then it would be probably same for all requests)
+        # 502 Bad Gateway (when the CF raises exception, e.g. bad params were provided)
+        exception = CFCallStatusException(functionName, package, functionResponse, {'activationId': activationId})
+        logger.critical(exception)
+        sys.exit(1)
+
+def getActivationResultsJson(cloudFunctionsUrl, urlNamespace, username, password, activations, polling=None):
+    """
+    Polls for the results of many function activations together, in every round the results of all
+    the not finished activations are requested and then one delay given by the polling strategy follows.
+
+    Args:
+        activations (dict): key: activation id, value: tuple (package, function name)
+        polling (ActivationPolling): strategy of the polling, default strategy is used if not given
+    Returns:
+        dict with activation ids as keys and function result jsons as values (None if the activation did not finish before the deadline)
+    """
+    delays = (polling or activationPolling).delays()
+    pendingActivations = dict(activations)
+    resultsJson = {}
+    while True:
+        for activationId, (package, functionName) in list(pendingActivations.items()):
+            isFinished, resultJson = getActivationResultJson(cloudFunctionsUrl, urlNamespace, username, password, package, functionName, activationId)
+            if isFinished:
+                resultsJson[activationId] = resultJson
+                del pendingActivations[activationId]
+        if not pendingActivations:
+            return resultsJson
+        delay = next(delays, None)
+        if delay is None:
+            logger.info("Results of %d activations not ready. Giving up.", len(pendingActivations))
+            for activationId in pendingActivations:
+                resultsJson[activationId] = None
+            return resultsJson
+        logger.info("Results of %d activations not ready. Waiting for %.2f s before retrying.", len(pendingActivations), delay)
+        time.sleep(delay)
+
+def getFunctionResponseJson(cloudFunctionsUrl, urlNamespace, username, password, package, functionName, parameters, data, polling=None):
+
+    responseJson, activationId = invokeFunction(cloudFunctionsUrl, urlNamespace, username, password, package, functionName, parameters, data)
+    if activationId is None:
+        return responseJson
+    return getActivationResultsJson(cloudFunctionsUrl, urlNamespace, username, password, {activationId: (package, functionName)}, polling)[activationId]
+
+async def getFunctionResponseJsonAsync(executor, cloudFunctionsUrl, urlNamespace, username, password, package, functionName, parameters, data, polling=None):
+    """
+    Coroutine version of getFunctionResponseJson. Requests are sent by the threads of the executor
+    and waiting for the activation result does not block the event loop, so other functions can be called meanwhile.
+    """
+    loop = asyncio.get_running_loop()
+    responseJson, activationId = await loop.run_in_executor(executor, functools.partial(
+        invokeFunction, cloudFunctionsUrl, urlNamespace, username, password, package, functionName, parameters, data))
+    if activationId is None:
+        return responseJson
+
+    delays = (polling or activationPolling).delays()
+    while True:
+        isFinished, responseJson = await loop.run_in_executor(executor, functools.partial(
+            getActivationResultJson, cloudFunctionsUrl, urlNamespace, username, password, package, functionName, activationId))
+        if isFinished:
+            return responseJson
+        delay = next(delays, None)
+        if delay is None:
+            logger.info("Results not ready. Giving up.")
+            return None
+        logger.info("Results not ready. Waiting for %.2f s before retrying.", delay)
+        await asyncio.sleep(delay)
+
 def getTimestampInMillis():
     return int(round(time.time() * 1000))    
 
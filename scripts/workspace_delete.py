@@ -17,13 +17,14 @@ import argparse
 import logging
 import os
 import sys
-
-import requests
+from concurrent.futures import ThreadPoolExecutor
 
 from cfgCommons import Cfg
-from wawCommons import (errorsInResponse, filterWorkspaces,
-                        getOptionalParameter, getRequiredParameter,
-                        getScriptLogger, getWorkspaces, setLoggerConfig)
+from httpCommons import DEFAULT_POOL_SIZE, configureHttp, httpDelete
+from wawCommons import (DEFAULT_WORKSPACES_PAGE_LIMIT, errorsInResponse,
+                        filterWorkspaces, getOptionalParameter,
+                        getRequiredParameter, getScriptLogger,
+                        iterateWorkspaces, setLoggerConfig)
 
 logger = getScriptLogger(__file__)
 
@@ -40,6 +41,8 @@ def main(argv):
     parser.add_argument('-wn','--conversation_workspace_name', required=False, help='name of the workspace')
     parser.add_argument('-wnm','--conversation_workspace_match_by_name', required=False, help='true if the workspace name should be matched by name (or pattern if defined)')
     parser.add_argument('-wnp','--conversation_workspace_name_pattern', required=False, help='regex pattern specifying a name of workspaces to be deleted')
+    parser.add_argument('-wdc','--conversation_delete_concurrency', type=int, required=False, help='number of workspaces deleted in parallel (default 1), all the matched workspaces are deleted even if some deletions fail when it is greater than 1')
+    parser.add_argument('-wpl','--conversation_page_limit', type=int, required=False, help='number of workspaces retrieved by one request when the workspaces are listed (default ' + str(DEFAULT_WORKSPACES_PAGE_LIMIT) + ')')
     parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
     args = parser.parse_args(argv)
@@ -48,40 +51,63 @@ def main(argv):
         setLoggerConfig(args.log, args.verbose)
 
     config = Cfg(args)
+    concurrency = int(getOptionalParameter(config, 'conversation_delete_concurrency') or 1)
+    if concurrency < 1:
+        logger.error('Concurrency has to be positive number, concurrency: %d', concurrency)
+        sys.exit(1)
+    if not hasattr(config, 'common_http_pool_size'):
+        # keep connection for every thread
+        config.common_http_pool_size = max(DEFAULT_POOL_SIZE, concurrency)
+    configureHttp(config)
 
     # load credentials
     version = getRequiredParameter(config, 'conversation_version')
     workspacesUrl = getRequiredParameter(config, 'conversation_url')
     username = getRequiredParameter(config, 'conversation_username')
     password = getRequiredParameter(config, 'conversation_password')
+    pageLimit = int(getOptionalParameter(config, 'conversation_page_limit') or DEFAULT_WORKSPACES_PAGE_LIMIT)
     try:
-        workspaces = filterWorkspaces(config, getWorkspaces(workspacesUrl, version, username, password))
+        workspaces = filterWorkspaces(config, iterateWorkspaces(workspacesUrl, version, username, password,
+                                                                pageLimit))
     except SystemExit:
         logger.error("Failed to retrieve workspaces to delete.")
         sys.exit(1)
 
-    nWorkspacesDeleted = 0
-    for workspace in workspaces:
-        # delete workspace
+    def deleteWorkspace(workspace):
+        """Deletes the workspace, returns status code of the response."""
         requestUrl = workspacesUrl + '/' + workspace['workspace_id'] + '?version=' + version
-        response = requests.delete(requestUrl, auth=(username, password), headers={'Accept': 'text/html'})
+        response = httpDelete(requestUrl, auth=(username, password), headers={'Accept': 'text/html'})
         responseJson = response.json()
         # check errors during upload
         errorsInResponse(responseJson)
+        return response.status_code
 
-        if response.status_code == 200:
-            nWorkspacesDeleted += 1
-            logger.info("Workspace '%s' was successfully deleted", workspace['name'])
-            # delete workspaceId from config file
-            if hasattr(config, 'conversation_workspace_id'):
-                delattr(config, 'conversation_workspace_id')
-        elif response.status_code == 400:
-            logger.error("Error while deleting workspace  '%s', status code '%s' (invalid request)", workspace['name'], response.status_code)
-            if workspace['name'] != 'My first skill':
-                sys.exit(1)
-        else:
-            logger.error("Error while deleting workspace  '%s', status code '%s'", workspace['name'], response.status_code)
-            sys.exit(1)
+    nWorkspacesDeleted = 0
+    failedWorkspaceNames = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # workspaces are deleted one by one unless concurrency is set, the first error stops the deletion then
+        statusCodes = executor.map(deleteWorkspace, workspaces) if concurrency > 1 else map(deleteWorkspace, workspaces)
+        for workspace, statusCode in zip(workspaces, statusCodes):
+            if statusCode == 200:
+                nWorkspacesDeleted += 1
+                logger.info("Workspace '%s' was successfully deleted", workspace['name'])
+                # delete workspaceId from config file
+                if hasattr(config, 'conversation_workspace_id'):
+                    delattr(config, 'conversation_workspace_id')
+                continue
+            elif statusCode == 400:
+                logger.error("Error while deleting workspace  '%s', status code '%s' (invalid request)", workspace['name'], statusCode)
+                if workspace['name'] == 'My first skill':
+                    continue
+            else:
+                logger.error("Error while deleting workspace  '%s', status code '%s'", workspace['name'], statusCode)
+            failedWorkspaceNames.append(workspace['name'])
+            if concurrency == 1:
+                break
+
+    if failedWorkspaceNames:
+        logger.critical("Cannot delete workspaces: %s", ', '.join(failedWorkspaceNames))
+        sys.exit(1)
 
     if not nWorkspacesDeleted:
         logger.info("No workspace has been deleted")
@@ -15,18 +15,19 @@ limitations under the License.
 
 import argparse
 import datetime
+import hashlib
 import json
 import logging
 import os
 import sys
-
-import requests
+from urllib.parse import quote
 
 from cfgCommons import Cfg
-from wawCommons import (errorsInResponse, filterWorkspaces,
-                        getOptionalParameter, getRequiredParameter,
-                        getScriptLogger, getWorkspaces, openFile,
-                        setLoggerConfig)
+from httpCommons import configureHttp, httpDelete, httpGet, httpPost
+from wawCommons import (configureWorkspacePolling, errorsInResponse,
+                        filterWorkspaces, getOptionalParameter,
+                        getRequiredParameter, getScriptLogger, getWorkspaces,
+                        openFile, setLoggerConfig, waitUntilAvailable)
 
 logger = getScriptLogger(__file__)
 
@@ -35,6 +36,139 @@ try:
 except NameError:
     unicode = str  # Python 3
 
+# artifacts which can be deployed separately by delta deployment: (workspace key, key of the artifact)
+DELTA_ARTIFACTS = [('intents', 'intent'), ('entities', 'entity'), ('counterexamples', 'text'), ('dialog_nodes', 'dialog_node')]
+# workspace settings, the whole workspace is deployed when they are changed
+WORKSPACE_SETTINGS = ['name', 'description', 'language', 'metadata', 'learning_opt_out', 'system_settings']
+# fields added by the service to the exported workspace
+AUDIT_FIELDS = ['created', 'updated']
+# default values of the artifact fields, the service adds them to the exported workspace ('values' are entity values)
+DEFAULT_FIELDS = {'entities': {'fuzzy_match': False}, 'values': {'type': 'synonyms'},
+                  'dialog_nodes': {'type': 'standard', 'disabled': False}}
+# maximal number of the changes deployed separately, the whole workspace is deployed when there are more of them
+DELTA_MAX_CHANGES = 50
+# dialog node fields determining the position of the node in the dialog tree
+DIALOG_STRUCTURE_FIELDS = ['parent', 'previous_sibling']
+# key of the workspace metadata with fingerprint of the deployed workspace
+FINGERPRINT_METADATA_KEY = 'wawFingerprint'
+
+def dumpsCompact(data):
+    """Serializes data for the requests, without whitespace."""
+    return json.dumps(data, separators=(',', ':'))
+
+def _normalize(data):
+    """Returns copy of the data without audit fields and empty values, which are left out or added by the service."""
+    if isinstance(data, dict):
+        return {key: _normalize(value) for key, value in data.items()
+                if key not in AUDIT_FIELDS and value not in (None, {}, [])}
+    if isinstance(data, list):
+        return [_normalize(item) for item in data]
+    return data
+
+def _withoutDefaults(artifact, workspaceKey):
+    """Returns copy of the artifact without fields with default values (see DEFAULT_FIELDS)."""
+    defaults = DEFAULT_FIELDS.get(workspaceKey, {})
+    artifact = {key: value for key, value in artifact.items() if key not in defaults or value != defaults[key]}
+    if workspaceKey == 'entities' and artifact.get('values'):
+        artifact['values'] = [_withoutDefaults(value, 'values') for value in artifact['values']]
+    return artifact
+
+def _withoutFingerprint(metadata):
+    if not metadata or FINGERPRINT_METADATA_KEY not in metadata:
+        return metadata
+    return {key: value for key, value in metadata.items() if key != FINGERPRINT_METADATA_KEY}
+
+def getWorkspaceFingerprint(workspace):
+    """
+    Returns hash of the canonical form of the workspace. The canonical form does not depend on the order of the keys,
+    on the order of the intents, entities, counterexamples and dialog nodes and on the dialog node titles equal
+    to the node ids (generated ones). Fingerprint stored in the workspace metadata is ignored.
+    """
+    canonicalWorkspace = dict(workspace)
+    canonicalWorkspace['metadata'] = _withoutFingerprint(workspace.get('metadata'))
+    for workspaceKey, artifactKey in DELTA_ARTIFACTS:
+        canonicalWorkspace[workspaceKey] = sorted(workspace.get(workspaceKey) or [], key=lambda artifact: artifact[artifactKey])
+    canonicalWorkspace['dialog_nodes'] = [
+        {key: value for key, value in node.items() if key != 'title' or value != node['dialog_node']}
+        for node in canonicalWorkspace['dialog_nodes']]
+    canonicalJson = json.dumps(canonicalWorkspace, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonicalJson.encode('utf-8')).hexdigest()
+
+def getWorkspaceDelta(deployedWorkspace, workspace, maxChanges=DELTA_MAX_CHANGES):
+    """
+    Compares the exported deployed workspace with the workspace to deploy.
+    Returns dictionary {<workspace key>: (created artifacts, updated artifacts, keys of deleted artifacts)}
+    for each of the DELTA_ARTIFACTS or None if the whole workspace has to be deployed (settings changed,
+    the dialog tree changed its structure or there are more than maxChanges changes).
+    """
+    for setting in WORKSPACE_SETTINGS:
+        deployedValue, value = deployedWorkspace.get(setting), workspace.get(setting)
+        if setting == 'metadata':
+            deployedValue, value = _withoutFingerprint(deployedValue), _withoutFingerprint(value)
+        # missing settings are the same as the empty ones
+        if (_normalize(deployedValue) or None) != (_normalize(value) or None):
+            logger.info("Workspace setting '%s' changed, the whole workspace will be deployed.", setting)
+            return None
+
+    delta = {}
+    for workspaceKey, artifactKey in DELTA_ARTIFACTS:
+        deployedArtifacts = {artifact[artifactKey]: artifact for artifact in deployedWorkspace.get(workspaceKey, [])}
+        artifacts = {artifact[artifactKey]: artifact for artifact in workspace.get(workspaceKey, [])}
+        created = [artifact for key, artifact in artifacts.items() if key not in deployedArtifacts]
+        updated = [artifact for key, artifact in artifacts.items() if key in deployedArtifacts and
+                   _normalize(_withoutDefaults(artifact, workspaceKey)) != _normalize(_withoutDefaults(deployedArtifacts[key], workspaceKey))]
+        deleted = [key for key in deployedArtifacts if key not in artifacts]
+        delta[workspaceKey] = (created, updated, deleted)
+
+    # created and deleted nodes change position of the other nodes, the order of the changes matters then
+    createdNodes, updatedNodes, deletedNodes = delta['dialog_nodes']
+    if createdNodes or deletedNodes:
+        logger.info("Dialog nodes were added or removed, the whole workspace will be deployed.")
+        return None
+    deployedNodes = {node['dialog_node']: node for node in deployedWorkspace.get('dialog_nodes', [])}
+    for node in updatedNodes:
+        for field in DIALOG_STRUCTURE_FIELDS:
+            if node.get(field) != deployedNodes[node['dialog_node']].get(field):
+                logger.info("Dialog node '%s' was moved, the whole workspace will be deployed.", node['dialog_node'])
+                return None
+
+    # one request per change is slower than the deployment of the whole workspace when there are many changes
+    changesCount = sum(len(created) + len(updated) + len(deleted) for created, updated, deleted in delta.values())
+    if changesCount > maxChanges:
+        logger.info("There are %d changes of the workspace (more than %d), the whole workspace will be deployed.", changesCount, maxChanges)
+        return None
+    return delta
+
+def deployWorkspaceDelta(workspaceUrl, version, username, password, delta):
+    """
+    Deploys the changed artifacts of the workspace by their own endpoints. New and updated intents, entities
+    and counterexamples are deployed before the dialog nodes (which can use them) and deleted after them.
+    Returns True if all the changes were deployed.
+    """
+    changes = []  # (method, url, payload)
+    for workspaceKey, artifactKey in DELTA_ARTIFACTS:
+        created, updated, _ = delta[workspaceKey]
+        artifactsUrl = workspaceUrl + '/' + workspaceKey
+        changes.extend(('POST', artifactsUrl, artifact) for artifact in created)
+        changes.extend(('POST', artifactsUrl + '/' + quote(artifact[artifactKey], safe=''), artifact) for artifact in updated)
+    for workspaceKey, _ in DELTA_ARTIFACTS:
+        changes.extend(('DELETE', workspaceUrl + '/' + workspaceKey + '/' + quote(key, safe=''), None)
+                        for key in delta[workspaceKey][2])
+
+    for method, url, payload in changes:
+        requestUrl = url + '?version=' + version
+        logger.verbose("%s %s", method, requestUrl)
+        if method == 'POST':
+            response = httpPost(requestUrl, auth=(username, password), headers={'Content-Type': 'application/json'},
+                                data=dumpsCompact(payload))
+        else:
+            response = httpDelete(requestUrl, auth=(username, password))
+        if errorsInResponse(response.json()):
+            logger.error('Cannot deploy change of the workspace: %s %s', method, url)
+            return False
+    logger.info('%d changes of the workspace deployed.', len(changes))
+    return True
+
 def main(argv):
     parser = argparse.ArgumentParser(description="Deploys a workspace in json format\
      to the Watson Conversation Service. If there is no 'conversation_workspace_id' provided\
@@ -52,6 +186,10 @@ def main(argv):
     parser.add_argument('-cid','--conversation_workspace_id', required=False, help='workspace_id of the application. If a workspace id is provided, previous workspace content is overwritten, otherwise a new workspace is created ')
     parser.add_argument('-wn','--conversation_workspace_name', required=False, help='name of the workspace')
     parser.add_argument('-wnu','--conversation_workspace_name_unique', required=False, help='true if the workspace name should be unique across apecified assistant')
+    parser.add_argument('-wf','--conversation_workspace_force_deploy', required=False, help='true if the workspace should be deployed even if its fingerprint is the same as the fingerprint of the deployed one')
+    parser.add_argument('-wd','--conversation_workspace_delta_deploy', required=False, help='true if only changed intents, entities, counterexamples and dialog nodes should be deployed to the existing workspace')
+    parser.add_argument('-wdm','--conversation_workspace_delta_max_changes', required=False, help='maximal number of the changes deployed by delta deployment, the whole workspace is deployed when there are more of them (default is %d)' % DELTA_MAX_CHANGES)
+    parser.add_argument('-wa','--conversation_wait_until_available', required=False, help='true if the script should wait until the deployed workspace is trained')
     parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
     args = parser.parse_args(argv)
@@ -60,6 +198,8 @@ def main(argv):
         setLoggerConfig(args.log, args.verbose)
 
     config = Cfg(args)
+    configureHttp(config)
+    configureWorkspacePolling(config)
     logger.info('STARTING: ' + os.path.basename(__file__))
 
     # workspace info
@@ -97,18 +237,59 @@ def main(argv):
         workspaceId = ""
         logger.info("Creating new workspace.")
 
-    requestUrl = workspacesUrl + '/' + workspaceId + '?version=' + version
+    # fingerprint of the deployed workspace is kept in its metadata, the same workspace is not deployed again
+    fingerprint = getWorkspaceFingerprint(workspace)
+    workspace['metadata'] = dict(workspace.get('metadata') or {})
+    workspace['metadata'][FINGERPRINT_METADATA_KEY] = fingerprint
+    isUnchanged = (workspaceId and (workspaces[0].get('metadata') or {}).get(FINGERPRINT_METADATA_KEY) == fingerprint
+                   and getOptionalParameter(config, 'conversation_workspace_force_deploy') not in ["true", "True"])
 
-    # create/update workspace
-    response = requests.post(requestUrl, auth=(username, password), headers={'Content-Type': 'application/json'}, data=json.dumps(workspace, indent=4))
-    responseJson = response.json()
+    delta = None
+    if not isUnchanged and workspaceId and getOptionalParameter(config, 'conversation_workspace_delta_deploy') in ["true", "True"]:
+        requestUrl = workspacesUrl + '/' + workspaceId + '?version=' + version + '&export=true'
+        response = httpGet(requestUrl, auth=(username, password))
+        responseJson = response.json()
+        if errorsInResponse(responseJson):
+            logger.error('Cannot export deployed workspace.')
+            sys.exit(1)
+        maxChanges = int(getOptionalParameter(config, 'conversation_workspace_delta_max_changes') or DELTA_MAX_CHANGES)
+        delta = getWorkspaceDelta(responseJson, workspace, maxChanges)
 
-    logger.verbose("response: %s", responseJson)
-    if not errorsInResponse(responseJson):
+    if isUnchanged:
+        logger.info("Workspace is not changed (fingerprint %s), it is not uploaded.", fingerprint)
+        responseJson = {'workspace_id': workspaceId}
+    elif delta is not None:
+        # deploy only the changes and the new fingerprint
+        if not deployWorkspaceDelta(workspacesUrl + '/' + workspaceId, version, username, password, delta):
+            logger.error('Cannot upload workspace.')
+            sys.exit(1)
+        requestUrl = workspacesUrl + '/' + workspaceId + '?version=' + version
+        response = httpPost(requestUrl, auth=(username, password), headers={'Content-Type': 'application/json'},
+                            data=dumpsCompact({'metadata': workspace['metadata']}))
+        responseJson = response.json()
+        if errorsInResponse(responseJson):
+            logger.error('Cannot upload workspace metadata.')
+            sys.exit(1)
         logger.info('Workspace successfully uploaded.')
     else:
-        logger.error('Cannot upload workspace.')
-        sys.exit(1)
+        requestUrl = workspacesUrl + '/' + workspaceId + '?version=' + version
+
+        # create/update workspace
+        response = httpPost(requestUrl, auth=(username, password), headers={'Content-Type': 'application/json'}, data=dumpsCompact(workspace))
+        responseJson = response.json()
+
+        logger.verbose("response: %s", responseJson)
+        if not errorsInResponse(responseJson):
+            logger.info('Workspace successfully uploaded.')
+        else:
+            logger.error('Cannot upload workspace.')
+            sys.exit(1)
+
+    if getOptionalParameter(config, 'conversation_wait_until_available') in ["true", "True"]:
+        status = waitUntilAvailable(workspacesUrl, version, username, password, [responseJson['workspace_id']])[responseJson['workspace_id']]
+        if status != 'Available':
+            logger.error('Workspace is not available, status: %s', status)
+            sys.exit(1)
 
     if not getOptionalParameter(config, 'conversation_workspace_id'):
         setattr(config, 'conversation_workspace_id', responseJson['workspace_id'])
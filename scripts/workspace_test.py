@@ -18,20 +18,78 @@ import json
 import logging
 import os
 import sys
-import time
-
-import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from cfgCommons import Cfg
-from wawCommons import (errorsInResponse, filterWorkspaces,
-                        getRequiredParameter, getScriptLogger, getWorkspaces,
-                        openFile, setLoggerConfig)
+from httpCommons import DEFAULT_POOL_SIZE, configureHttp, httpPost
+from wawCommons import (configureWorkspacePolling, errorsInResponse,
+                        filterWorkspaces, getRequiredParameter,
+                        getScriptLogger, getWorkspaces, openFile,
+                        setLoggerConfig, waitUntilAvailable)
 
 logger = getScriptLogger(__file__)
 
-CHECK_MESSAGES_TIME_MAX = 5 # in seconds
-CHECK_WORKSPACE_TIME_DELAY = 1 # in seconds
-CHECK_WORKSPACE_TIME_MAX = 5 * 60 # in seconds
+PENDING_DIALOGS_PER_THREAD = 4
+
+def readDialogs(inputFile):
+    """
+    Yields dialogs from the test file, dialog is a list of consecutive test lines with the same 'dialog_id'.
+    """
+    dialog = []
+    for inputLine in inputFile:
+        loadedJson = json.loads(inputLine)
+        if dialog and dialog[-1]['dialog_id'] != loadedJson['dialog_id']:
+            yield dialog
+            dialog = []
+        dialog.append(loadedJson)
+    if dialog:
+        yield dialog
+
+def testDialog(url, username, password, dialog):
+    """
+    Sends turns of the dialog one by one to the conversation service, context received in the response
+    is sent with the next turn. Returns list of the received responses.
+    """
+    outputJsons = []
+    receivedOutputJson = None
+    for loadedJson in dialog:
+        inputJson = loadedJson['input_message'] # input json for tests
+        if loadedJson['dialog_id'] and receivedOutputJson and 'context' in receivedOutputJson and receivedOutputJson['context']:
+            inputJson['context'] = receivedOutputJson['context'] # use context from last dialog turn
+        logger.verbose("url: %s", url)
+        response = httpPost(url, auth=(username, password), headers={'Content-Type': 'application/json'}, data=json.dumps(inputJson, indent=4, ensure_ascii=False).encode('utf8'))
+        if response.status_code == 200:
+            receivedOutputJson = response.json()
+            outputJsons.append(receivedOutputJson)
+        elif response.status_code == 400:
+            logger.error('Error while testing.')
+            errorsInResponse(response.json())
+            sys.exit(1)
+        else:
+            logger.error('Unknown status code:%s.', response.status_code)
+            sys.exit(1)
+    return outputJsons
+
+def testDialogsConcurrently(url, username, password, dialogs, concurrency):
+    """
+    Tests dialogs in 'concurrency' threads (turns of each dialog are still sent one by one).
+    Yields lists of the received responses in the same order as the dialogs were read.
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = deque()
+        try:
+            for dialog in dialogs:
+                pending.append(executor.submit(testDialog, url, username, password, dialog))
+                # do not read whole test file ahead when some dialog takes long
+                if len(pending) >= concurrency * PENDING_DIALOGS_PER_THREAD:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # testing failed (sys.exit in testDialog is re-raised by result()), do not start the remaining dialogs
+            for future in pending:
+                future.cancel()
 
 def main(argv):
     parser = argparse.ArgumentParser(description='Tests all dialog flows from given file and save received responses to output file', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
@@ -40,6 +98,7 @@ def main(argv):
     parser.add_argument('outputFileName', help='file where to store received data from conversation service. (One response at each line.)')
     # optional arguments
     parser.add_argument('-c', '--common_configFilePaths', help='configuaration file', action='append')
+    parser.add_argument('-j', '--concurrency', type=int, default=1, help='number of dialogs (test lines with different \'dialog_id\') tested in parallel, turns of each dialog are sent one by one')
     parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
     args = parser.parse_args(argv)
@@ -48,6 +107,14 @@ def main(argv):
         setLoggerConfig(args.log, args.verbose)
 
     config = Cfg(args)
+    if args.concurrency < 1:
+        logger.error('Concurrency has to be positive number, concurrency: %d', args.concurrency)
+        exit(1)
+    if not hasattr(config, 'common_http_pool_size'):
+        # keep connection for every thread
+        config.common_http_pool_size = max(DEFAULT_POOL_SIZE, args.concurrency)
+    configureHttp(config)
+    configureWorkspacePolling(config)
 
     workspacesUrl = getRequiredParameter(config, 'conversation_url')
     version = getRequiredParameter(config, 'conversation_version')
@@ -65,65 +132,29 @@ def main(argv):
         exit(1)
 
     # wait until workspace is done with training
-    checkWorkspaceTime = 0
-    requestUrl = workspacesUrl + '/' + workspaceId + '?version=' + version
-    while True:
-        logger.verbose("requestUrl: %s", requestUrl)
-        response = requests.get(requestUrl, auth=(username, password))
-        if response.status_code == 200:
-            responseJson = response.json()
-            if errorsInResponse(responseJson):
-                sys.exit(1)
-            logger.verbose("response: %s", responseJson)
-            status = responseJson['status']
-            logger.info('WCS WORKSPACE STATUS: %s', status)
-            if status == 'Available':
-                break
-            else:
-                # sleep some time and check messages again
-                if checkWorkspaceTime > CHECK_WORKSPACE_TIME_MAX:
-                    logger.error('Workspace have not become available before timeout, timeout: %d, response: %s', CHECK_MESSAGES_TIME_MAX, json.dumps(responseJson, indent=4, sort_keys=True, ensure_ascii=False).encode('utf8'))
-                    sys.exit(1)
-                time.sleep(CHECK_WORKSPACE_TIME_DELAY)
-                checkWorkspaceTime = checkWorkspaceTime + CHECK_WORKSPACE_TIME_DELAY
-        elif response.status_code == 400:
-            logger.error('WA not available.')
-            sys.exit(1)
-        else:
-            logger.error('Unknown status code:%s.', response.status_code)
+    status = waitUntilAvailable(workspacesUrl, version, username, password, [workspaceId])[workspaceId]
+    if status != 'Available':
+        logger.error('Workspace is not available, status: %s', status)
+        sys.exit(1)
 
     # run tests
     url = workspacesUrl + '/' + workspaceId + '/message?version=' + version
-    receivedOutputJson = []
     try:
         with openFile(args.inputFileName, "r") as inputFile:
             try:
                 with openFile(args.outputFileName, "w") as outputFile:
+                    dialogs = readDialogs(inputFile)
+                    if args.concurrency > 1:
+                        dialogsOutputJsons = testDialogsConcurrently(url, username, password, dialogs, args.concurrency)
+                    else:
+                        dialogsOutputJsons = (testDialog(url, username, password, dialog) for dialog in dialogs)
                     first = True
-                    dialogId = ""
-                    # for every input line
-                    for inputLine in inputFile:
-                        loadedJson = json.loads(inputLine)
-                        inputJson = loadedJson['input_message'] # input json for tests
-                        if dialogId and dialogId == loadedJson['dialog_id']:
-                            if receivedOutputJson and 'context' in receivedOutputJson and receivedOutputJson['context']:
-                                inputJson['context'] = receivedOutputJson['context'] # use context from last dialog turn
-                        dialogId = loadedJson['dialog_id']
-                        logger.verbose("url: %s", url)
-                        response = requests.post(url, auth=(username, password), headers={'Content-Type': 'application/json'}, data=json.dumps(inputJson, indent=4, ensure_ascii=False).encode('utf8'))
-                        if response.status_code == 200:
-                            receivedOutputJson = response.json()
+                    for outputJsons in dialogsOutputJsons:
+                        for receivedOutputJson in outputJsons:
                             if not first:
                                 outputFile.write("\n")
                             outputFile.write(json.dumps(receivedOutputJson, ensure_ascii=False))
                             first = False
-                        elif response.status_code == 400:
-                            logger.error('Error while testing.')
-                            errorsInResponse(response.json())
-                            sys.exit(1)
-                        else:
-                            logger.error('Unknown status code:%s.', response.status_code)
-                            sys.exit(1)
             except IOError:
                 logger.error('Cannot open test output file %s', args.outputFileName)
                 sys.exit(1)
@@ -14,6 +14,8 @@ limitations under the License.
 """
 
 import argparse
+import collections
+import concurrent.futures
 import datetime
 import json
 import logging
@@ -28,94 +30,94 @@ from wawCommons import getScriptLogger, openFile, setLoggerConfig
 
 logger = getScriptLogger(__file__)
 
-def areSame(expectedOutputJson, receivedOutputJson, failureData, parentPath):
-
-    logger.info("ARE SAME: %s and %s", expectedOutputJson, receivedOutputJson)
-
+DIALOGS_CHUNK_LINES = 1000 # minimal number of lines sent to the process of the pool at once
+PENDING_CHUNKS_PER_WORKER = 4
+REPORT_TOTALS_RESERVE = 128 # number of characters reserved in the start tag of the report for the totals of the whole test
+
+def formatPath(path):
+    """
+    Formats path of the element compared by compareJson. Path is built lazily (the text is created only
+    for the failures), it is either the text of the root path or tuple (parent path, dict key or list index).
+    """
+    steps = []
+    while isinstance(path, tuple):
+        path, step = path
+        steps.append(" - " + str(step) + "th item in list" if isinstance(step, int) else " - " + step)
+    return path + ''.join(reversed(steps))
+
+def compareJson(expectedOutputJson, receivedOutputJson, path):
+    """
+    Compares received output with expected output, keys of expected dicts with None value are not compared.
+    Nothing is logged and no diagnostics are created for the matching elements.
+
+    :return: None if the outputs are same, otherwise tuple (path of the first different element, failure message,
+             expected element description, received element description), message is None if the expected element type is not supported
+    """
     if isinstance(expectedOutputJson, str):
         if not isinstance(receivedOutputJson, str):
-            failureData['message'] = 'Received output differs in type from expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = "Element of the type string (" + expectedOutputJson + ")"
-            failureData['receivedElement'] = "Element of the type " + receivedOutputJson.__class__.__name__
-            logger.info("Different type: %s and %s", expectedOutputJson, receivedOutputJson)
-            return False
+            return (path, 'Received output differs in type from expected output.', "Element of the type string (" + expectedOutputJson + ")",
+                    "Element of the type " + receivedOutputJson.__class__.__name__)
         if expectedOutputJson != receivedOutputJson:
-            failureData['message'] = 'Received output differs from expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = expectedOutputJson
-            failureData['receivedElement'] = receivedOutputJson
-            logger.info("NOT SAME: %s and %s", expectedOutputJson, receivedOutputJson)
-            return False
-        else:
-            logger.info('SAME: string %s and %s are same', expectedOutputJson, receivedOutputJson)
-            return True
+            return (path, 'Received output differs from expected output.', expectedOutputJson, receivedOutputJson)
+        return None
 
     elif isinstance(expectedOutputJson, int):
         if not isinstance(receivedOutputJson, int):
-            failureData['message'] = 'Received output differs in type from expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = "Element of the type int (" + str(expectedOutputJson) + ")"
-            failureData['receivedElement'] = "Element of the type " + receivedOutputJson.__class__.__name__
-            logger.info("Different type: %s and %s", expectedOutputJson, receivedOutputJson)
-            return False
+            return (path, 'Received output differs in type from expected output.', "Element of the type int (" + str(expectedOutputJson) + ")",
+                    "Element of the type " + receivedOutputJson.__class__.__name__)
         if expectedOutputJson != receivedOutputJson:
-            failureData['message'] = 'Received output differs from expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = str(expectedOutputJson)
-            failureData['receivedElement'] = str(receivedOutputJson)
-            logger.info("NOT SAME: %s and %s", expectedOutputJson, receivedOutputJson)
-            return False
-        else:
-            logger.info('SAME: int %s and %s are same', expectedOutputJson, receivedOutputJson)
-            return True
+            return (path, 'Received output differs from expected output.', str(expectedOutputJson), str(receivedOutputJson))
+        return None
 
     elif isinstance(expectedOutputJson, list):
         if not isinstance(receivedOutputJson, list):
-            failureData['message'] = 'Received output differs in type from expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = "Element of the type list"
-            failureData['receivedElement'] = "Element of the type " + receivedOutputJson.__class__.__name__
-            logger.info("Different type: %s and %s", expectedOutputJson, receivedOutputJson)
-            return False
+            return (path, 'Received output differs in type from expected output.', "Element of the type list",
+                    "Element of the type " + receivedOutputJson.__class__.__name__)
         if len(expectedOutputJson) != len(receivedOutputJson):
-            failureData['message'] = 'List in received output differs in length from list in expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = "List of the length " + str(len(expectedOutputJson))
-            failureData['receivedElement'] = "List of the length " + str(len(receivedOutputJson))
-            logger.error('Different list length!')
-            logger.error('expected %s', expectedOutputJson)
-            logger.error('received %s', receivedOutputJson)
-            return False
-        else:
-            for i in range(len(expectedOutputJson)):
-                logger.info("STEP: Item %d", i)
-                if not areSame(expectedOutputJson[i], receivedOutputJson[i], failureData, parentPath + " - " + str(i) + "th item in list"):
-                    logger.error('Different list items in positon %d!', i)
-                    return False
-            return True
+            return (path, 'List in received output differs in length from list in expected output.',
+                    "List of the length " + str(len(expectedOutputJson)), "List of the length " + str(len(receivedOutputJson)))
+        for i, (expectedItem, receivedItem) in enumerate(zip(expectedOutputJson, receivedOutputJson)):
+            difference = compareJson(expectedItem, receivedItem, (path, i))
+            if difference:
+                return difference
+        return None
 
     elif isinstance(expectedOutputJson, dict):
         if not isinstance(receivedOutputJson, dict):
-            failureData['message'] = 'Received output differs in type from expected output.' + " (" + parentPath + ")"
-            failureData['expectedElement'] = "Element of the type dict"
-            failureData['receivedElement'] = "Element of the type " + receivedOutputJson.__class__.__name__
-            logger.info("Different type: %s and %s", expectedOutputJson, receivedOutputJson)
-            return False
-        for elementKey in expectedOutputJson:
-            logger.info("STEP: Element key %s", elementKey)
-            if expectedOutputJson[elementKey] is None:
-                logger.info("NONE: Element with key %s is none", elementKey)
+            return (path, 'Received output differs in type from expected output.', "Element of the type dict",
+                    "Element of the type " + receivedOutputJson.__class__.__name__)
+        for elementKey, expectedItem in expectedOutputJson.items():
+            if expectedItem is None:
                 continue
-            if elementKey not in receivedOutputJson or receivedOutputJson[elementKey] is None:
-                failureData['message'] = 'Received output has no key ' + elementKey + '.' + " (" + parentPath + ")"
-                failureData['expectedElement'] = "Dict with key " + elementKey
-                failureData['receivedElement'] = "None"
-                logger.error('Missing key in received json!')
-                return False
-            else:
-                if not areSame(expectedOutputJson[elementKey], receivedOutputJson[elementKey], failureData, parentPath + " - " + elementKey):
-                    logger.error('Different dict items for key %s!', elementKey)
-                    return False
-        return True
+            receivedItem = receivedOutputJson.get(elementKey)
+            if receivedItem is None:
+                return (path, 'Received output has no key ' + elementKey + '.', "Dict with key " + elementKey, "None")
+            difference = compareJson(expectedItem, receivedItem, (path, elementKey))
+            if difference:
+                return difference
+        return None
 
     else:
-        logger.error('Unsupported type of element %s, type %s!', str(expectedOutputJson), expectedOutputJson.__class__.__name__)
+        return (path, None, str(expectedOutputJson), expectedOutputJson.__class__.__name__)
+
+def areSame(expectedOutputJson, receivedOutputJson, failureData, parentPath):
+    """
+    Returns True if the received output is same as the expected output (see compareJson),
+    otherwise fills 'message', 'expectedElement' and 'receivedElement' of failureData and returns False.
+    """
+    difference = compareJson(expectedOutputJson, receivedOutputJson, parentPath)
+    if difference is None:
+        return True
+
+    path, message, expectedElement, receivedElement = difference
+    if message is None:
+        logger.error('Unsupported type of element %s, type %s! (%s)', expectedElement, receivedElement, formatPath(path))
         return False
+    failureData['message'] = message + " (" + formatPath(path) + ")"
+    failureData['expectedElement'] = expectedElement
+    failureData['receivedElement'] = receivedElement
+    logger.info("NOT SAME: %s", failureData['message'])
+    return False
 
 def createLineFailureXML(failureData):
     lineFailureXml = LET.Element('failure')
@@ -130,6 +132,140 @@ def createLineFailureXML(failureData):
     lineFailureReceivedXml.text = failureData['receivedElement']
     return lineFailureXml
 
+def createTestSuitesStartTag(testSuitesAttributes, padding=0):
+    """ :return: start tag of the root element of the report with given attributes and padding spaces before '>' """
+    return LET.tostring(LET.Element('testsuites', testSuitesAttributes), encoding='unicode')[:-len('/>')] + ' ' * padding + '>\n'
+
+def finalizeReport(outputFileName, testSuitesAttributes):
+    """
+    Overwrites the start tag of the root element of the report by the tag with given attributes in place.
+    Totals of the whole test are known only when all the dialogs are written, they fill the padding of the original tag.
+    """
+    with open(outputFileName, 'r+b') as reportFile:
+        reservedLength = len(reportFile.readline()) - len(b'>\n')
+        startTag = createTestSuitesStartTag(testSuitesAttributes).encode('utf-8')[:-len(b'>\n')]
+        reportFile.seek(0)
+        reportFile.write(startTag.ljust(reservedLength) + b'>\n')
+
+def readDialogs(expectedJsonFile, receivedJsonFile, receivedFileName):
+    """
+    Yields dialogs from the files with expected and received JSONs. Dialog is tuple (dialog id, number of its first line,
+    list of pairs of expected and received JSON lines), following lines with the same dialog id belong to the same dialog.
+    """
+    dialog = None
+    line = 0
+    for expectedJsonLine in expectedJsonFile:
+        line += 1
+        receivedJsonLine = receivedJsonFile.readline()
+        if not receivedJsonLine: # no more received line
+            logger.error('Missing output JSON in file %s, line %d', receivedFileName, line)
+            sys.exit(1)
+        dialogId = json.loads(expectedJsonLine)['dialog_id']
+        if dialog is None or dialog[0] == 0 or dialog[0] != dialogId:
+            if dialog is not None:
+                yield dialog
+            dialog = (dialogId, line, [])
+        dialog[2].append((expectedJsonLine, receivedJsonLine))
+    if dialog is not None:
+        yield dialog
+
+    if receivedJsonFile.readline(): logger.error('More than expected lines in file %s, line %d', receivedFileName, line)
+
+def evaluateDialog(dialog):
+    """
+    Compares expected and received JSONs of the dialog (see readDialogs).
+    :return: tuple (testsuite XML element serialized as a child of the report root, number of tests, number of failures, first failed line or None)
+    """
+    dialogId, firstLine, jsonLines = dialog
+    nFailuresInDialog = 0
+    firstFailedLine = None
+    timeDialogStart = time.time()
+
+    # XML (new dialouge)
+    dialogXml = LET.Element('testsuite')
+
+    for line, (expectedJsonLine, receivedJsonLine) in enumerate(jsonLines, firstLine):
+        expectedJson = json.loads(expectedJsonLine)['output_message']
+        receivedJson = json.loads(receivedJsonLine)
+
+        timeLineStart = time.time()
+        checkMessagesTime = 0
+        failureData = {'expectedElement': "", 'receivedElement': ""}
+
+        # XML
+        lineXml = LET.Element('testcase')
+        dialogXml.append(lineXml)
+        lineXml.attrib['classname'] = 'dialog.' + str(dialogId)
+        lineXml.attrib['name'] = 'line ' + str(line)
+        lineXml.attrib['time'] = str(time.time() - timeLineStart)
+
+        if not areSame(expectedJson, receivedJson, failureData, "root"):
+            # line failure
+            lineXml.append(createLineFailureXML(failureData))
+
+            nFailuresInDialog += 1 # in this file
+            if firstFailedLine is None:
+                firstFailedLine = line
+
+            logger.info('EXPECTED OUTPUT: ' + json.dumps(expectedJson, indent=4, ensure_ascii=False))
+            logger.info('RECEIVED OUTPUT: ' + json.dumps(receivedJson, indent=4, ensure_ascii=False))
+            resultText = 'FAILED'
+
+        else:
+            resultText = 'OK'
+
+        logger.info('  LINE: %d, RESULT: %s, TIME: %.2f sec', line, resultText, checkMessagesTime)
+
+    dialogXml.attrib['name'] = 'dialog ' + str(dialogId)
+    dialogXml.attrib['tests'] = str(len(jsonLines))
+    dialogXml.attrib['failures'] = str(nFailuresInDialog)
+    dialogXml.attrib['time'] = str(time.time() - timeDialogStart)
+
+    LET.indent(dialogXml, level=1) # the same indentation as by pretty print of the whole report
+    return '  ' + LET.tostring(dialogXml, encoding='unicode') + '\n', len(jsonLines), nFailuresInDialog, firstFailedLine
+
+def initEvaluationWorker(logLevel, isVerbose):
+    """ Initializes process of the pool evaluating the dialogs. """
+    if not hasattr(logging.Logger, 'verbose'):
+        # process was spawned (not forked), logging has to be configured again
+        setLoggerConfig(logLevel, isVerbose)
+
+def evaluateDialogs(dialogs):
+    """ :return: list of results of evaluateDialog for all the given dialogs """
+    return [evaluateDialog(dialog) for dialog in dialogs]
+
+def evaluateDialogsInParallel(dialogs, workers):
+    """
+    Evaluates dialogs in the pool of processes, dialogs are sent to the processes in chunks of at least DIALOGS_CHUNK_LINES lines.
+    Yields results of evaluateDialog in the same order as the dialogs were read, only a few chunks are read ahead.
+    """
+    def chunks():
+        chunk = []
+        nLines = 0
+        for dialog in dialogs:
+            chunk.append(dialog)
+            nLines += len(dialog[2])
+            if nLines >= DIALOGS_CHUNK_LINES:
+                yield chunk
+                chunk = []
+                nLines = 0
+        if chunk:
+            yield chunk
+
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=initEvaluationWorker,
+            initargs=(logging.getLevelName(logging.getLogger().level), getattr(logging.Logger, 'isVerbose', False))) as executor:
+        pending = collections.deque()
+        try:
+            for chunk in chunks():
+                pending.append(executor.submit(evaluateDialogs, chunk))
+                if len(pending) >= workers * PENDING_CHUNKS_PER_WORKER:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
 def main(argv):
     parser = argparse.ArgumentParser(description='Compares all dialog flows from given files and generate xml report', formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     # positional arguments
@@ -140,139 +276,71 @@ def main(argv):
     parser.add_argument('-v','--verbose', required=False, help='verbosity', action='store_true')
     parser.add_argument('--log', type=str.upper, default=None, choices=list(logging._levelToName.values()))
     parser.add_argument('-e','--exception_if_fail', required=False, help='script throws exception if any test fails', action='store_true')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='number of processes comparing the dialogs (1 compares them in the main process)')
     args = parser.parse_args(argv)
 
     if __name__ == '__main__':
         setLoggerConfig(args.log, args.verbose)
 
+    if args.workers < 1:
+        logger.error('Number of workers has to be positive number, workers: %d', args.workers)
+        sys.exit(1)
+
     testName = re.sub(r"\.[^\.]*$", "", os.path.basename(args.expectedFileName))
 
-    # expected JSON
-    with openFile(args.expectedFileName, "r") as expectedJsonFile:
-        # received JSON
-        with openFile(args.receivedFileName, "r") as receivedJsonFile:
-
-            # init whole test
-            nTests = 0
-            nTestsFailed = 0
-            nDialogs = 0
-            nDialogsFailed = 0
-            firstFailedLine = None
-            timeStart = time.time() # TODO: It does not make sense to measure time of the evaluation, it should be time of the testing (calling WA) instead
-
-            # XML (whole test)
-            outputXml = LET.Element('testsuites')
-
-            # print (whole test)
-            logger.info('--------------------------------------------------------------------------------')
-            logger.info('-- TEST: ' + testName)
-            logger.info('--------------------------------------------------------------------------------')
-
-            # XML (new dialouge)
-            dialogXml = LET.Element('testsuite')
-            outputXml.append(dialogXml)
-
-            expectedJsonLine = expectedJsonFile.readline()
-            receivedJsonLine = receivedJsonFile.readline()
-
-            line = 0
-            dialogId = 0
-            nTestsinDialog = 0
-            nFailuresInDialog = 0
-            timeDialogStart = time.time()
-
-            # for every line
-            while expectedJsonLine:
-                line += 1
-                if not receivedJsonLine: # no more received line
-                    logger.error('Missing output JSON in file %s, line %d', args.receivedFileName, line)
-                    sys.exit(1)
-                expectedData = json.loads(expectedJsonLine)
-                expectedJson = expectedData['output_message']
-                receivedJson = json.loads(receivedJsonLine)
-
-                if (dialogId == 0 or dialogId != expectedData['dialog_id']):
-
-                    if nDialogs > 0:
-                        # end previous dialog
-                        logger.info('--------------------------------------------------------------------------------')
-                        if nFailuresInDialog: # at least one failure in this dialog
-                            logger.info('-- TEST RESULT: FAILED, TOTAL FAILURES: %d, LINE OF THE FIRST FAILURE: %d', nFailuresInDialog, firstFailedLine)
-                            nDialogsFailed += 1
-                        else:
-                            logger.info('-- TEST RESULT: OK')
-                        logger.info('--------------------------------------------------------------------------------')
-
-                        # XML previous dialog
-                        dialogXml.attrib['name'] = 'dialog ' + str(dialogId)
-                        dialogXml.attrib['tests'] = str(nTestsinDialog)
-                        dialogXml.attrib['failures'] = str(nFailuresInDialog)
-                        dialogXml.attrib['time'] = str(time.time() - timeDialogStart)
-
-                        # XML (new dialouge)
-                        dialogXml = LET.Element('testsuite')
-                        outputXml.append(dialogXml)
-
-                    # init new dialog
-                    nDialogs += 1
-                    nTestsinDialog = 0
-                    nFailuresInDialog = 0
-                    timeDialogStart = time.time()
-                    dialogId = expectedData['dialog_id']
-
-                nTests += 1
-                nTestsinDialog += 1
-                timeLineStart = time.time()
-                checkMessagesTime = 0
-                failureData = {'expectedElement': "", 'receivedElement': ""}
-
-                # XML
-                lineXml = LET.Element('testcase')
-                dialogXml.append(lineXml)
-                lineXml.attrib['classname'] = 'dialog.' + str(dialogId)
-                lineXml.attrib['name'] = 'line ' + str(line)
-                lineXml.attrib['time'] = str(time.time() - timeLineStart)
-
-                if not areSame(expectedJson, receivedJson, failureData, "root"):
-                    # line failure
-                    lineXml.append(createLineFailureXML(failureData))
-
-                    nTestsFailed += 1
-                    nFailuresInDialog += 1 # in this file
-                    if firstFailedLine is None:
-                        firstFailedLine = line
+    # init whole test
+    nTests = 0
+    nTestsFailed = 0
+    nDialogs = 0
+    nDialogsFailed = 0
+    firstFailedLine = None
+    timeStart = time.time() # TODO: It does not make sense to measure time of the evaluation, it should be time of the testing (calling WA) instead
 
-                    logger.info('EXPECTED OUTPUT: ' + json.dumps(expectedJson, indent=4, ensure_ascii=False))
-                    logger.info('RECEIVED OUTPUT: ' + json.dumps(receivedJson, indent=4, ensure_ascii=False))
-                    resultText = 'FAILED'
+    # print (whole test)
+    logger.info('--------------------------------------------------------------------------------')
+    logger.info('-- TEST: ' + testName)
+    logger.info('--------------------------------------------------------------------------------')
 
+    # XML report is written incrementally, dialog by dialog
+    with openFile(args.output, "w") as outputFile:
+        outputFile.write(createTestSuitesStartTag({'name': testName, 'timestamp': '{0:%Y-%b-%d %H:%M:%S}'.format(datetime.datetime.now())},
+                                                  REPORT_TOTALS_RESERVE))
+        try:
+            # expected JSON
+            with openFile(args.expectedFileName, "r") as expectedJsonFile, \
+                    openFile(args.receivedFileName, "r") as receivedJsonFile: # received JSON
+                dialogs = readDialogs(expectedJsonFile, receivedJsonFile, args.receivedFileName)
+                if args.workers > 1:
+                    dialogsResults = evaluateDialogsInParallel(dialogs, args.workers)
                 else:
-                    resultText = 'OK'
-
-                logger.info('  LINE: %d, RESULT: %s, TIME: %.2f sec', line, resultText, checkMessagesTime)
-
-                expectedJsonLine = expectedJsonFile.readline()
-                receivedJsonLine = receivedJsonFile.readline()
+                    dialogsResults = (evaluateDialog(dialog) for dialog in dialogs)
 
-            # end for each line
-            # end previous dialog
-            logger.info('--------------------------------------------------------------------------------')
-            if nFailuresInDialog: # at least one failure in this dialog
-                logger.info('-- TEST RESULT: FAILED, TOTAL FAILURES: %d, LINE OF THE FIRST FAILURE: %d', nFailuresInDialog, firstFailedLine)
-                nDialogsFailed += 1
-            else:
-                logger.info('-- TEST RESULT: OK')
-            logger.info('--------------------------------------------------------------------------------')
-
-            # XML previous dialog
-            dialogXml.attrib['name'] = 'dialog ' + str(dialogId)
-            dialogXml.attrib['tests'] = str(nTestsinDialog)
-            dialogXml.attrib['failures'] = str(nFailuresInDialog)
-            dialogXml.attrib['time'] = str(time.time() - timeDialogStart)
-
-            if receivedJsonLine: logger.error('More than expected lines in file %s, line %d', args.receivedFileName, line)
-
-        # close files
+                for dialogXmlString, nTestsInDialog, nFailuresInDialog, dialogFirstFailedLine in dialogsResults:
+                    nDialogs += 1
+                    nTests += nTestsInDialog
+                    nTestsFailed += nFailuresInDialog
+                    if firstFailedLine is None:
+                        firstFailedLine = dialogFirstFailedLine
+
+                    # end dialog
+                    logger.info('--------------------------------------------------------------------------------')
+                    if nFailuresInDialog: # at least one failure in this dialog
+                        logger.info('-- TEST RESULT: FAILED, TOTAL FAILURES: %d, LINE OF THE FIRST FAILURE: %d', nFailuresInDialog, firstFailedLine)
+                        nDialogsFailed += 1
+                    else:
+                        logger.info('-- TEST RESULT: OK')
+                    logger.info('--------------------------------------------------------------------------------')
+
+                    # XML dialog, flushed so the report contains all the finished dialogs if the evaluation is interrupted
+                    outputFile.write(dialogXmlString)
+                    outputFile.flush()
+
+                if not nDialogs:
+                    # empty test, report contains one empty dialog
+                    outputFile.write(evaluateDialog((0, 1, []))[0])
+            # close files
+        finally:
+            outputFile.write('</testsuites>\n')
 
     logger.info('-------------------------------------------------------------------------------')
     logger.info('--------------------------------------------------------------------------------')
@@ -280,14 +348,12 @@ def main(argv):
     else: logger.info('-- SUMMARY - DIALOUGES: %s, RESULT: OK', nDialogs)
     logger.info('--------------------------------------------------------------------------------')
 
-    outputXml.attrib['name'] = testName
-    outputXml.attrib['tests'] = str(nTests)
-    outputXml.attrib['failures'] = str(nTestsFailed)
-    outputXml.attrib['timestamp'] = '{0:%Y-%b-%d %H:%M:%S}'.format(datetime.datetime.now())
-    outputXml.attrib['time'] = str(time.time() - timeStart)
-
-    with openFile(args.output, "w") as outputFile:
-        outputFile.write(LET.tostring(outputXml, pretty_print=True, encoding='unicode'))
+    finalizeReport(args.output, {
+        'name': testName,
+        'tests': str(nTests),
+        'failures': str(nTestsFailed),
+        'timestamp': '{0:%Y-%b-%d %H:%M:%S}'.format(datetime.datetime.now()),
+        'time': str(time.time() - timeStart)})
 
     #as last step of our script, we raise an exception in case user required such behavior and any test failure was detected
     if args.exception_if_fail and nDialogsFailed: